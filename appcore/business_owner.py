@@ -0,0 +1,106 @@
+"""
+Denormalized business column of the business-owned models.
+
+BusinessOwnedModel subclasses (appcore/models.py) carry an indexed `business`
+foreign key. Most of them copy it on save from the row named by their
+business_parent, e.g.
+
+    InternalLocation.headquarters_key -> Headquarters.business_key
+    SubsystemComponent.asset_system_key -> AssetSystem.business
+
+so scoping any of these tables to a business is a lookup on one column and
+their business path (appcore/business_paths.py) is ('business',). Models
+without a business_parent (Asset) own the column and it is set directly.
+
+When the business of a row with business-owned children changes
+(Headquarters.business_key, Asset.business, or a copied column whose parent
+moved) propagate_business_id() rewrites the column of every row below it with
+one UPDATE per model. The receiver is connected in LocationsConfig.ready().
+
+Writes that skip save() (bulk_create, QuerySet.update) set the column
+themselves.
+"""
+
+from django.apps import apps
+from django.db.models.signals import post_save
+from appcore.business_paths import get_business_lookup, get_business_path, resolve_business_id
+
+
+_business_children: dict[type, list[tuple[type, str]]] | None = None
+_NOT_LOADED = object()
+
+
+def business_children(model) -> list[tuple[type, str]]:
+    """Returns the (child model, parent field) pairs of the models that copy their business from model"""
+    global _business_children
+    if _business_children is None:
+        _business_children = {}
+        for child in apps.get_models():
+            parent_field = getattr(child, 'business_parent', None)
+            if parent_field is not None:
+                parent = child._meta.get_field(parent_field).related_model
+                _business_children.setdefault(parent, []).append((child, parent_field))
+    return _business_children.get(model, [])
+
+
+def business_source_field(model):
+    """Returns the field that holds the business of a row of model (business_key, business), None for Business"""
+    path = get_business_path(model)
+    return model._meta.get_field(path[0]) if path else None
+
+
+def parent_business_id(instance):
+    """Returns the business id of the business_parent of the instance, without a query when the parent is loaded"""
+    field = instance._meta.get_field(instance.business_parent)
+    parent_id = getattr(instance, field.attname)
+    if parent_id is None:
+        return None
+    if field.is_cached(instance):
+        parent = field.get_cached_value(instance)
+        if parent is not None and parent.pk == parent_id:
+            return resolve_business_id(parent)
+    parent_model = field.related_model
+    return parent_model._default_manager.filter(pk=parent_id).values_list(
+        get_business_lookup(parent_model), flat=True
+    ).first()
+
+
+def remember_business_id(instance, field_names=None) -> None:
+    """Keeps the business id the row has in the database, to detect a move to another business on save"""
+    if get_business_path(type(instance)) is None:
+        return
+    field = business_source_field(type(instance))
+    if field is not None and (field_names is None or field.attname in field_names):
+        instance._loaded_business_id = getattr(instance, field.attname)
+
+
+def _descendant_lookups(model, suffix=None):
+    """Yields (model, lookup to the id of a model row) for every model below model, e.g. (SubsystemComponent, 'asset_system_key__asset_key')"""
+    for child, parent_field in business_children(model):
+        lookup = parent_field if suffix is None else f'{parent_field}__{suffix}'
+        yield child, lookup
+        yield from _descendant_lookups(child, lookup)
+
+
+def propagate_business_id(instance) -> None:
+    """Copies the business id of the instance to every business-owned row below it"""
+    business_id = getattr(instance, business_source_field(type(instance)).attname)
+    for child, lookup in _descendant_lookups(type(instance)):
+        child._default_manager.filter(**{lookup: instance.pk}).update(business_id=business_id)
+
+
+def business_owner_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    field = business_source_field(sender)
+    business_id = getattr(instance, field.attname)
+    if not (created or raw) and (update_fields is None or field.name in update_fields):
+        if getattr(instance, '_loaded_business_id', _NOT_LOADED) != business_id:
+            propagate_business_id(instance)
+    instance._loaded_business_id = business_id
+
+
+def connect_business_propagation() -> None:
+    global _business_children
+    _business_children = None
+    for model in apps.get_models():
+        if business_children(model):
+            post_save.connect(business_owner_saved, sender=model, dispatch_uid=f'business_owner_saved_{model._meta.label_lower}')
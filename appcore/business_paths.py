@@ -0,0 +1,162 @@
+"""
+Registry of the ForeignKey path from every BaseModel subclass to its owning Business.
+
+The paths are built once in LocationsConfig.ready(), e.g.
+
+    Headquarters     -> ('business_key',)
+    InternalLocation -> ('business',)
+    Business         -> ()
+
+(the business-owned models carry a denormalized business column, see
+appcore/business_owner.py, so their shortest path is that column)
+
+so the owning business can be resolved without walking every relation of the
+object: the business id comes from the FK ids already loaded on the instance
+and related objects already cached on it, or from one values_list query over
+the rest of the path. Models without a path to Business map to None.
+"""
+
+from collections import deque
+from django.apps import apps
+
+
+_business_paths: dict[type, tuple[str, ...] | None] = {}
+
+
+def _find_business_path(model, business_model) -> tuple[str, ...] | None:
+    """Breadth first search over the concrete ForeignKeys, returns the shortest path of field names"""
+    queue = deque([(model, ())])
+    visited = {model}
+    while queue:
+        current, path = queue.popleft()
+        if current is business_model:
+            return path
+        for field in current._meta.get_fields():
+            if not ((field.many_to_one or field.one_to_one) and field.concrete) or field.related_model in visited:
+                continue
+            visited.add(field.related_model)
+            queue.append((field.related_model, path + (field.name,)))
+    return None
+
+
+def build_business_paths() -> None:
+    from appcore.models import BaseModel
+    Business = apps.get_model('locations', 'Business')
+
+    _business_paths.clear()
+    for model in apps.get_models():
+        if issubclass(model, BaseModel):
+            _business_paths[model] = _find_business_path(model, Business)
+
+
+def get_business_path(model) -> tuple[str, ...] | None:
+    """Returns the FK path of the model, models outside the startup registry are resolved once and kept"""
+    if model not in _business_paths:
+        _business_paths[model] = _find_business_path(model, apps.get_model('locations', 'Business'))
+    return _business_paths[model]
+
+
+def _walk_loaded(obj, path):
+    """Follows the path through the related objects already cached on obj.
+
+    Returns the last object reached and the index of the first hop that is not loaded."""
+    current = obj
+    for index, name in enumerate(path):
+        field = current._meta.get_field(name)
+        if not field.is_cached(current):
+            return current, index
+        related = field.get_cached_value(current)
+        if related is None:
+            return None, index
+        current = related
+    return current, len(path)
+
+
+def get_business_lookup(model) -> str | None:
+    """Returns the path of the model as an ORM lookup ('headquarters_key__business_key'), 'pk' for Business"""
+    path = get_business_path(model)
+    if path is None:
+        return None
+    return '__'.join(path) if path else 'pk'
+
+
+_UNRESOLVED = object()
+
+
+def _resolve_loaded_business_id(obj, path):
+    """Returns the business id using only what is loaded on obj, _UNRESOLVED when a query is needed"""
+    if not path:
+        return obj.pk
+
+    current, index = _walk_loaded(obj, path)
+    if current is None:
+        return None
+    if index == len(path):
+        return current.pk
+
+    field = current._meta.get_field(path[index])
+    related_id = getattr(current, field.attname)
+    if related_id is None or index == len(path) - 1:
+        return related_id
+    return _UNRESOLVED
+
+
+def resolve_business_id(obj):
+    """Returns the id of the Business that owns obj, with at most one query"""
+    if obj is None:
+        return None
+    path = get_business_path(type(obj))
+    if path is None:
+        return None
+
+    business_id = _resolve_loaded_business_id(obj, path)
+    if business_id is not _UNRESOLVED:
+        return business_id
+
+    current, index = _walk_loaded(obj, path)
+    field = current._meta.get_field(path[index])
+    return field.related_model._default_manager.filter(pk=getattr(current, field.attname)).values_list(
+        '__'.join(path[index + 1:]), flat=True
+    ).first()
+
+
+def resolve_business_ids(objs) -> list:
+    """Returns the owning business id of every object, in order, with at most one query per model"""
+    business_ids = [None] * len(objs)
+    pending: dict[type, dict] = {}
+
+    for position, obj in enumerate(objs):
+        path = get_business_path(type(obj))
+        if path is None:
+            continue
+        business_id = _resolve_loaded_business_id(obj, path)
+        if business_id is _UNRESOLVED:
+            pending.setdefault(type(obj), {}).setdefault(obj.pk, []).append(position)
+        else:
+            business_ids[position] = business_id
+
+    for model, positions_by_pk in pending.items():
+        rows = model._default_manager.filter(pk__in=positions_by_pk.keys()).values_list('pk', get_business_lookup(model))
+        for pk, business_id in rows:
+            for position in positions_by_pk[pk]:
+                business_ids[position] = business_id
+
+    return business_ids
+
+
+def resolve_business(obj):
+    """Returns the Business that owns obj, reusing the instance when it is already loaded"""
+    if obj is None:
+        return None
+    path = get_business_path(type(obj))
+    if path is None:
+        return None
+
+    current, index = _walk_loaded(obj, path)
+    if current is not None and index == len(path):
+        return current
+
+    business_id = resolve_business_id(obj)
+    if business_id is None:
+        return None
+    return apps.get_model('locations', 'Business')._default_manager.filter(pk=business_id).first()
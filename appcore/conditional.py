@@ -0,0 +1,80 @@
+"""
+Conditional GET (ETag / Last-Modified) for the list endpoints.
+
+The validators come from one aggregate query over the rows the user can see,
+e.g. for the headquarters list
+
+    SELECT MAX(update_date), MAX(business.update_date), COUNT(DISTINCT id) ...
+
+hashed together with the permission version of the user (a change of roles or
+memberships changes the visible rows without touching them) and the full path
+of the request (the page, the cursor). A request whose If-None-Match holds the
+current ETag gets a 304 before anything is read or serialized.
+
+Last-Modified is sent but If-Modified-Since is not used to answer 304: a
+deleted row lowers the count without moving the latest update_date, which only
+the ETag sees.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import NamedTuple
+from django.db.models import Count
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from permissions.domain.permission_cache import get_user_permission_version
+
+
+class Fingerprint(NamedTuple):
+    etag: str
+    last_modified: object = None
+
+
+def queryset_fingerprint(request, queryset, *aggregates) -> Fingerprint:
+    """Fingerprint of the rows of queryset from its row count and the aggregates (Max('update_date'), ...) in one query.
+
+    Last-Modified is the latest of the datetime aggregates"""
+    named = {f'aggregate_{position}': expression for position, expression in enumerate(aggregates)}
+    summary = queryset.order_by().aggregate(total=Count('pk', distinct=True), **named)
+
+    user = request.user
+    version = get_user_permission_version(user.pk) if user is not None and user.is_authenticated else None
+    parts = [request.get_full_path(), version, *summary.values()]
+    etag = hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()[:32]
+
+    timestamps = [value for value in summary.values() if isinstance(value, datetime)]
+    return Fingerprint(etag=quote_etag(etag), last_modified=max(timestamps) if timestamps else None)
+
+
+class ConditionalGetMixin:
+    """
+    Adds the ETag and Last-Modified of get_fingerprint() to the GET responses
+    of the view. get() calls not_modified() first and returns its response
+    when it is not None.
+    """
+
+    def get_fingerprint(self, request, *args, **kwargs) -> Fingerprint:
+        raise NotImplementedError
+
+    def not_modified(self, request, *args, **kwargs):
+        """Computes the fingerprint of the request, returns a 304 response when If-None-Match already holds it"""
+        self.fingerprint = self.get_fingerprint(request, *args, **kwargs)
+        header = request.headers.get('If-None-Match')
+        if not header:
+            return None
+        etags = {etag.removeprefix('W/') for etag in parse_etags(header)}
+        if '*' in etags or self.fingerprint.etag in etags:
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        fingerprint = getattr(self, 'fingerprint', None)
+        if fingerprint is not None and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = fingerprint.etag
+            if fingerprint.last_modified is not None:
+                response['Last-Modified'] = http_date(fingerprint.last_modified.timestamp())
+            #the body depends on the user, shared caches must not reuse it
+            response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -1,29 +1,49 @@
 from django.db import models
+from appcore.business_paths import resolve_business, resolve_business_id
+from appcore.business_owner import parent_business_id, remember_business_id
 
 class BaseModel(models.Model):
     class Meta:
         abstract = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        remember_business_id(instance, field_names)
+        return instance
+
     def get_business(self):
         """
-        Retorna el business asociado siguiendo relaciones hacia atrás.
+        Retorna el business asociado siguiendo la ruta de llaves foráneas
+        precalculada al iniciar (ver appcore/business_paths.py).
+        """
+        return resolve_business(self)
+
+    def get_business_id(self):
+        """
+        Retorna el id del business asociado sin cargar los objetos intermedios.
         """
-        # Busca si el modelo tiene business_key, llave foránea directa a business
-        if hasattr(self, "business_key"):
-            return self.business_key
-
-        # Si no tiene business_key, revisa campos con relación a otros modelos
-        for field in self._meta.get_fields():
-            # revisa solamente los campos que son relaciones many-to-one (ForeignKey)
-            if field.is_relation and field.many_to_one and hasattr(self, field.name):
-                related_obj = getattr(self, field.name)
-                if related_obj:
-                    # Si ese objeto tiene business, retornarlo
-                    if hasattr(related_obj, "get_business"):
-                        return related_obj.get_business()
-                    if hasattr(related_obj, "business_key"):
-                        return related_obj.business
-
-        return None
-    
-    
\ No newline at end of file
+        return resolve_business_id(self)
+
+
+class BusinessOwnedModel(BaseModel):
+    """
+    BaseModel con la columna business desnormalizada (ver appcore/business_owner.py).
+
+    business_parent nombra la llave foránea de la que se copia el business al
+    guardar, los modelos sin business_parent asignan el business directamente.
+    """
+    business_parent: str | None = None
+
+    business = models.ForeignKey('locations.Business', on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.business_parent is not None and (update_fields is None or self.business_parent in update_fields):
+            self.business_id = parent_business_id(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'business'}
+        super().save(*args, **kwargs)
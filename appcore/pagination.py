@@ -0,0 +1,102 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+The rows are ordered by a unique key, e.g. ('business_key_id', 'id'), and a
+page is the first page_size rows after the key of the last row of the previous
+page:
+
+    WHERE business_key_id > x OR (business_key_id = x AND id > y)
+    ORDER BY business_key_id, id LIMIT page_size + 1
+
+so every page costs the same index range scan and no OFFSET. The key of the
+last row travels to the client as an opaque url-safe base64 cursor.
+"""
+
+import base64
+import json
+from functools import reduce
+from operator import or_
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+
+class KeysetPagination:
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, ordering=(), key=None, page_size=None, max_page_size=None):
+        """ordering: the fields of the key, key: callable returning the key of a row when rows are not dicts or instances.
+
+        Listing methods that own their ordering (e.g. HeadquartersQuerySet.get_user_headquarters) set both."""
+        self.ordering = tuple(ordering)
+        self.key = key or self._default_key
+        self.page_size = page_size or self.page_size
+        self.max_page_size = max_page_size or self.max_page_size
+        self.next_cursor = None
+
+    def _default_key(self, row):
+        if isinstance(row, dict):
+            return [row[field] for field in self.ordering]
+        return [getattr(row, field) for field in self.ordering]
+
+    def encode_cursor(self, key) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(key), separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor: str) -> list:
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except (ValueError, TypeError, UnicodeError):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+        if not isinstance(key, list) or len(key) != len(self.ordering):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+        #the keys this class encodes are scalars, a list or object was not made here
+        if any(isinstance(value, (list, dict)) for value in key):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+        return key
+
+    def get_page_size(self, request) -> int:
+        value = request.GET.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            page_size = int(value)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'A positive integer is required.'})
+        if page_size <= 0:
+            raise ValidationError({self.page_size_query_param: 'A positive integer is required.'})
+        return min(page_size, self.max_page_size)
+
+    def after(self, queryset, key):
+        """Filters the rows that come after key in the ordering.
+
+        A None in the key only happens on the null side of a LEFT JOIN, which is the single
+        row of its prefix, so the branch comparing the following fields is dropped."""
+        branches = []
+        for position, field in enumerate(self.ordering):
+            if key[position] is None:
+                break
+            equal = {name: value for name, value in zip(self.ordering[:position], key[:position])}
+            branches.append(Q(**equal, **{f'{field}__gt': key[position]}))
+        if not branches:
+            return queryset.none()
+        try:
+            #the values are converted by the fields of the ordering here, a tampered key fails the conversion
+            return queryset.filter(reduce(or_, branches))
+        except (ValueError, TypeError, DjangoValidationError):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+
+    def paginate_queryset(self, queryset, request) -> list:
+        """Returns the rows of the requested page and sets next_cursor (None on the last page)"""
+        page_size = self.get_page_size(request)
+        cursor = request.GET.get(self.cursor_query_param)
+
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = self.after(queryset, self.decode_cursor(cursor))
+
+        rows = list(queryset[:page_size + 1])
+        self.next_cursor = self.encode_cursor(self.key(rows[page_size - 1])) if len(rows) > page_size else None
+        return rows[:page_size]
@@ -173,6 +173,34 @@ SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = "Lax"
 SESSION_COOKIE_SECURE = False
 
+# Cache shared by every request of the process. The permission, user status and
+# statistics caches are invalidated through it, so a deployment with more than one
+# worker process must point CACHE_BACKEND/CACHE_LOCATION to a backend every worker
+# shares (database, redis, memcached): with LocMemCache each worker would keep
+# serving revoked permissions. The check permissions.E001 refuses LocMemCache
+# outside DEBUG.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='appcore-cache'),
+    }
+}
+
+# Seconds a resolved membership permission set stays cached, entries are also
+# invalidated by the signals in permissions/domain/signals.py
+PERMISSION_CACHE_TIMEOUT = config('PERMISSION_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
+# Build request.user from the access token and the cached status flags instead
+# of loading the users_user row on every request, see CookieJWTAuthentication
+JWT_CLAIMS_USER = config('JWT_CLAIMS_USER', default=False, cast=bool)
+# Seconds the user status flags (is_active, email_verified...) stay cached
+USER_STATUS_CACHE_TIMEOUT = config('USER_STATUS_CACHE_TIMEOUT', default=60, cast=int)
+# Access tokens kept validated in memory by each process, 0 disables the cache
+VALIDATED_TOKEN_CACHE_SIZE = config('VALIDATED_TOKEN_CACHE_SIZE', default=1024, cast=int)
+# Seconds the per-business counters of businesses/stats/ stay cached, entries are
+# also dropped by the signals in locations/domain/signals.py
+BUSINESS_STATS_CACHE_TIMEOUT = config('BUSINESS_STATS_CACHE_TIMEOUT', default=5 * 60, cast=int)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME":timedelta(minutes=5),
     'REFRESH_TOKEN_LIFETIME':timedelta(minutes=200),
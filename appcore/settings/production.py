@@ -28,6 +28,16 @@ MEDIA_ROOT = BASE_DIR / 'static/images'
 
 MEDIA_URL = '/images/'
 
+# Cache shared by every worker, the permission invalidations rely on it (see
+# CACHES in base.py), e.g. CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+# and CACHE_LOCATION=appcore_cache after `python manage.py createcachetable`
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND'),
+        'LOCATION': config('CACHE_LOCATION'),
+    }
+}
+
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
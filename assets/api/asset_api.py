@@ -1,3 +1,5 @@
+import tempfile
+import uuid
 from assets.domain.models import *
 from assets.serializers.general_serializers import *
 from rest_framework.generics import RetrieveUpdateDestroyAPIView, ListCreateAPIView
@@ -5,6 +7,20 @@ from permissions.domain.permissions.permissions import *
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from appcore.pagination import KeysetPagination
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import StreamingHttpResponse
+from rest_framework.generics import GenericAPIView
+from rest_framework.parsers import MultiPartParser
+from locations.domain.models import Business
+from locations.querysets import visible_to_user
+from assets.domain.service.asset_import_service import IMPORT_FORMATS, AssetImportService
+from assets.domain.component_tree import component_trees
+from components.domain.models import PartUsage
+from assets.domain.service.asset_export_service import EXPORT_FORMATS, EXPORT_INCLUDES, AssetExportService
 
 
 # Create your views here.
@@ -20,17 +36,34 @@ class AssetListAPIView(ListCreateAPIView):
     serializer_class = AssetSerializer
     allowed_methods = ['GET', 'POST']   
 
+    def get_permissions(self):
+        #the list is scoped to the businesses of the user row by row, see get_queryset
+        if self.request.method == 'GET':
+            return [IsAuthenticated()]
+        return super().get_permissions()
+
     def get_queryset(self):
-        return Asset.objects.all()
+        assets = Asset.objects.visible_to(self.request.user, 'view')
+        business_id = self.request.GET.get('business')
+        if business_id:
+            if not business_id.isdigit():
+                raise ValidationError({'business': ['A valid integer is required.']})
+            assets = assets.filter(business_id=business_id)
+        return assets
     
     def get(self, request, *args, **kwargs):
-        assets = self.get_queryset()
-        serializer = self.serializer_class(assets, many=True)
-        response_data = {}
-        response_data['data'] = serializer.data
+        #only the requested columns are selected, technical_data and additional_info stay out unless asked for
+        columns = AssetListSerializer.select_columns(request.GET.get('fields'))
+        paginator = KeysetPagination(ordering=('id',))
+        assets = paginator.paginate_queryset(self.get_queryset().values(*columns.values()), request)
 
-        if not assets:
+        if not assets and not request.GET.get(paginator.cursor_query_param):
             return Response({'detail': 'No assets found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        response_data = {
+            'data': AssetListSerializer.represent_rows(assets, columns),
+            'next': paginator.next_cursor
+        }
         return Response(response_data, status=status.HTTP_200_OK)
 
     
@@ -44,6 +77,35 @@ class AssetListAPIView(ListCreateAPIView):
     
     
 
+class AssetExportAPIView(AssetListAPIView):
+    """
+    Streams the assets of the list (same scope, ?business= and ?fields=) as
+    ?output=csv or ?output=ndjson. ?include=system_segregation,components
+    adds the segregation type and the component tree of every asset.
+    ?format= is left to the DRF content negotiation.
+    """
+    http_method_names = ['get']
+
+    def get(self, request, *args, **kwargs):
+        columns = AssetListSerializer.select_columns(request.GET.get('fields'))
+        output = request.GET.get('output', 'csv')
+        include = [name.strip() for name in request.GET.get('include', '').split(',') if name.strip()]
+
+        errors = {}
+        if output not in EXPORT_FORMATS:
+            errors['output'] = [f'Expected one of {", ".join(EXPORT_FORMATS)}.']
+        unknown = [name for name in include if name not in EXPORT_INCLUDES]
+        if unknown:
+            errors['include'] = [f"Unknown includes: {', '.join(unknown)}."]
+        if errors:
+            raise ValidationError(errors)
+
+        content = AssetExportService().export(self.get_queryset(), columns, output, include)
+        response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[output])
+        response['Content-Disposition'] = f'attachment; filename="assets.{output}"'
+        return response
+
+
 class AssetAPIView(RetrieveUpdateDestroyAPIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [permissionToCheckModel] 
@@ -87,4 +149,113 @@ class AssetAPIView(RetrieveUpdateDestroyAPIView):
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Asset.DoesNotExist:
             return Response({'detail': 'Asset has not been found.'}, status=status.HTTP_404_NOT_FOUND)
-        
+
+
+class AssetTreeAPIView(GenericAPIView):
+    """
+    Returns an asset with its systems, subsystems and minimum components as
+    nested JSON, one query for the asset (scoped to the businesses where the
+    user has view_asset) and one per level of the tree.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get']
+
+    def get(self, request, pk, *args, **kwargs):
+        columns = AssetListSerializer.select_columns(request.GET.get('fields'))
+        asset = Asset.objects.visible_to(request.user, 'view').filter(pk=pk).values(*columns.values()).first()
+        if asset is None:
+            return Response({'detail': 'Asset has not been found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        tree = AssetListSerializer.represent_row(asset, columns)
+        tree['systems'] = component_trees([pk])[pk]
+        return Response({'data': tree}, status=status.HTTP_200_OK)
+
+
+class AssetImportAPIView(GenericAPIView):
+    """
+    Imports a CSV or JSONL file (multipart 'file') of assets into 'business', the file is read as a stream and the
+    rejected rows are stored in an errors file (see AssetImportService). The user needs add_asset in the business.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        business_id = request.data.get('business')
+        file_format = (request.data.get('format') or (upload.name.rsplit('.', 1)[-1] if upload else '')).lower()
+
+        errors = {}
+        if upload is None:
+            errors['file'] = ['No file was submitted.']
+        if file_format not in IMPORT_FORMATS:
+            errors['format'] = [f'Expected one of {", ".join(IMPORT_FORMATS)}.']
+        if not str(business_id or '').isdigit():
+            errors['business'] = ['A valid integer is required.']
+        if errors:
+            return Response({'errors': errors, 'message': 'Error en la importación de activos'}, status=status.HTTP_400_BAD_REQUEST)
+
+        business = visible_to_user(Business.objects.filter(pk=business_id), request.user, 'add', permission_model=Asset).first()
+        if business is None:
+            return Response({'detail': 'Business has not been found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as rejected:
+            #the upload is read as bytes lines, the service decodes each line on its own
+            result = AssetImportService().import_assets(upload, file_format, business, rejected)
+            errors_file = None
+            if result.failed:
+                rejected.seek(0)
+                errors_file = default_storage.save(f'asset_imports/{uuid.uuid4().hex}.errors.jsonl', File(rejected))
+
+        response_data = {
+            'data': {'created': result.created, 'failed': result.failed, 'errors_file': errors_file},
+            'message': 'Importación de activos finalizada'
+        }
+        return Response(response_data, status=status.HTTP_201_CREATED)
+
+
+class PartUsageAPIView(GenericAPIView):
+    """
+    Where-used lookup: the assets, systems and components carrying
+    ?part_number= or ?serial_number= in the businesses where the user has
+    view_asset, one query on the index of the number (see
+    components/domain/where_used.py), paginated by key.
+    """
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get']
+    lookups = ('part_number', 'serial_number')
+
+    def get(self, request, *args, **kwargs):
+        numbers = {lookup: request.GET[lookup] for lookup in self.lookups if request.GET.get(lookup)}
+        if len(numbers) != 1:
+            return Response(
+                {'errors': {'part_number': ['Send exactly one of part_number or serial_number.']}, 'message': 'Error en la búsqueda de partes'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        usages = visible_to_user(PartUsage.objects.filter(**numbers), request.user, 'view', permission_model=Asset).values(
+            'id', 'kind', 'object_id', 'part_number', 'serial_number', 'asset_id', 'asset__name', 'asset_system_id', 'asset_system__name', 'business_id'
+        )
+        paginator = KeysetPagination(ordering=('id',))
+        page = paginator.paginate_queryset(usages, request)
+
+        response_data = {
+            'data': [
+                {
+                    'kind': usage['kind'],
+                    'id': usage['object_id'],
+                    'part_number': usage['part_number'],
+                    'serial_number': usage['serial_number'],
+                    'asset': {'id': usage['asset_id'], 'name': usage['asset__name']},
+                    'asset_system': {'id': usage['asset_system_id'], 'name': usage['asset_system__name']} if usage['asset_system_id'] else None,
+                    'business': usage['business_id'],
+                }
+                for usage in page
+            ],
+            'next': paginator.next_cursor
+        }
+        return Response(response_data, status=status.HTTP_200_OK)
+
@@ -0,0 +1,41 @@
+"""
+Component tree (bill of materials) of the assets.
+
+    Asset -> AssetSystem -> SubsystemComponent -> MinimumComponent
+
+component_trees() builds the nested tree of any number of assets with one
+query per level, bucketing every level by the id of its parent, so the cost
+does not depend on the size of the tree. A level without rows ends the walk.
+"""
+
+from django.apps import apps
+
+
+#levels below the asset, (app label, model, field pointing to the level above, children key)
+COMPONENT_LEVELS = (
+    ('components', 'AssetSystem', 'asset_key', 'subsystems'),
+    ('components', 'SubsystemComponent', 'asset_system_key', 'components'),
+    ('components', 'MinimumComponent', 'subsystem_component_key', None),
+)
+COMPONENT_COLUMNS = ('id', 'name', 'part_number', 'serial_number')
+
+
+def component_trees(asset_ids) -> dict:
+    """{asset id: [system {..., 'subsystems': [subsystem {..., 'components': [...]}]}]}, in id order"""
+    trees = {asset_id: [] for asset_id in asset_ids}
+    parents = trees
+    for app_label, model_name, parent_field, children_key in COMPONENT_LEVELS:
+        if not parents:
+            break
+        model = apps.get_model(app_label, model_name)
+        nodes = model.objects.filter(**{f'{parent_field}__in': list(parents)}).order_by('id').values(
+            parent_field, *COMPONENT_COLUMNS
+        )
+        children = {}
+        for node in nodes:
+            parent_id = node.pop(parent_field)
+            if children_key is not None:
+                node[children_key] = children.setdefault(node['id'], [])
+            parents[parent_id].append(node)
+        parents = children
+    return trees
@@ -1,6 +1,7 @@
 from django.db import models
 from simple_history.models import HistoricalRecords
-from appcore.models import BaseModel
+from appcore.models import BaseModel, BusinessOwnedModel
+from assets.querysets import AssetQuerySet
 
 
 
@@ -10,7 +11,15 @@ class SystemSegregation(BaseModel):
     type = models.CharField(max_length=100)
     description = models.CharField(max_length=255)
 
-class Asset(BaseModel):
+class Asset(BusinessOwnedModel):
+    class Meta:
+        indexes = [
+            #keyset pagination of the asset list filtered by business, see appcore/pagination.py
+            models.Index(fields=['business', 'id'], name='asset_business_id_idx'),
+        ]
+
+    objects = models.Manager.from_queryset(AssetQuerySet)()
+
     name = models.CharField(max_length=100)
     manufacturer = models.CharField(max_length=255)
     family_model = models.CharField(max_length=255)
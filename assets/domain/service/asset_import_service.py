@@ -0,0 +1,146 @@
+import csv
+import json
+from typing import NamedTuple
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from assets.domain.models import Asset, SystemSegregation
+from assets.serializers.asset_import_serializer import AssetImportSerializer
+from components.domain.where_used import index_part_usage
+from locations.domain.business_stats import invalidate_business_stats
+from users.domain.service.base import BaseService
+
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+IMPORT_CHUNK_SIZE = 1000
+
+
+class ImportResult(NamedTuple):
+    created: int
+    failed: int
+
+
+class AssetImportService(BaseService):
+    """
+    Imports the assets of a CSV or JSONL stream (UTF-8 bytes or text) into
+    one business.
+
+    The stream is read one line at a time and every row is validated with
+    AssetImportSerializer, the system segregations are resolved through a
+    {type: id} map read once. The valid rows are written with bulk_create
+    every chunk_size rows, one transaction per chunk, so memory and lock time
+    do not grow with the file. bulk_create sends no post_save, the where-used
+    entries of a chunk are written in its transaction.
+
+    A rejected row, a line that is not UTF-8 or not valid CSV/JSON included,
+    does not stop the import: it is written to the errors stream as a JSON
+    line {'line', 'row', 'errors'}.
+    """
+
+    def import_assets(self, stream, file_format, business, errors, chunk_size=IMPORT_CHUNK_SIZE) -> ImportResult:
+        if file_format not in IMPORT_FORMATS:
+            raise ValueError(f'Unsupported import format {file_format}, expected one of {IMPORT_FORMATS}')
+
+        serializer = AssetImportSerializer(context={'segregations': self._segregations()})
+        created = failed = 0
+        chunk = []
+        for line, row, parse_error in self._read_rows(stream, file_format):
+            try:
+                if parse_error is not None:
+                    raise ValidationError({'row': [parse_error]})
+                data = serializer.run_validation(row)
+            except ValidationError as error:
+                failed += 1
+                errors.write(json.dumps({'line': line, 'row': row, 'errors': error.detail}, default=str) + '\n')
+                continue
+
+            segregation_id = data.pop('system_segregation', None)
+            chunk.append(Asset(**data, system_segregation_id=segregation_id, business=business))
+            if len(chunk) >= chunk_size:
+                created += self._write(chunk)
+                chunk = []
+
+        created += self._write(chunk)
+        if created:
+            invalidate_business_stats([business.pk])
+        return ImportResult(created=created, failed=failed)
+
+    @staticmethod
+    def _segregations() -> dict:
+        return {segregation_type.lower(): pk for pk, segregation_type in SystemSegregation.objects.values_list('pk', 'type')}
+
+    @staticmethod
+    def _decoded_lines(stream):
+        """Yields (line number, text, decode error) for the lines of a text or binary stream.
+
+        Bytes lines are decoded as UTF-8 one by one, so a line in another encoding is
+        reported on its own and the following lines are still read"""
+        for line, text in enumerate(stream, start=1):
+            if isinstance(text, bytes):
+                try:
+                    text = text.decode('utf-8')
+                except UnicodeDecodeError as error:
+                    yield line, None, f'The line is not UTF-8 text: {error}'
+                    continue
+            yield line, text.removeprefix('\ufeff') if line == 1 else text, None
+
+    def _read_rows(self, stream, file_format):
+        """Yields (line number, row, parse error) lazily from the stream"""
+        if file_format == 'csv':
+            yield from self._read_csv_rows(self._decoded_lines(stream))
+            return
+
+        for line, text, decode_error in self._decoded_lines(stream):
+            if decode_error is not None:
+                yield line, None, decode_error
+                continue
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as error:
+                yield line, text.rstrip('\n'), f'Invalid JSON: {error}'
+                continue
+            if not isinstance(row, dict):
+                yield line, row, 'Every line must be a JSON object.'
+                continue
+            yield line, row, None
+
+    @staticmethod
+    def _read_csv_rows(lines):
+        #the reader only sees the decoded lines, the skipped ones are reported before the next row
+        skipped = []
+        last_line = 0
+
+        def texts():
+            nonlocal last_line
+            for line, text, decode_error in lines:
+                if decode_error is not None:
+                    skipped.append((line, None, decode_error))
+                    continue
+                last_line = line
+                yield text
+
+        reader = csv.DictReader(texts())
+        while True:
+            try:
+                row, error = next(reader), None
+            except StopIteration:
+                yield from skipped
+                return
+            except csv.Error as csv_error:
+                row, error = None, f'Invalid CSV: {csv_error}'
+            yield from skipped
+            skipped.clear()
+            if row is not None:
+                #values past the header land under the None key
+                row.pop(None, None)
+            yield last_line, row, error
+
+    @staticmethod
+    def _write(chunk) -> int:
+        if not chunk:
+            return 0
+        with transaction.atomic():
+            Asset.objects.bulk_create(chunk)
+            index_part_usage(Asset.objects.filter(pk__in=[asset.pk for asset in chunk]))
+        return len(chunk)
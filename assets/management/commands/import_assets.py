@@ -0,0 +1,38 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from assets.domain.service.asset_import_service import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, AssetImportService
+from locations.domain.models import Business
+
+
+class Command(BaseCommand):
+    help = 'Imports the assets of a CSV or JSONL file into a business, the rejected rows go to an errors file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or JSONL file')
+        parser.add_argument('--business', type=int, required=True, help='id of the business owning the assets')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='format of the file, taken from its extension by default')
+        parser.add_argument('--errors', help='JSONL file of the rejected rows, <path>.errors.jsonl by default')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='rows per bulk insert and transaction')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError(f'Cannot tell the format of {path}, use --format')
+        try:
+            business = Business.objects.get(pk=options['business'])
+        except Business.DoesNotExist:
+            raise CommandError(f"Business {options['business']} does not exist")
+
+        errors_path = Path(options['errors'] or f'{path}.errors.jsonl')
+        #read as bytes, the service decodes each line and reports the ones that are not UTF-8
+        with path.open('rb') as stream, errors_path.open('w', encoding='utf-8') as errors:
+            result = AssetImportService().import_assets(
+                stream, file_format, business, errors, chunk_size=options['chunk_size']
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'{result.created} assets imported'))
+        if result.failed:
+            self.stdout.write(self.style.WARNING(f'{result.failed} rows rejected, see {errors_path}'))
+        else:
+            errors_path.unlink()
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0004_alter_systemsegregation_description'),
+        ('locations', '0008_internallocation_business'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='business',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.business'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0005_asset_business'),
+        ('locations', '0009_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['business', 'id'], name='asset_business_id_idx'),
+        ),
+    ]
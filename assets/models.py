@@ -0,0 +1 @@
+from assets.domain.models import *
\ No newline at end of file
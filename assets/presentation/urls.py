@@ -5,5 +5,9 @@ from assets.api.asset_api import *
 
 urlpatterns = [
     path('assets/',AssetListAPIView.as_view()),
+    path('assets/import/',AssetImportAPIView.as_view()),
+    path('assets/export/',AssetExportAPIView.as_view()),
+    path('assets/<int:pk>/tree',AssetTreeAPIView.as_view()),
+    path('where-used/',PartUsageAPIView.as_view()),
     path('asset/<int:pk>',AssetAPIView.as_view()),
 ]
\ No newline at end of file
@@ -0,0 +1,7 @@
+from django.db import models
+from locations.querysets import visible_to_user
+
+
+class AssetQuerySet(models.QuerySet):
+    def visible_to(self, user, action='view'):
+          return visible_to_user(self, user, action)
@@ -0,0 +1,24 @@
+from rest_framework.serializers import CharField, ModelSerializer, ValidationError
+from assets.domain.models import Asset
+
+
+class AssetImportSerializer(ModelSerializer):
+    """
+    One row of an asset import file. The field constraints are the ones of
+    Asset, system_segregation is the type of a SystemSegregation resolved
+    through context['segregations'] ({type in lower case: id}) and the
+    business is the one of the whole import.
+    """
+    class Meta:
+        model = Asset
+        exclude = ('id', 'business', 'creation_date', 'update_date')
+
+    system_segregation = CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate_system_segregation(self, value):
+        if not value:
+            return None
+        segregation_id = self.context['segregations'].get(value.strip().lower())
+        if segregation_id is None:
+            raise ValidationError(f'Unknown system segregation "{value}".')
+        return segregation_id
@@ -1,7 +1,12 @@
-from rest_framework.serializers import ModelSerializer
+from decimal import Decimal
+from rest_framework.serializers import ModelSerializer, ValidationError
 from assets.domain.models import Asset
 
 
+#large text columns, only read when ?fields= asks for them
+ASSET_TEXT_FIELDS = ('technical_data', 'additional_info')
+
+
 
 
 class AssetSerializer(ModelSerializer):
@@ -25,3 +30,41 @@ class AssetSerializer(ModelSerializer):
                     'status': instance.status,
                     'system_segregation': instance.system_segregation.id if instance.system_segregation else None,
                 }
+
+
+class AssetListSerializer(AssetSerializer):
+
+    @staticmethod
+    def field_columns() -> dict:
+        """{field name: column} of the fields the list can return, foreign keys are returned as ids"""
+        return {field.name: field.attname for field in Asset._meta.concrete_fields}
+
+    @classmethod
+    def select_columns(cls, fields=None) -> dict:
+        """{field name: column} of a ?fields= sparse fieldset ('name,serial_number'), id is always included.
+
+        Without fields every column but ASSET_TEXT_FIELDS is returned"""
+        columns = cls.field_columns()
+        if not fields:
+            return {name: column for name, column in columns.items() if name not in ASSET_TEXT_FIELDS}
+
+        names = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = [name for name in names if name not in columns]
+        if unknown:
+            raise ValidationError({'fields': [f"Unknown fields: {', '.join(unknown)}."]})
+        return {name: columns[name] for name in dict.fromkeys(['id', *names])}
+
+    @staticmethod
+    def represent_row(row, columns) -> dict:
+        representation = {}
+        for name, column in columns.items():
+            value = row[column]
+            #same output as the DecimalField of the ModelSerializer
+            representation[name] = str(value) if isinstance(value, Decimal) else value
+        return representation
+
+    @classmethod
+    def represent_rows(cls, rows, columns) -> list:
+        """list representation of values() rows of the selected columns, without the DRF field machinery"""
+        return [cls.represent_row(row, columns) for row in rows]
+
@@ -0,0 +1,64 @@
+"""
+Microbenchmark of the per-request token work done by CookieJWTAuthentication.
+
+Compares reading the access_token cookie and validating the token the way it
+was done before the validated token cache (hand parsing the Cookie header and
+verifying the signature and claims on every request) against the current path
+(request.COOKIES and the validated token LRU).
+
+Usage:
+    DJANGO_SETTINGS_MODULE=appcore.settings.local python benchmarks/auth_overhead.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'appcore.settings.local')
+
+import django
+
+django.setup()
+
+from django.test import RequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+from permissions.domain.authentication import CookieJWTAuthentication
+from permissions.domain.token_cache import validated_tokens
+
+
+def cookies_to_dict(cookies: str) -> dict:
+    fields = cookies.split(";")
+    return {field.split("=")[0].strip(): field.split("=")[1] for field in fields}
+
+
+def main(iterations=20000):
+    token = AccessToken()
+    token['user_id'] = '1'
+    raw_token = str(token)
+
+    request = RequestFactory().get('/', HTTP_COOKIE=f'csrftoken=abc; access_token={raw_token}; sessionid=xyz')
+    uncached = JWTAuthentication()
+    cached = CookieJWTAuthentication()
+
+    def before():
+        cookies = cookies_to_dict(request.headers.get('Cookie'))
+        uncached.get_validated_token(cookies['access_token'].encode('utf-8'))
+
+    def after():
+        cached.get_validated_token(cached.get_raw_token(cached.get_header(request)))
+
+    validated_tokens.clear()
+    results = {
+        'before (parse Cookie + validate)': timeit.timeit(before, number=iterations),
+        'after (request.COOKIES + LRU)': timeit.timeit(after, number=iterations),
+    }
+
+    for name, seconds in results.items():
+        print(f"{name:<36} {seconds / iterations * 1e6:8.2f} us/request")
+    print(f"cache stats: {validated_tokens.stats()}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,75 @@
+"""
+Microbenchmark of the CSRF check done by CookieJWTAuthentication.
+
+Compares the previous path (CsrfViewMiddleware.process_view, which renders the
+CSRF_FAILURE_VIEW response on rejection, then json.loads of that response to
+recover the reason) against CSRFValidator.check, for valid requests and for
+rejected ones (missing token, wrong token, untrusted origin).
+
+Usage:
+    DJANGO_SETTINGS_MODULE=appcore.settings.local python benchmarks/csrf_overhead.py [iterations]
+"""
+
+import json
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'appcore.settings.local')
+
+import django
+
+django.setup()
+
+from django.middleware.csrf import CsrfViewMiddleware, _get_new_csrf_string, _mask_cipher_secret
+from django.test import RequestFactory
+from permissions.domain.authentication import CSRFValidator
+
+#the rejected requests would flood the output with django.security.csrf warnings
+logging.disable(logging.WARNING)
+
+
+def build_requests():
+    secret = _get_new_csrf_string()
+    factory = RequestFactory()
+
+    def post(**extra):
+        request = factory.post('/users/logout/', **extra)
+        request.COOKIES['csrftoken'] = secret
+        return request
+
+    return {
+        'valid': post(HTTP_X_CSRFTOKEN=_mask_cipher_secret(secret)),
+        'missing token': post(),
+        'wrong token': post(HTTP_X_CSRFTOKEN=_mask_cipher_secret(_get_new_csrf_string())),
+        'bad origin': post(HTTP_X_CSRFTOKEN=_mask_cipher_secret(secret), HTTP_ORIGIN='https://evil.example.com'),
+    }
+
+
+def main(iterations=20000):
+    middleware = CsrfViewMiddleware(lambda request: None)
+    validator = CSRFValidator()
+
+    def before(request):
+        request.csrf_processing_done = False
+        response = middleware.process_view(request, lambda request: None, (), {})
+        if response is not None:
+            try:
+                json.loads(response.content)
+            except ValueError:
+                pass
+
+    def after(request):
+        request.csrf_processing_done = False
+        validator.check(request)
+
+    for name, request in build_requests().items():
+        old = timeit.timeit(lambda: before(request), number=iterations) / iterations * 1e6
+        new = timeit.timeit(lambda: after(request), number=iterations) / iterations * 1e6
+        print(f"{name:<14} before {old:8.2f} us   after {new:8.2f} us")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,73 @@
+"""
+Benchmark of the location list serializers over 10k rows.
+
+Creates the rows in a throwaway in-memory SQLite database and compares, for
+headquarters and internal locations:
+
+    before: model instances through the DRF serializer (one parent query per row)
+    after:  with_business_name()/with_headquarter_name() rows through represent_rows
+
+printing wall time and number of queries of each path.
+
+Usage:
+    DJANGO_SETTINGS_MODULE=appcore.settings.local python benchmarks/list_serializers.py [rows]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'appcore.settings.local')
+
+import django
+from django.conf import settings
+
+django.setup()
+settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+
+from django.core.management import call_command
+from django.db import connection
+from locations.domain.models import Business, Headquarters, InternalLocation
+from locations.presentation.serializers.headquarter_serializer import HeadquartersListSerializer
+from locations.presentation.serializers.internal_location_serializer import InternalLocationListSerializer
+
+
+def populate(rows):
+    business = Business.objects.create(name='Benchmark', tin='0000000000', utr='BENCH-UTR')
+    headquarters = Headquarters.objects.bulk_create(
+        Headquarters(name=f'HQ {i}', address='Street', phone='3000000000', business_key=business) for i in range(rows)
+    )
+    InternalLocation.objects.bulk_create(
+        InternalLocation(name=f'Room {i}', floor='1', room_number=str(i), headquarters_key=headquarters[i % len(headquarters)])
+        for i in range(rows)
+    )
+
+
+def measure(name, render):
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        start = time.perf_counter()
+        data = render()
+        elapsed = time.perf_counter() - start
+    print(f"{name:<40} {elapsed * 1000:9.1f} ms  {queries:6d} queries  ({len(data)} rows)")
+
+
+def main(rows=10000):
+    call_command('migrate', verbosity=0, run_syncdb=True)
+    populate(rows)
+
+    measure('headquarters, DRF serializer', lambda: HeadquartersListSerializer(Headquarters.objects.all(), many=True).data)
+    measure('headquarters, represent_rows', lambda: HeadquartersListSerializer.represent_rows(Headquarters.objects.with_business_name()))
+    measure('internal locations, DRF serializer', lambda: InternalLocationListSerializer(InternalLocation.objects.all(), many=True).data)
+    measure('internal locations, represent_rows', lambda: InternalLocationListSerializer.represent_rows(InternalLocation.objects.with_headquarter_name()))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
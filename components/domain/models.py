@@ -1,10 +1,12 @@
 from django.db import models
-from appcore.models import BaseModel
+from appcore.models import BusinessOwnedModel
 from assets.domain.models import *
 
 # Create your models here.
 
-class AssetSystem(BaseModel):
+class AssetSystem(BusinessOwnedModel):
+    business_parent = 'asset_key'
+
     name = models.CharField(max_length=100)
     part_number = models.CharField(max_length=255)
     serial_number = models.CharField(max_length=255, null=True, blank=True)
@@ -19,7 +21,9 @@ class AssetSystem(BaseModel):
         verbose_name_plural = 'Asset Systems'
         
 
-class SubsystemComponent(BaseModel):
+class SubsystemComponent(BusinessOwnedModel):
+    business_parent = 'asset_system_key'
+
     name = models.CharField(max_length=100)
     part_number = models.CharField(max_length=255)
     serial_number = models.CharField(max_length=255, null=True, blank=True)
@@ -34,7 +38,9 @@ class SubsystemComponent(BaseModel):
         verbose_name_plural = 'Subsystem Components'
     
 
-class MinimumComponent(BaseModel):
+class MinimumComponent(BusinessOwnedModel):
+    business_parent = 'subsystem_component_key'
+
     name = models.CharField(max_length=100)
     part_number = models.CharField(max_length=255)
     serial_number = models.CharField(max_length=255, null=True, blank=True)
@@ -47,3 +53,33 @@ class MinimumComponent(BaseModel):
 
     class Meta:
         verbose_name_plural = 'Minimum Components'
+
+
+class PartUsage(BusinessOwnedModel):
+    """
+    Where-used entry of an asset or component: its part and serial numbers
+    with the asset, system and business it belongs to. One row per
+    (kind, object_id), kept by components/domain/where_used.py.
+    """
+    business_parent = 'asset'
+
+    kind = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    part_number = models.CharField(max_length=255)
+    serial_number = models.CharField(max_length=255, null=True, blank=True)
+    asset = models.ForeignKey(Asset, on_delete=models.CASCADE, related_name='+')
+    asset_system = models.ForeignKey(AssetSystem, null=True, blank=True, on_delete=models.CASCADE, related_name='+')
+
+    def __str__(self):
+        return f'{self.part_number} ({self.kind}:{self.object_id})'
+
+    class Meta:
+        verbose_name_plural = 'Part Usages'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='partusage_kind_object_unique'),
+        ]
+        indexes = [
+            #the where-used lookups, id keeps the keyset pagination on the same index
+            models.Index(fields=['part_number', 'id'], name='partusage_part_number_idx'),
+            models.Index(fields=['serial_number', 'id'], name='partusage_serial_number_idx'),
+        ]
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from assets.domain.models import Asset
+from components.domain.models import AssetSystem, SubsystemComponent, MinimumComponent
+from components.domain.where_used import index_part_usage, loaded_part_usage, move_part_usages, remove_part_usage, save_part_usages
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_save, sender=AssetSystem)
+@receiver(post_save, sender=SubsystemComponent)
+@receiver(post_save, sender=MinimumComponent)
+def part_numbers_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    entry = loaded_part_usage(instance)
+    entries = save_part_usages([entry]) if entry is not None else index_part_usage(sender.objects.filter(pk=instance.pk))
+    if entries and not created:
+        move_part_usages(instance, entries[0])
+
+
+@receiver(post_delete, sender=Asset)
+@receiver(post_delete, sender=AssetSystem)
+@receiver(post_delete, sender=SubsystemComponent)
+@receiver(post_delete, sender=MinimumComponent)
+def part_numbers_deleted(sender, instance, **kwargs):
+    remove_part_usage(instance)
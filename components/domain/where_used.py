@@ -0,0 +1,105 @@
+"""
+Where-used index of the part and serial numbers, kept in PartUsage.
+
+Every Asset, AssetSystem, SubsystemComponent and MinimumComponent has one
+PartUsage row with its part and serial numbers, the asset and system it
+belongs to and the business, so "which assets contain part X" is one
+lookup on the part_number (or serial_number) index instead of a scan of
+four tables and a climb back to the asset per match.
+
+The rows follow the components through components/domain/signals.py:
+
+    save of a row              -> upsert of its entry
+    save of a system/subsystem -> the entries below it follow a move
+    change of Asset.business   -> propagate_business_id (appcore/business_owner.py)
+    delete of a row            -> delete of its entry
+
+Writes that skip the signals (bulk_create in AssetImportService) call
+index_part_usage() themselves.
+"""
+
+from django.apps import apps
+from django.db.models import BigIntegerField, F, Value
+
+
+#model name -> (app label, lookup of the asset id, lookup of the asset system id)
+WHERE_USED_LEVELS: dict[str, tuple[str, str, str | None]] = {
+    'asset': ('assets', 'pk', None),
+    'assetsystem': ('components', 'asset_key', 'pk'),
+    'subsystemcomponent': ('components', 'asset_system_key__asset_key', 'asset_system_key'),
+    'minimumcomponent': ('components', 'subsystem_component_key__asset_system_key__asset_key', 'subsystem_component_key__asset_system_key'),
+}
+INDEX_BATCH_SIZE = 1000
+_UPSERT_FIELDS = ('part_number', 'serial_number', 'asset', 'asset_system', 'business')
+
+
+def get_partusage():
+    return apps.get_model('components', 'PartUsage')
+
+
+def usage_kind(model_or_instance) -> str:
+    return model_or_instance._meta.model_name
+
+
+def index_part_usage(queryset) -> list:
+    """Writes the entries of the rows of queryset (one model of WHERE_USED_LEVELS) with one read and one upsert"""
+    PartUsage = get_partusage()
+    kind = usage_kind(queryset.model)
+    _, asset_lookup, system_lookup = WHERE_USED_LEVELS[kind]
+    rows = queryset.order_by().values(
+        'pk', 'part_number', 'serial_number', 'business_id',
+        usage_asset=F(asset_lookup),
+        usage_system=F(system_lookup) if system_lookup else Value(None, output_field=BigIntegerField()),
+    )
+    entries = [
+        PartUsage(
+            kind=kind, object_id=row['pk'], part_number=row['part_number'], serial_number=row['serial_number'],
+            asset_id=row['usage_asset'], asset_system_id=row['usage_system'], business_id=row['business_id'],
+        )
+        for row in rows
+    ]
+    return save_part_usages(entries)
+
+
+def loaded_part_usage(instance):
+    """Entry of an asset or system from the ids loaded on it, None for the levels whose asset needs a query"""
+    kind = usage_kind(instance)
+    if kind == 'asset':
+        asset_id, asset_system_id = instance.pk, None
+    elif kind == 'assetsystem':
+        asset_id, asset_system_id = instance.asset_key_id, instance.pk
+    else:
+        return None
+    return get_partusage()(
+        kind=kind, object_id=instance.pk, part_number=instance.part_number, serial_number=instance.serial_number,
+        asset_id=asset_id, asset_system_id=asset_system_id, business_id=instance.business_id,
+    )
+
+
+def save_part_usages(entries) -> list:
+    """Inserts the entries, or updates the ones already indexed, in one statement"""
+    if entries:
+        get_partusage().objects.bulk_create(
+            entries, update_conflicts=True, unique_fields=('kind', 'object_id'), update_fields=_UPSERT_FIELDS,
+        )
+    return entries
+
+
+def move_part_usages(instance, entry) -> None:
+    """Points the entries below a saved system or subsystem to its current asset, system and business"""
+    PartUsage = get_partusage()
+    kind = usage_kind(instance)
+    if kind == 'assetsystem':
+        below = PartUsage.objects.filter(asset_system_id=instance.pk).exclude(kind=kind)
+    elif kind == 'subsystemcomponent':
+        components = apps.get_model('components', 'MinimumComponent').objects.filter(subsystem_component_key=instance.pk)
+        below = PartUsage.objects.filter(kind='minimumcomponent', object_id__in=components.values('pk'))
+    else:
+        return
+    below.exclude(asset_id=entry.asset_id, asset_system_id=entry.asset_system_id, business_id=entry.business_id).update(
+        asset_id=entry.asset_id, asset_system_id=entry.asset_system_id, business_id=entry.business_id,
+    )
+
+
+def remove_part_usage(instance) -> None:
+    get_partusage().objects.filter(kind=usage_kind(instance), object_id=instance.pk).delete()
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:45
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+
+#frozen copy of the backfill, later changes of the app code must not change this migration
+BATCH_SIZE = 5000
+
+
+def backfill_business_column(model, parent_model, parent_field, parent_business_field):
+    """Fills model.business from its parent in pk ranges of BATCH_SIZE, one UPDATE and one transaction per range"""
+    business = Subquery(parent_model.objects.filter(pk=OuterRef(parent_field)).values(parent_business_field)[:1])
+    last_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    for start in range(0, last_pk, BATCH_SIZE):
+        with transaction.atomic():
+            model.objects.filter(pk__gt=start, pk__lte=start + BATCH_SIZE).update(business_id=business)
+
+
+def fill_component_business(apps, schema_editor):
+    #parents first, every level copies the column filled by the previous one
+    levels = (
+        ('components', 'AssetSystem', 'assets', 'Asset', 'asset_key'),
+        ('components', 'SubsystemComponent', 'components', 'AssetSystem', 'asset_system_key'),
+        ('components', 'MinimumComponent', 'components', 'SubsystemComponent', 'subsystem_component_key'),
+    )
+    for app_label, model_name, parent_app_label, parent_name, parent_field in levels:
+        backfill_business_column(
+            apps.get_model(app_label, model_name), apps.get_model(parent_app_label, parent_name), parent_field, 'business',
+        )
+
+
+class Migration(migrations.Migration):
+    #the backfill commits every batch on its own
+    atomic = False
+
+    dependencies = [
+        ('components', '0002_alter_assetsystem_asset_key'),
+        ('locations', '0008_internallocation_business'),
+        ('assets', '0005_asset_business'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetsystem',
+            name='business',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.business'),
+        ),
+        migrations.AddField(
+            model_name='minimumcomponent',
+            name='business',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.business'),
+        ),
+        migrations.AddField(
+            model_name='subsystemcomponent',
+            name='business',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.business'),
+        ),
+        migrations.RunPython(fill_component_business, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.10 on 2026-10-18 12:03
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.db.models import BigIntegerField, F, Max, Value
+
+
+#frozen copy of the where-used levels and indexing (components/domain/where_used.py) as of this migration,
+#model name -> (app label, lookup of the asset id, lookup of the asset system id)
+LEVELS = (
+    ('asset', 'assets', 'pk', None),
+    ('assetsystem', 'components', 'asset_key', 'pk'),
+    ('subsystemcomponent', 'components', 'asset_system_key__asset_key', 'asset_system_key'),
+    ('minimumcomponent', 'components', 'subsystem_component_key__asset_system_key__asset_key', 'subsystem_component_key__asset_system_key'),
+)
+BATCH_SIZE = 1000
+
+
+def fill_part_usage(apps, schema_editor):
+    """Indexes every row in pk ranges of BATCH_SIZE, one read, one upsert and one transaction per range"""
+    PartUsage = apps.get_model('components', 'PartUsage')
+    for kind, app_label, asset_lookup, system_lookup in LEVELS:
+        model = apps.get_model(app_label, kind)
+        last_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        for start in range(0, last_pk, BATCH_SIZE):
+            with transaction.atomic():
+                rows = model.objects.filter(pk__gt=start, pk__lte=start + BATCH_SIZE).values(
+                    'pk', 'part_number', 'serial_number', 'business_id',
+                    usage_asset=F(asset_lookup),
+                    usage_system=F(system_lookup) if system_lookup else Value(None, output_field=BigIntegerField()),
+                )
+                entries = [
+                    PartUsage(
+                        kind=kind, object_id=row['pk'], part_number=row['part_number'], serial_number=row['serial_number'],
+                        asset_id=row['usage_asset'], asset_system_id=row['usage_system'], business_id=row['business_id'],
+                    )
+                    for row in rows
+                ]
+                PartUsage.objects.bulk_create(
+                    entries, update_conflicts=True, unique_fields=('kind', 'object_id'),
+                    update_fields=('part_number', 'serial_number', 'asset', 'asset_system', 'business'),
+                )
+
+class Migration(migrations.Migration):
+    #the backfill commits every batch on its own
+    atomic = False
+
+    dependencies = [
+        ('assets', '0006_asset_business_id_index'),
+        ('components', '0003_business_column'),
+        ('locations', '0009_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('part_number', models.CharField(max_length=255)),
+                ('serial_number', models.CharField(blank=True, max_length=255, null=True)),
+                ('asset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assets.asset')),
+                ('asset_system', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='components.assetsystem')),
+                ('business', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.business')),
+            ],
+            options={
+                'verbose_name_plural': 'Part Usages',
+                'indexes': [models.Index(fields=['part_number', 'id'], name='partusage_part_number_idx'), models.Index(fields=['serial_number', 'id'], name='partusage_serial_number_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='partusage_kind_object_unique')],
+            },
+        ),
+        migrations.RunPython(fill_part_usage, migrations.RunPython.noop),
+    ]
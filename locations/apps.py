@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class LocationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'locations'
+
+    def ready(self):
+        import locations.domain.signals
+        from appcore.business_paths import build_business_paths
+        from appcore.business_owner import connect_business_propagation
+        build_business_paths()
+        connect_business_propagation()
@@ -0,0 +1,107 @@
+"""
+Cached per-business counters for the dashboard.
+
+The counts of every business (headquarters, internal locations, assets,
+active memberships, pending invitations) come from one statement with a
+grouped COUNT subquery per counter, and stay in the cache under one key per
+business for BUSINESS_STATS_CACHE_TIMEOUT seconds. The location counters are
+read from the location tree (locations/domain/location_tree.py): the nodes of
+a level grouped by their business node, which also covers a deeper level once
+it is added to LOCATION_LEVELS.
+
+The receivers in locations/domain/signals.py drop the entry of a business
+whenever one of the counted rows is saved or deleted, and
+LocationBulkService drops it after its bulk_create. A pending invitation
+stops counting when it expires without any write, so an entry never
+outlives the next expiry of the invitations it counted.
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from locations.domain.location_tree import ancestor_prefix
+
+
+BUSINESS_STATS_CACHE_TIMEOUT = getattr(settings, 'BUSINESS_STATS_CACHE_TIMEOUT', 5 * 60)
+
+def _tree_counter(kind):
+    """Counter of the location tree nodes of kind, grouped by the object id of their business node"""
+    prefix = ancestor_prefix(kind, 'business')
+    return ('locations', 'LocationNode', f'{prefix}object_id', {'kind': kind, f'{prefix}kind': 'business'})
+
+
+#counter -> (app label, model, field pointing to the business, filters)
+BUSINESS_COUNTERS = {
+    'headquarters': _tree_counter('headquarters'),
+    'internal_locations': _tree_counter('internallocation'),
+    'assets': ('assets', 'Asset', 'business', {}),
+    'active_memberships': ('permissions', 'BusinessMembership', 'business', {'is_active': True}),
+    'pending_invitations': ('users', 'Invitation', 'business', {'is_accepted': False}),
+}
+
+
+def _stats_key(business_id) -> str:
+    return f"locations:business_stats:{business_id}"
+
+
+def _per_business(queryset, business_field, aggregate):
+    """Correlated subquery of the aggregate of the queryset rows of the outer business"""
+    rows = queryset.filter(**{business_field: OuterRef('pk')}).order_by().values(business_field)
+    return Subquery(rows.annotate(value=aggregate).values('value'))
+
+
+def compute_business_stats(business_ids) -> dict:
+    """Returns {business id: counters} for the businesses, in one query"""
+    now = timezone.now()
+    annotations = {}
+    for name, (app_label, model_name, business_field, filters) in BUSINESS_COUNTERS.items():
+        queryset = apps.get_model(app_label, model_name).objects.filter(**filters)
+        if name == 'pending_invitations':
+            queryset = queryset.filter(expires_at__gt=now)
+        annotations[f'stats_{name}'] = Coalesce(
+            _per_business(queryset, business_field, Count('pk')), Value(0), output_field=IntegerField()
+        )
+    Invitation = apps.get_model('users', 'Invitation')
+    annotations['stats_next_expiry'] = _per_business(
+        Invitation.objects.filter(is_accepted=False, expires_at__gt=now), 'business', Min('expires_at')
+    )
+
+    Business = apps.get_model('locations', 'Business')
+    #the annotations are prefixed, 'headquarters' is also the reverse relation of Business
+    rows = Business.objects.filter(pk__in=business_ids).annotate(**annotations).values('pk', *annotations)
+    return {row.pop('pk'): {name.removeprefix('stats_'): value for name, value in row.items()} for row in rows}
+
+
+def _timeout(stats, now) -> int:
+    if stats['next_expiry'] is None:
+        return BUSINESS_STATS_CACHE_TIMEOUT
+    return max(1, min(BUSINESS_STATS_CACHE_TIMEOUT, int((stats['next_expiry'] - now).total_seconds())))
+
+
+def get_business_stats(business_ids) -> dict:
+    """Returns {business id: counters}, reading the cached businesses and computing the rest in one query"""
+    keys = {_stats_key(business_id): business_id for business_id in business_ids}
+    cached = cache.get_many(keys)
+    stats = {keys[key]: value for key, value in cached.items()}
+
+    missing = [business_id for key, business_id in keys.items() if key not in cached]
+    if missing:
+        now = timezone.now()
+        for business_id, values in compute_business_stats(missing).items():
+            cache.set(_stats_key(business_id), values, timeout=_timeout(values, now))
+            stats[business_id] = values
+
+    return {business_id: {name: stats[business_id][name] for name in BUSINESS_COUNTERS} for business_id in stats}
+
+
+def invalidate_business_stats(business_ids) -> None:
+    """Drops the counters of the businesses, now and again after the surrounding transaction commits"""
+    keys = [_stats_key(business_id) for business_id in set(business_ids) if business_id is not None]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
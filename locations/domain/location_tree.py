@@ -0,0 +1,159 @@
+"""
+Materialized path of the location hierarchy, kept in LocationNode.
+
+Every Business, Headquarters and InternalLocation has one node whose path
+is the chain of its ancestors, e.g.
+
+    business:1/
+    business:1/headquarters:4/
+    business:1/headquarters:4/internallocation:9/
+
+so everything under a location is one range scan over the path index
+(path LIKE 'business:1/%') instead of a query per level. The levels are
+declared in LOCATION_LEVELS as {model_name: parent foreign key}, a deeper
+level (buildings, floors) is one more entry and a new model in the chain.
+
+The nodes follow the rows through locations/domain/signals.py, writes that
+skip the signals (bulk_create in LocationBulkService) call
+add_location_nodes() themselves.
+"""
+
+from django.apps import apps
+from django.db.models import F, Value, CharField
+from django.db.models.functions import Concat, Substr
+
+
+LOCATION_LEVELS: dict[str, str | None] = {
+    'business': None,
+    'headquarters': 'business_key',
+    'internallocation': 'headquarters_key',
+}
+
+
+def get_locationnode():
+    return apps.get_model('locations', 'LocationNode')
+
+
+def node_kind(model_or_instance) -> str:
+    return model_or_instance._meta.model_name
+
+
+def is_location(model_or_instance) -> bool:
+    return node_kind(model_or_instance) in LOCATION_LEVELS
+
+
+def path_segment(kind: str, object_id) -> str:
+    return f'{kind}:{object_id}/'
+
+
+def ancestor_prefix(kind: str, ancestor_kind: str) -> str:
+    """Lookup prefix from a node of kind to its node of the ancestor_kind level, e.g. 'parent__parent__'"""
+    levels = list(LOCATION_LEVELS)
+    hops = levels.index(kind) - levels.index(ancestor_kind)
+    if hops <= 0:
+        raise ValueError(f'{ancestor_kind} is not above {kind} in LOCATION_LEVELS')
+    return 'parent__' * hops
+
+
+def loaded_path(instance) -> str | None:
+    """Builds the path of the instance from the parent ids and parent objects already loaded on it.
+
+    Returns None when a hop would need a query, e.g. an InternalLocation whose headquarters is not cached"""
+    segments = []
+    current = instance
+    while True:
+        kind = node_kind(current)
+        segments.append(path_segment(kind, current.pk))
+        parent_field = LOCATION_LEVELS[kind]
+        if parent_field is None:
+            return ''.join(reversed(segments))
+
+        field = current._meta.get_field(parent_field)
+        if field.is_cached(current):
+            current = field.get_cached_value(current)
+            continue
+        parent_kind = node_kind(field.related_model)
+        if LOCATION_LEVELS[parent_kind] is not None or getattr(current, field.attname) is None:
+            return None
+        segments.append(path_segment(parent_kind, getattr(current, field.attname)))
+        return ''.join(reversed(segments))
+
+
+def _parent_nodes(model, parent_ids) -> dict:
+    """Returns {parent id: node} for the parents of model rows, the missing parent nodes are created first"""
+    LocationNode = get_locationnode()
+    parent_model = model._meta.get_field(LOCATION_LEVELS[node_kind(model)]).related_model
+    parent_kind = node_kind(parent_model)
+
+    nodes = {node.object_id: node for node in LocationNode.objects.filter(kind=parent_kind, object_id__in=parent_ids)}
+    missing = set(parent_ids) - nodes.keys()
+    if missing:
+        for node in add_location_nodes(parent_model.objects.filter(pk__in=missing)):
+            nodes[node.object_id] = node
+    return nodes
+
+
+def _build_nodes(instances, parent_nodes) -> list:
+    LocationNode = get_locationnode()
+    nodes = []
+    for instance in instances:
+        kind = node_kind(instance)
+        parent_field = LOCATION_LEVELS[kind]
+        parent = parent_nodes[getattr(instance, f'{parent_field}_id')] if parent_field else None
+        nodes.append(LocationNode(
+            kind=kind,
+            object_id=instance.pk,
+            parent=parent,
+            path=(parent.path if parent else '') + path_segment(kind, instance.pk),
+            depth=parent.depth + 1 if parent else 0,
+        ))
+    return nodes
+
+
+def add_location_nodes(instances) -> list:
+    """Creates the nodes of new rows of one location model, with one query for the parent nodes and one insert"""
+    instances = list(instances)
+    if not instances:
+        return []
+    model = type(instances[0])
+    parent_field = LOCATION_LEVELS[node_kind(model)]
+
+    parent_nodes = {}
+    if parent_field is not None:
+        parent_nodes = _parent_nodes(model, {getattr(instance, f'{parent_field}_id') for instance in instances})
+    return get_locationnode().objects.bulk_create(_build_nodes(instances, parent_nodes))
+
+
+def move_location_node(instance) -> None:
+    """Moves the subtree of the instance when its parent foreign key changed, otherwise does nothing"""
+    LocationNode = get_locationnode()
+    kind = node_kind(instance)
+    parent_field = LOCATION_LEVELS[kind]
+    if parent_field is None:
+        return
+
+    node = LocationNode.objects.select_related('parent').filter(kind=kind, object_id=instance.pk).first()
+    if node is None:
+        add_location_nodes([instance])
+        return
+
+    parent_id = getattr(instance, f'{parent_field}_id')
+    if node.parent is not None and node.parent.object_id == parent_id:
+        return
+
+    parent = _parent_nodes(type(instance), {parent_id})[parent_id]
+    new_path = parent.path + path_segment(kind, instance.pk)
+    #the descendants keep the part of their path below the node and shift their depth by the same amount
+    LocationNode.objects.filter(path__startswith=node.path).update(
+        path=Concat(Value(new_path), Substr('path', len(node.path) + 1), output_field=CharField()),
+        depth=F('depth') + (parent.depth + 1 - node.depth),
+    )
+    LocationNode.objects.filter(pk=node.pk).update(parent=parent)
+
+
+def remove_location_node(instance) -> None:
+    """Deletes the node of the instance and the nodes under it"""
+    LocationNode = get_locationnode()
+    path = LocationNode.objects.filter(kind=node_kind(instance), object_id=instance.pk).values_list('path', flat=True).first()
+    if path is not None:
+        LocationNode.objects.filter(path__startswith=path).delete()
@@ -1,8 +1,9 @@
 from django.db import models
-from appcore.models import BaseModel
+from appcore.models import BaseModel, BusinessOwnedModel
 from users.querysets import UserQuerySet
+from locations.querysets import BusinessQueryset, HeadquartersQuerySet, InternalLocationQuerySet, LocationNodeQuerySet
 
-class BusinessManager(models.Manager):
+class BusinessManager(models.Manager.from_queryset(BusinessQueryset)):
    
   
     def get_queryset(self):
@@ -25,23 +26,23 @@ class BusinessManager(models.Manager):
         return memberships.values_list('business', flat=True).distinct()
 
 
-class HeadquartersManager(models.Manager):
+class HeadquartersManager(models.Manager.from_queryset(HeadquartersQuerySet)):
     def get_queryset(self):
         return super().get_queryset()
 
     def get_headquarters_by_business(self, business_id):
-        return self.filter(business_id=business_id)
+        return self.get_queryset().get_headquarters_by_business(business_id)
 
     def get_headquarter_by_ids(self, business_id, headquarter_id):
         return self.filter(business_id=business_id, headquarter_id=headquarter_id)
 
 
-class InternalLocationManager(models.Manager):
+class InternalLocationManager(models.Manager.from_queryset(InternalLocationQuerySet)):
     def get_queryset(self):
         return super().get_queryset()
 
     def get_internal_locations_by_headquarter(self, headquarter_id):
-        return self.filter(headquarter_id=headquarter_id)
+        return self.get_queryset().get_internal_locations_by_headquarter(Headquarters(pk=headquarter_id))
 
     def get_internallocation_by_ids(self, headquarter_id, internallocation_id):
         return self.filter(headquarter_id=headquarter_id, internallocation_id=internallocation_id)
@@ -55,7 +56,7 @@ class Business(BaseModel):
     tin = models.CharField(max_length=255, unique=True, null=False, blank=False)
     utr = models.CharField(max_length=255, unique=True, null=False, blank=False)
     creation_date = models.DateField(auto_now_add=True, blank=True, null=True)
-    update_date = models.DateField(auto_now=True, blank=True, null=True)
+    update_date = models.DateTimeField(auto_now=True, blank=True, null=True)
 
     def get_business(self):
         return self
@@ -78,6 +79,10 @@ class Headquarters(BaseModel):
     
     class Meta:
         unique_together = ('business_key','name')
+        indexes = [
+            #keyset pagination of the headquarters lists, see appcore/pagination.py
+            models.Index(fields=['business_key', 'id'], name='headquarters_business_id_idx'),
+        ]
     
     
     name = models.CharField(max_length=100)
@@ -85,7 +90,7 @@ class Headquarters(BaseModel):
     phone = models.CharField(max_length=20)
     business_key = models.ForeignKey(Business, on_delete=models.CASCADE)
     creation_date = models.DateField(auto_now_add=True, blank=True, null=True)
-    update_date = models.DateField(auto_now=True, blank=True, null=True)
+    update_date = models.DateTimeField(auto_now=True, blank=True, null=True)
 
     objects = HeadquartersManager()
 
@@ -104,15 +109,22 @@ class Headquarters(BaseModel):
     def get_business(self):
         return self.business_key
     
-class InternalLocation(BaseModel):
+class InternalLocation(BusinessOwnedModel):
+    class Meta:
+        indexes = [
+            #keyset pagination of the internal location lists, see appcore/pagination.py
+            models.Index(fields=['headquarters_key', 'id'], name='internallocation_hq_id_idx'),
+        ]
+
     objects = InternalLocationManager()
+    business_parent = 'headquarters_key'
 
     name = models.CharField(max_length=100)
     floor = models.CharField(max_length=50)
     room_number = models.CharField(max_length=50)
     headquarters_key = models.ForeignKey(Headquarters, on_delete=models.CASCADE)
     creation_date = models.DateField(auto_now_add=True, blank=True, null=True)
-    update_date = models.DateField(auto_now=True, blank=True, null=True)
+    update_date = models.DateTimeField(auto_now=True, blank=True, null=True)
 
     def __str__(self):
         return self.name + (' Piso: '+ self.floor) if self.floor else ""
@@ -125,7 +137,30 @@ class InternalLocation(BaseModel):
     
     def get_plural(self):
         return "internallocations"
-    
-    def get_business(self):
-        return self.headquarters_key.get_business()
 
+
+
+class LocationNode(models.Model):
+    """
+    Node of a location (business, headquarters, internal location) in the
+    materialized path of the hierarchy, see locations/domain/location_tree.py.
+    """
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='locationnode_kind_object_uniq'),
+        ]
+        indexes = [
+            #prefix scans (path LIKE 'business:1/%'), the pattern ops let postgres use the index for LIKE
+            models.Index(fields=['path'], name='locationnode_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
+    objects = models.Manager.from_queryset(LocationNodeQuerySet)()
+
+    kind = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='children')
+    path = models.CharField(max_length=255)
+    depth = models.PositiveSmallIntegerField(default=0)
+
+    def __str__(self):
+        return self.path
@@ -0,0 +1,171 @@
+from django.db import transaction
+from locations.domain.models import Business, Headquarters, InternalLocation
+from locations.domain.location_tree import add_location_nodes
+from locations.domain.business_stats import invalidate_business_stats
+from locations.querysets import visible_to_user
+from users.domain.service.base import BaseService
+
+
+BULK_MAX_ITEMS = 1000
+BULK_BATCH_SIZE = 500
+
+
+class LocationBulkService(BaseService):
+    """
+    Creates and updates headquarters and internal locations in batches.
+
+    Every foreign key of the batch is validated (existence and permission of
+    the user in its business) with one id__in query, the unique names with
+    another one, and the rows are written with bulk_create/bulk_update in one
+    transaction. The batch is all or nothing: the methods return
+    (objects, errors) where errors holds {'index', 'errors'} for every
+    rejected item and nothing is written when it is not empty.
+
+    bulk_create does not call save() nor send post_save, the business column
+    of the internal locations, the nodes of the location tree of the new rows
+    and the cached business counters are handled here. The updates never
+    change a parent.
+    """
+
+    def create_headquarters(self, user, items):
+        businesses = self._permitted_parents(Business, Headquarters, user, {item['business_key'] for item in items})
+        taken = self._taken_names(Headquarters, 'business_key', businesses.keys(), items, exclude_ids=())
+
+        errors = {}
+        for index, item in enumerate(items):
+            business = businesses.get(item['business_key'])
+            if business is None:
+                errors[index] = {'business_key': [f"Business {item['business_key']} does not exist or is not accessible."]}
+                continue
+            if not self._claim_name(taken, business.pk, item['name']):
+                errors[index] = {'name': [f"Headquarters {item['name']} already exists in business {business.pk}."]}
+
+        if errors:
+            return [], self._indexed(errors)
+
+        headquarters = [
+            Headquarters(name=item['name'], address=item['address'], phone=item['phone'], business_key=businesses[item['business_key']])
+            for item in items
+        ]
+        with transaction.atomic():
+            Headquarters.objects.bulk_create(headquarters, batch_size=BULK_BATCH_SIZE)
+            add_location_nodes(headquarters)
+            invalidate_business_stats({hq.business_key_id for hq in headquarters})
+        return headquarters, []
+
+    def update_headquarters(self, user, items):
+        fields = ('name', 'address', 'phone')
+        headquarters, errors = self._load_targets(
+            visible_to_user(Headquarters.objects.select_related('business_key'), user, 'change'), items
+        )
+
+        #the final name of every headquarters of the batch must stay unique in its business
+        batch_ids = [hq.pk for hq in headquarters.values()]
+        final_names = [
+            (index, hq.business_key_id, items[index].get('name', hq.name)) for index, hq in headquarters.items()
+        ]
+        taken = self._taken_names(
+            Headquarters, 'business_key', {business_id for _, business_id, _ in final_names},
+            [{'name': name} for _, _, name in final_names], exclude_ids=batch_ids,
+        )
+        for index, business_id, name in final_names:
+            if not self._claim_name(taken, business_id, name):
+                errors[index] = {'name': [f"Headquarters {name} already exists in business {business_id}."]}
+
+        return self._apply_updates(Headquarters, headquarters, items, fields, errors)
+
+    def create_internal_locations(self, user, items):
+        headquarters = self._permitted_parents(
+            Headquarters, InternalLocation, user, {item['headquarters_key'] for item in items}
+        )
+
+        errors = {
+            index: {'headquarters_key': [f"Headquarters {item['headquarters_key']} does not exist or is not accessible."]}
+            for index, item in enumerate(items) if item['headquarters_key'] not in headquarters
+        }
+        if errors:
+            return [], self._indexed(errors)
+
+        internal_locations = [
+            InternalLocation(
+                name=item['name'], floor=item['floor'], room_number=item['room_number'],
+                headquarters_key=headquarters[item['headquarters_key']],
+                business_id=headquarters[item['headquarters_key']].business_key_id,
+            )
+            for item in items
+        ]
+        with transaction.atomic():
+            InternalLocation.objects.bulk_create(internal_locations, batch_size=BULK_BATCH_SIZE)
+            add_location_nodes(internal_locations)
+            invalidate_business_stats({location.business_id for location in internal_locations})
+        return internal_locations, []
+
+    def update_internal_locations(self, user, items):
+        internal_locations, errors = self._load_targets(
+            visible_to_user(InternalLocation.objects.select_related('headquarters_key'), user, 'change'), items
+        )
+        return self._apply_updates(InternalLocation, internal_locations, items, ('name', 'floor', 'room_number'), errors)
+
+    @staticmethod
+    def _permitted_parents(parent_model, child_model, user, parent_ids) -> dict:
+        """Returns {id: parent} for the parents where the user can add child_model rows, in one query"""
+        parents = visible_to_user(parent_model.objects.filter(pk__in=parent_ids), user, 'add', permission_model=child_model)
+        return {parent.pk: parent for parent in parents}
+
+    @staticmethod
+    def _taken_names(model, parent_field, parent_ids, items, exclude_ids) -> set:
+        """Returns the (parent id, name) pairs already used by rows outside the batch, in one query"""
+        names = {item['name'] for item in items}
+        if not parent_ids or not names:
+            return set()
+        return set(
+            model.objects.filter(**{f'{parent_field}__in': parent_ids, 'name__in': names})
+            .exclude(pk__in=exclude_ids)
+            .values_list(f'{parent_field}_id', 'name')
+        )
+
+    @staticmethod
+    def _claim_name(taken, parent_id, name) -> bool:
+        if (parent_id, name) in taken:
+            return False
+        taken.add((parent_id, name))
+        return True
+
+    @staticmethod
+    def _load_targets(queryset, items):
+        """Returns ({index: instance}, errors) for the items to update, in one id__in query"""
+        instances = queryset.in_bulk([item['id'] for item in items])
+        targets, errors, seen = {}, {}, set()
+        for index, item in enumerate(items):
+            if item['id'] in seen:
+                errors[index] = {'id': [f"{item['id']} appears more than once in the batch."]}
+            elif item['id'] not in instances:
+                errors[index] = {'id': [f"{item['id']} does not exist or is not accessible."]}
+            else:
+                targets[index] = instances[item['id']]
+            seen.add(item['id'])
+        return targets, errors
+
+    def _apply_updates(self, model, targets, items, fields, errors):
+        if errors:
+            return [], self._indexed(errors)
+
+        #bulk_update does not run save(), the auto_now fields (update_date) are refreshed here
+        auto_now_fields = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+        for index, instance in targets.items():
+            for field in fields:
+                if field in items[index]:
+                    setattr(instance, field, items[index][field])
+            for field in auto_now_fields:
+                field.pre_save(instance, add=False)
+
+        instances = list(targets.values())
+        with transaction.atomic():
+            model.objects.bulk_update(
+                instances, [*fields, *(field.name for field in auto_now_fields)], batch_size=BULK_BATCH_SIZE
+            )
+        return instances, []
+
+    @staticmethod
+    def _indexed(errors) -> list:
+        return [{'index': index, 'errors': errors[index]} for index in sorted(errors)]
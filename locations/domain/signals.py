@@ -0,0 +1,47 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from locations.domain.models import Business, Headquarters, InternalLocation
+from locations.domain.location_tree import LOCATION_LEVELS, add_location_nodes, move_location_node, remove_location_node, node_kind
+from locations.domain.business_stats import invalidate_business_stats
+from appcore.business_owner import business_source_field
+from assets.domain.models import Asset
+from permissions.domain.models import BusinessMembership
+from users.domain.models import Invitation
+
+
+@receiver(post_save, sender=Business)
+@receiver(post_save, sender=Headquarters)
+@receiver(post_save, sender=InternalLocation)
+def location_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        add_location_nodes([instance])
+        return
+    parent_field = LOCATION_LEVELS[node_kind(sender)]
+    if update_fields is not None and parent_field not in update_fields:
+        return
+    move_location_node(instance)
+
+
+@receiver(post_delete, sender=Business)
+@receiver(post_delete, sender=Headquarters)
+@receiver(post_delete, sender=InternalLocation)
+def location_deleted(sender, instance, **kwargs):
+    remove_location_node(instance)
+
+
+#connected before business_owner_saved (LocationsConfig.ready), which overwrites _loaded_business_id
+@receiver(post_save, sender=Headquarters)
+@receiver(post_save, sender=InternalLocation)
+@receiver(post_save, sender=Asset)
+@receiver(post_save, sender=BusinessMembership)
+@receiver(post_save, sender=Invitation)
+@receiver(post_delete, sender=Headquarters)
+@receiver(post_delete, sender=InternalLocation)
+@receiver(post_delete, sender=Asset)
+@receiver(post_delete, sender=BusinessMembership)
+@receiver(post_delete, sender=Invitation)
+def business_counters_changed(sender, instance, **kwargs):
+    business_id = getattr(instance, business_source_field(sender).attname)
+    invalidate_business_stats([business_id, getattr(instance, '_loaded_business_id', business_id)])
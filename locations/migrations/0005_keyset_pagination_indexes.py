@@ -0,0 +1,21 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0004_alter_headquarters_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='headquarters',
+            index=models.Index(fields=['business_key', 'id'], name='headquarters_business_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='internallocation',
+            index=models.Index(fields=['headquarters_key', 'id'], name='internallocation_hq_id_idx'),
+        ),
+    ]
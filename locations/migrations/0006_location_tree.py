@@ -0,0 +1,63 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+#levels of the tree in parent first order, frozen here so the backfill does not follow later changes of location_tree
+LEVELS = (
+    ('business', None),
+    ('headquarters', 'business_key_id'),
+    ('internallocation', 'headquarters_key_id'),
+)
+BATCH_SIZE = 1000
+
+
+def build_location_nodes(apps, schema_editor):
+    LocationNode = apps.get_model('locations', 'LocationNode')
+    parents = {}
+    for kind, parent_attname in LEVELS:
+        model = apps.get_model('locations', kind)
+        nodes = {}
+        batch = []
+        fields = ('pk', parent_attname) if parent_attname else ('pk',)
+        for row in model.objects.order_by('pk').values_list(*fields).iterator(chunk_size=BATCH_SIZE):
+            object_id, parent = row[0], parents.get(row[1]) if parent_attname else None
+            batch.append(LocationNode(
+                kind=kind,
+                object_id=object_id,
+                parent=parent,
+                path=(parent.path if parent else '') + f'{kind}:{object_id}/',
+                depth=parent.depth + 1 if parent else 0,
+            ))
+            if len(batch) >= BATCH_SIZE:
+                nodes.update((node.object_id, node) for node in LocationNode.objects.bulk_create(batch))
+                batch = []
+        nodes.update((node.object_id, node) for node in LocationNode.objects.bulk_create(batch))
+        parents = nodes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0005_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationNode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('path', models.CharField(max_length=255)),
+                ('depth', models.PositiveSmallIntegerField(default=0)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='locations.locationnode')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['path'], name='locationnode_path_idx', opclasses=['varchar_pattern_ops'])],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='locationnode_kind_object_uniq')],
+            },
+        ),
+        migrations.RunPython(build_location_nodes, migrations.RunPython.noop),
+    ]
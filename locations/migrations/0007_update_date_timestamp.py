@@ -0,0 +1,28 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0006_location_tree'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='business',
+            name='update_date',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='headquarters',
+            name='update_date',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='internallocation',
+            name='update_date',
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:45
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+
+#frozen copy of the backfill, later changes of the app code must not change this migration
+BATCH_SIZE = 5000
+
+
+def backfill_business_column(model, parent_model, parent_field, parent_business_field):
+    """Fills model.business from its parent in pk ranges of BATCH_SIZE, one UPDATE and one transaction per range"""
+    business = Subquery(parent_model.objects.filter(pk=OuterRef(parent_field)).values(parent_business_field)[:1])
+    last_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    for start in range(0, last_pk, BATCH_SIZE):
+        with transaction.atomic():
+            model.objects.filter(pk__gt=start, pk__lte=start + BATCH_SIZE).update(business_id=business)
+
+
+def fill_internal_location_business(apps, schema_editor):
+    backfill_business_column(
+        apps.get_model('locations', 'InternalLocation'), apps.get_model('locations', 'Headquarters'),
+        'headquarters_key', 'business_key',
+    )
+
+
+class Migration(migrations.Migration):
+    #the backfill commits every batch on its own
+    atomic = False
+
+    dependencies = [
+        ('locations', '0007_update_date_timestamp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='internallocation',
+            name='business',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.business'),
+        ),
+        migrations.RunPython(fill_internal_location_business, migrations.RunPython.noop),
+    ]
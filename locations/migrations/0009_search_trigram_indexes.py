@@ -0,0 +1,50 @@
+from django.db import migrations
+
+
+#columns of the location search (see search_fields in locations/querysets.py)
+SEARCH_COLUMNS = (
+    ('locations_business', 'name'),
+    ('locations_business', 'tin'),
+    ('locations_business', 'utr'),
+    ('locations_headquarters', 'name'),
+    ('locations_headquarters', 'address'),
+    ('locations_internallocation', 'name'),
+    ('locations_internallocation', 'room_number'),
+)
+
+
+def index_name(table, column):
+    return f'{table}_{column}_trgm'
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """PostgreSQL only: GIN trigram indexes over UPPER(column), the expression the icontains,
+    istartswith and iexact lookups compile to, other databases keep the plain scan"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, column in SEARCH_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name(table, column)} '
+            f'ON {table} USING gin (UPPER({column}) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, column in SEARCH_COLUMNS:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {index_name(table, column)}')
+
+
+class Migration(migrations.Migration):
+    #CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('locations', '0008_internallocation_business'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
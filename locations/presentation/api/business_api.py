@@ -5,25 +5,37 @@ from locations.models import Business
 from locations.presentation.serializers.business_serializer import BusinessListSerializer, BusinessSerializer
 from permissions.domain.permissions.permissions import permissionToCheckModel
 from permissions.domain.authentication import CookieJWTAuthentication
+from appcore.pagination import KeysetPagination
+from appcore.conditional import ConditionalGetMixin, queryset_fingerprint
+from django.db.models import Max
+from rest_framework.permissions import IsAuthenticated
+from locations.domain.business_stats import get_business_stats
 
 
-class BusinessListAPIView(ListCreateAPIView):
+class BusinessListAPIView(ConditionalGetMixin, ListCreateAPIView):
     serializer_class = BusinessListSerializer
     authentication_classes = [CookieJWTAuthentication]
     permission_classes = [permissionToCheckModel]
     http_method_names = ["get", "post"]
 
     def get_queryset(self, request):
-        user = request.user
-        businesses : list[str] = Business.objects.get_businesses_for_user(user.id)
-        return Business.objects.filter(id__in=businesses)
+        return Business.objects.visible_to(request.user, 'view')
+
+    def get_fingerprint(self, request):
+        return queryset_fingerprint(request, self.get_queryset(request=request), Max('update_date'))
 
     def get(self, request):
-        businesses = self.get_queryset(request=request)
+        not_modified = self.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        paginator = KeysetPagination(ordering=('id',))
+        businesses = paginator.paginate_queryset(self.get_queryset(request=request), request)
         businesses = self.serializer_class(businesses, many=True)
         
         context = {
-            'data':businesses.data
+            'data':businesses.data,
+            'next':paginator.next_cursor
         }
         return Response(context, status=status.HTTP_200_OK)
     
@@ -96,5 +108,21 @@ class BusinessAPIView(RetrieveUpdateDestroyAPIView):
         response_data['message'] = 'Negocio eliminado correctamente'
         business.delete()
         return Response(response_data, status=status.HTTP_200_OK)
-        
-            
\ No newline at end of file
+
+
+class BusinessStatsAPIView(GenericAPIView):
+    """Counters of the businesses the user can view ({business id: counters}), paginated by business id, see locations/domain/business_stats.py"""
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    http_method_names = ["get"]
+
+    def get(self, request):
+        paginator = KeysetPagination(ordering=('id',))
+        businesses = paginator.paginate_queryset(Business.objects.visible_to(request.user, 'view').values('id'), request)
+        stats = get_business_stats([business['id'] for business in businesses])
+
+        context = {
+            'data': stats,
+            'next': paginator.next_cursor
+        }
+        return Response(context, status=status.HTTP_200_OK)
@@ -4,8 +4,13 @@ from rest_framework.response import Response
 from locations.presentation.serializers.headquarter_serializer import HeadquartersListSerializer, HeadquartersSerializer
 from permissions.domain.authentication import CookieJWTAuthentication
 from permissions.domain.permissions.permissions import permissionToCheckModel
-from locations.querysets import HeadquartersQuerySet
 from locations.models import Headquarters
+from appcore.pagination import KeysetPagination
+from appcore.conditional import ConditionalGetMixin, queryset_fingerprint
+from django.db.models import Max
+from rest_framework.permissions import IsAuthenticated
+from locations.domain.service.location_bulk_service import BULK_MAX_ITEMS, LocationBulkService
+from locations.presentation.serializers.bulk_serializer import HeadquartersBulkSerializer, indexed_errors
 
 
 class HeadquarterAPIView(RetrieveUpdateDestroyAPIView):
@@ -16,7 +21,7 @@ class HeadquarterAPIView(RetrieveUpdateDestroyAPIView):
 
 
     def get_queryset(self, request, pk):
-        headquarter =  HeadquartersQuerySet().headquarter_user_has_permission(request=request, pk=pk)
+        headquarter =  Headquarters.objects.headquarter_user_has_permission(request=request, pk=pk)
         if not headquarter["exists"]:
             raise Headquarters.DoesNotExist
         return headquarter['hq']
@@ -54,31 +59,44 @@ class HeadquarterAPIView(RetrieveUpdateDestroyAPIView):
 
 
 
-class HeadquarterListAPIView(RetrieveUpdateDestroyAPIView):
+class HeadquarterListAPIView(ConditionalGetMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = HeadquartersListSerializer
     authentication_classes = [CookieJWTAuthentication]
     permission_classes = [permissionToCheckModel]
     allowed_methods = ["GET", "POST"]
 
 
-    def get_queryset(self, request, businessid=0):
-        user_headquarters = HeadquartersQuerySet().get_user_headquarters(request=request, selected_business_id=businessid)
+    def get_queryset(self, request, businessid=0, paginator=None):
+        user_headquarters = Headquarters.objects.get_user_headquarters(request=request, selected_business_id=businessid, rows=True, paginator=paginator)
         return user_headquarters
 
+    def get_fingerprint(self, request, pk=0):
+        #the rows carry the name of their business, its updates change the list too
+        headquarters = Headquarters.objects.visible_to(request.user, 'view')
+        if pk:
+            headquarters = headquarters.filter(business_key_id=pk)
+        return queryset_fingerprint(request, headquarters, Max('update_date'), Max('business_key__update_date'))
+
     def get(self, request, pk=0):
-        headquarters = self.get_queryset(request=request, businessid=pk)
+        not_modified = self.not_modified(request, pk)
+        if not_modified is not None:
+            return not_modified
+
+        paginator = KeysetPagination()
+        headquarters = self.get_queryset(request=request, businessid=pk, paginator=paginator)
         new_headquarters = {}
         
 
         
         for business in headquarters.keys():
-            new_headquarters[business] = self.serializer_class(headquarters[business], many=True).data
+            new_headquarters[business] = self.serializer_class.represent_rows(headquarters[business])
             
         if pk and pk in new_headquarters.keys():
           new_headquarters = new_headquarters[pk]
 
         context = {
-            'data':new_headquarters
+            'data':new_headquarters,
+            'next':paginator.next_cursor
         }
         return Response(context, status=status.HTTP_200_OK)
         
@@ -91,4 +109,33 @@ class HeadquarterListAPIView(RetrieveUpdateDestroyAPIView):
             serializer.save()
             response_data["data"] = serializer.data
             return Response(response_data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class HeadquarterBulkAPIView(GenericAPIView):
+    """Creates (POST) or updates (PATCH) a list of headquarters in one transaction, every item is authorized by its business"""
+    serializer_class = HeadquartersBulkSerializer
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    http_method_names = ["post", "patch"]
+
+    def post(self, request):
+        return self.write(request, LocationBulkService().create_headquarters, status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        return self.write(request, LocationBulkService().update_headquarters, status.HTTP_200_OK, partial=True)
+
+    def write(self, request, service_method, success_status, partial=False):
+        serializer = self.serializer_class(
+            data=request.data, many=True, partial=partial, allow_empty=False, max_length=BULK_MAX_ITEMS
+        )
+        if not serializer.is_valid():
+            response_data = { 'errors': indexed_errors(serializer.errors), 'message': 'Error en las sedes, información inválida' }
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        headquarters, errors = service_method(request.user, serializer.validated_data)
+        if errors:
+            response_data = { 'errors': errors, 'message': 'Error en las sedes, ninguna fue guardada' }
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({ 'data': HeadquartersListSerializer(headquarters, many=True).data }, status=success_status)
@@ -5,8 +5,15 @@ from permissions.domain.permissions.permissions import permissionToCheckModel
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from permissions.domain.authentication import CookieJWTAuthentication
 from locations.presentation.serializers.internal_location_serializer import InternalLocationSerializer, InternalLocationListSerializer
-from locations.querysets import InternalLocationQuerySet
 from locations.models import InternalLocation
+from appcore.pagination import KeysetPagination
+from appcore.conditional import ConditionalGetMixin, queryset_fingerprint
+from django.db.models import Count, Max
+from locations.models import Headquarters
+from locations.querysets import visible_to_user
+from rest_framework.permissions import IsAuthenticated
+from locations.domain.service.location_bulk_service import BULK_MAX_ITEMS, LocationBulkService
+from locations.presentation.serializers.bulk_serializer import InternalLocationBulkSerializer, indexed_errors
 
 
 
@@ -19,7 +26,7 @@ class InternalLocationAPIView(ListCreateAPIView):
     allowed_methods = ["GET", "PATCH", "DELETE"]
 
     def get_queryset(self,request, pk=None):
-        internal_location =  InternalLocationQuerySet().internal_location_if_user_has_perm(request=request, pk=pk)
+        internal_location =  InternalLocation.objects.internal_location_if_user_has_perm(request=request, pk=pk)
         if not internal_location["exists"]:
             raise InternalLocation.DoesNotExist
         return internal_location['hq']
@@ -61,31 +68,43 @@ class InternalLocationAPIView(ListCreateAPIView):
             return Response({'detail': 'Internal Location has not been found.'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class InternalLocationListAPIView(RetrieveUpdateDestroyAPIView):
+class InternalLocationListAPIView(ConditionalGetMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = InternalLocationListSerializer
     permission_classes = [permissionToCheckModel]
     authentication_classes = [CookieJWTAuthentication]
     allowed_methods = ["GET", "POST"]
 
 
-    def get_queryset(self, request):
-        internal_locations = InternalLocationQuerySet().get_user_internal_locations(request=request)
+    def get_queryset(self, request, paginator=None):
+        internal_locations = InternalLocation.objects.get_user_internal_locations(request=request, rows=True, paginator=paginator)
         return internal_locations
 
+    def get_fingerprint(self, request):
+        #the list is read from the headquarters side (see get_user_internal_locations), both levels are summarized
+        headquarters = visible_to_user(Headquarters.objects.all(), request.user, 'view', permission_model=InternalLocation)
+        return queryset_fingerprint(
+            request, headquarters, Max('update_date'), Max('internallocation__update_date'), Count('internallocation')
+        )
+
     def get(self, request):
-        dictionary = self.get_queryset(request=request)
+        not_modified = self.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        paginator = KeysetPagination()
+        dictionary = self.get_queryset(request=request, paginator=paginator)
         new_internal_locations = {}
         if dictionary.keys():
             for business_key in dictionary.keys():
                 new_internal_locations[business_key] = {}
                 for headquarter in dictionary[business_key].keys():
                     internal_locations = dictionary[business_key][headquarter]
-                    new_instance = self.serializer_class(internal_locations, many=True).data
-                    new_internal_locations[business_key][headquarter] = new_instance if internal_locations else []
+                    new_internal_locations[business_key][headquarter] = self.serializer_class.represent_rows(internal_locations)
 
 
         context = {
-            "data" : new_internal_locations
+            "data" : new_internal_locations,
+            "next" : paginator.next_cursor
         }
         return Response(context, status=status.HTTP_200_OK)
     
@@ -97,4 +116,33 @@ class InternalLocationListAPIView(RetrieveUpdateDestroyAPIView):
             serializer.save()
             response_data["data"] = serializer.data
             return Response(response_data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class InternalLocationBulkAPIView(GenericAPIView):
+    """Creates (POST) or updates (PATCH) a list of internal locations in one transaction, every item is authorized by its business"""
+    serializer_class = InternalLocationBulkSerializer
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [CookieJWTAuthentication]
+    http_method_names = ["post", "patch"]
+
+    def post(self, request):
+        return self.write(request, LocationBulkService().create_internal_locations, status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        return self.write(request, LocationBulkService().update_internal_locations, status.HTTP_200_OK, partial=True)
+
+    def write(self, request, service_method, success_status, partial=False):
+        serializer = self.serializer_class(
+            data=request.data, many=True, partial=partial, allow_empty=False, max_length=BULK_MAX_ITEMS
+        )
+        if not serializer.is_valid():
+            response_data = { 'errors': indexed_errors(serializer.errors), 'message': 'Error en las ubicaciones internas, información inválida' }
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        internal_locations, errors = service_method(request.user, serializer.validated_data)
+        if errors:
+            response_data = { 'errors': errors, 'message': 'Error en las ubicaciones internas, ninguna fue guardada' }
+            return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({ 'data': InternalLocationListSerializer(internal_locations, many=True).data }, status=success_status)
@@ -0,0 +1,55 @@
+from rest_framework.generics import GenericAPIView
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from permissions.domain.authentication import CookieJWTAuthentication
+from locations.models import Business, Headquarters, InternalLocation
+from appcore.pagination import KeysetPagination
+
+
+SEARCH_MIN_LENGTH = 3
+SEARCH_PAGE_SIZE = 20
+
+#kind -> (model, fields of the result rows)
+SEARCH_TARGETS = {
+    'business': (Business, ('id', 'name', 'tin', 'utr')),
+    'headquarters': (Headquarters, ('id', 'name', 'address', 'business_key_id')),
+    'internallocation': (InternalLocation, ('id', 'name', 'floor', 'room_number', 'headquarters_key_id')),
+}
+
+
+class LocationSearchAPIView(GenericAPIView):
+    """
+    Searches the businesses, headquarters and internal locations the user can
+    view: ?q= (at least SEARCH_MIN_LENGTH characters, the trigram indexes need
+    three). Every kind is a list ranked exact, prefix, contains and paginated
+    by key, ?kind= limits the response to one kind and is required to follow
+    its cursor.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    http_method_names = ["get"]
+
+    def get(self, request):
+        text = request.GET.get('q', '').strip()
+        kind = request.GET.get('kind')
+
+        errors = {}
+        if len(text) < SEARCH_MIN_LENGTH:
+            errors['q'] = [f'Ensure this field has at least {SEARCH_MIN_LENGTH} characters.']
+        if kind is not None and kind not in SEARCH_TARGETS:
+            errors['kind'] = [f'"{kind}" is not a valid choice.']
+        if kind is None and request.GET.get(KeysetPagination.cursor_query_param):
+            errors['kind'] = ['This field is required to follow a cursor.']
+        if errors:
+            return Response({ 'errors': errors, 'message': 'Búsqueda inválida' }, status=status.HTTP_400_BAD_REQUEST)
+
+        data, next_cursors = {}, {}
+        for name in ([kind] if kind else SEARCH_TARGETS):
+            model, fields = SEARCH_TARGETS[name]
+            paginator = KeysetPagination(ordering=('search_rank', 'name', 'id'), page_size=SEARCH_PAGE_SIZE)
+            rows = model.objects.visible_to(request.user, 'view').search(text).values(*fields, 'search_rank')
+            data[name] = paginator.paginate_queryset(rows, request)
+            next_cursors[name] = paginator.next_cursor
+
+        return Response({ 'data': data, 'next': next_cursors }, status=status.HTTP_200_OK)
@@ -0,0 +1,34 @@
+from rest_framework import serializers
+from locations.presentation.serializers.headquarter_serializer import validate_phone
+
+
+def indexed_errors(errors):
+    """Turns the errors of a many=True serializer into [{'index', 'errors'}] for the rejected items"""
+    if isinstance(errors, dict):
+        return errors
+    return [{'index': index, 'errors': item_errors} for index, item_errors in enumerate(errors) if item_errors]
+
+
+class BulkItemSerializer(serializers.Serializer):
+    """Field validation of one item of a bulk request, foreign keys are validated by LocationBulkService for the whole batch"""
+    id = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, attrs):
+        #partial means a bulk update, every item names the row it changes
+        if self.partial and 'id' not in attrs:
+            raise serializers.ValidationError({'id': 'This field is required.'})
+        return attrs
+
+
+class HeadquartersBulkSerializer(BulkItemSerializer):
+    name = serializers.CharField(max_length=100)
+    address = serializers.CharField(max_length=255)
+    phone = serializers.CharField(max_length=15, validators=[validate_phone])
+    business_key = serializers.IntegerField(min_value=1)
+
+
+class InternalLocationBulkSerializer(BulkItemSerializer):
+    name = serializers.CharField(max_length=100, min_length=3)
+    floor = serializers.CharField(max_length=10)
+    room_number = serializers.CharField(max_length=10)
+    headquarters_key = serializers.IntegerField(min_value=1)
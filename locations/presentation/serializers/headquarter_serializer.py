@@ -93,15 +93,31 @@ class HeadquartersListSerializer(serializers.ModelSerializer):
         # data = super().to_representation(instance) #this def representation is used to get the data is instance is a object
         business_key = instance.business_key
 
-        return {
+        return self.represent_row({
             'id': instance.id,
             'name': instance.name,
             'address': instance.address,
             'phone': instance.phone,
-            'business_key': instance.business_key.name,
-            'business_name': business_key.name if business_key else 'N/A'
+            'business_name': business_key.name if business_key else None,
+            })
+
+    @staticmethod
+    def represent_row(row):
+        business_name = row['business_name']
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'address': row['address'],
+            'phone': row['phone'],
+            'business_key': business_name,
+            'business_name': business_name if business_name is not None else 'N/A'
             }
 
+    @classmethod
+    def represent_rows(cls, rows):
+        """list representation of HeadquartersQuerySet.with_business_name() rows, without the DRF field machinery"""
+        return [cls.represent_row(row) for row in rows]
+
 
     
 
@@ -112,14 +112,31 @@ class InternalLocationListSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         # data = super().to_representation(instance) #this def representation is used to get the data is instance is a object
         headquarter = instance.headquarters_key
-        return {
-            instance.id: {
+        return self.represent_row({
             'id': instance.id,
             'name': instance.name,
             'floor': instance.floor,
             'room_number': instance.room_number,
-            'headquarters_key': instance.headquarters_key.id,
-            'headquarter_name': headquarter.name if headquarter else 'N/A'
+            'headquarters_key_id': instance.headquarters_key_id,
+            'headquarter_name': headquarter.name if headquarter else None,
+        })
+
+    @staticmethod
+    def represent_row(row):
+        headquarter_name = row['headquarter_name']
+        return {
+            row['id']: {
+            'id': row['id'],
+            'name': row['name'],
+            'floor': row['floor'],
+            'room_number': row['room_number'],
+            'headquarters_key': row['headquarters_key_id'],
+            'headquarter_name': headquarter_name if headquarter_name is not None else 'N/A'
             }
         }
+
+    @classmethod
+    def represent_rows(cls, rows):
+        """list representation of InternalLocationQuerySet.with_headquarter_name() rows, without the DRF field machinery"""
+        return [cls.represent_row(row) for row in rows]
     
@@ -1,8 +1,12 @@
+from functools import reduce
+from operator import or_
 from django.db import models
+from django.db.models import Case, Count, Exists, F, IntegerField, OuterRef, Q, Value, When
 from django.apps import apps
-from users.querysets import UserQuerySet
-from users.domain.models import User
-from permissions.domain.models import BusinessMembership
+from appcore.business_paths import get_business_lookup
+from locations.domain.location_tree import get_locationnode, loaded_path, node_kind
+from users.querysets import get_businessmembership, get_businessrole, get_userbusinesspermission
+from permissions.domain.permission_catalog import get_permission_catalog
 
 method_to_action = {
     'GET': 'view',
@@ -13,35 +17,144 @@ method_to_action = {
 }
 
 
-def get_user_headquarters(self, request) -> dict:
-          user = request.user
-          businesses_allowed = User.objects.businesses_allowed_to_user(request=request)
-          headquarters_by_business = {}
-          for business_id in businesses_allowed:
-               headquarters_by_business[business_id] = self.get_headquarters_by_business(business_id=business_id)
-          return headquarters_by_business
+def membership_grants_permission(user_id, permission_id, business_ref) -> Exists:
+    """Returns an EXISTS over the active memberships of the user in business_ref (an OuterRef)
+    whose role holds the permission and is not denied, or that have an allowed override"""
+    RolePermission = get_businessrole().permissions.through
+    UserBusinessPermission = get_userbusinesspermission()
+
+    role_grants = RolePermission.objects.filter(businessrole_id=OuterRef('role_id'), permission_id=permission_id)
+    overrides = UserBusinessPermission.objects.filter(membership_id=OuterRef('pk'), permission_id=permission_id)
+
+    memberships = get_businessmembership().objects.filter(
+        user_id=user_id, business_id=business_ref, is_active=True
+    ).filter(
+        (Exists(role_grants) & ~Exists(overrides.filter(allowed=False))) | Exists(overrides.filter(allowed=True))
+    )
+    return Exists(memberships)
+
+
+def visible_to_user(queryset, user, action='view', permission_model=None):
+    """Scopes the queryset to the rows whose business grants the user `<action>_<model_name>`, in the same statement.
+
+    permission_model names the permission when it is not the one of the queryset model"""
+    if user is None or not user.is_authenticated:
+        return queryset.none()
+    if user.is_superuser:
+        return queryset.all()
+
+    permission_model = permission_model or queryset.model
+    permission_id = get_permission_catalog().id_for(f"{action}_{permission_model._meta.model_name}")
+    lookup = get_business_lookup(queryset.model)
+    if permission_id is None or lookup is None:
+        return queryset.none()
+
+    return queryset.filter(membership_grants_permission(user.pk, permission_id, OuterRef(lookup)))
+
+
+def under_location(queryset, location):
+    """Scopes the queryset to the rows under location in the location tree, with one subquery over the path index"""
+    nodes = get_locationnode().objects.subtree(location, kind=queryset.model)
+    return queryset.filter(pk__in=nodes.values('object_id'))
+
+
+def search_fields(queryset, text, fields):
+    """Filters the rows where any of fields contains text (case insensitive) and annotates search_rank:
+    0 for an exact match, 1 for a prefix match and 2 for the rest.
+
+    The icontains/istartswith/iexact lookups compile to UPPER(field) LIKE on PostgreSQL, which is served by
+    the trigram GIN indexes of locations/migrations/0009_search_trigram_indexes.py"""
+    rank = Case(
+        *(When(**{f'{field}__iexact': text}, then=Value(0)) for field in fields),
+        *(When(**{f'{field}__istartswith': text}, then=Value(1)) for field in fields),
+        default=Value(2),
+        output_field=IntegerField(),
+    )
+    matches = reduce(or_, (Q(**{f'{field}__icontains': text}) for field in fields))
+    return queryset.filter(matches).annotate(search_rank=rank)
+
+
+class LocationNodeQuerySet(models.QuerySet):
+    def of(self, location):
+          return self.filter(kind=node_kind(location), object_id=location.pk)
 
+    def path_of(self, location) -> str | None:
+          """path of the node of location, read from its node only when the loaded foreign keys are not enough"""
+          path = loaded_path(location)
+          if path is None:
+               path = self.of(location).values_list('path', flat=True).first()
+          return path
 
+    def subtree(self, location, kind=None):
+          """nodes strictly under location, only the ones of kind (a model name or a model) when given"""
+          path = self.path_of(location)
+          if path is None:
+               return self.none()
+          nodes = self.filter(path__startswith=path).exclude(path=path)
+          if kind is not None:
+               nodes = nodes.filter(kind=kind if isinstance(kind, str) else node_kind(kind))
+          return nodes
+
+    def child_counts(self, location, kind) -> dict:
+          """{parent id: count} of the kind nodes under location grouped by their direct parent,
+          e.g. the internal locations per headquarters of a business, in one query"""
+          counts = self.subtree(location, kind).order_by().values('parent__object_id').annotate(total=Count('pk'))
+          return {row['parent__object_id']: row['total'] for row in counts}
 
 
 class BusinessQueryset(models.QuerySet):
+    search_fields = ('name', 'tin', 'utr')
+
     def get_user_businesses(self, user_id):
-      memberships = BusinessMembership.objects.filter(user=user_id).values_list()
+      memberships = get_businessmembership().objects.filter(user=user_id).values_list()
+
+    def visible_to(self, user, action='view'):
+      return visible_to_user(self, user, action)
+
+    def search(self, text):
+      return search_fields(self, text, self.search_fields)
 
 
 class HeadquartersQuerySet(models.QuerySet):
-    def get_user_headquarters(self, request, dictionary=False, selected_business_id=0) -> dict:
+    search_fields = ('name', 'address')
+
+    def visible_to(self, user, action='view'):
+          return visible_to_user(self, user, action)
+
+    def under(self, location):
+          return under_location(self, location)
+
+    def search(self, text):
+          return search_fields(self, text, self.search_fields)
+
+    def with_business_name(self):
+          """values() rows of the headquarters annotated with the name of their business, for the list serializers"""
+          return self.values('id', 'name', 'address', 'phone', 'business_key_id', business_name=F('business_key__name'))
+
+    def get_user_headquarters(self, request, dictionary=False, selected_business_id=0, rows=False, paginator=None) -> dict:
+          """groups the headquarters by business id, rows=True groups with_business_name() rows instead of instances
+          
+          with a KeysetPagination only the requested page is read, ordered by ('business_key_id', 'id')"""
           if isinstance(selected_business_id, int) and selected_business_id<0:
             raise TypeError('Selected business id is not integer type')
           
-          businesses_allowed = User.objects.businesses_allowed_to_user(request=request)
-          
+          headquarters = self.visible_to(request.user, method_to_action[request.method])
           if selected_business_id:
-            businesses_allowed = [selected_business_id] if str(selected_business_id) in businesses_allowed else []
+            headquarters = headquarters.filter(business_key_id=selected_business_id)
+          headquarters = headquarters.order_by('business_key_id', 'pk')
+          if rows:
+            headquarters = headquarters.with_business_name()
+          if paginator is not None:
+            paginator.ordering = ('business_key_id', 'id')
+            headquarters = paginator.paginate_queryset(headquarters, request)
           
           headquarters_by_business = {}
-          for business_id in businesses_allowed:
-               headquarters_by_business[business_id] = self.get_headquarters_by_business(business_id=business_id, dictionary=dictionary)
+          for headquarter in headquarters:
+               business_id, headquarter_id = (headquarter['business_key_id'], headquarter['id']) if rows else (headquarter.business_key_id, headquarter.pk)
+               if dictionary:
+                    headquarters_by_business.setdefault(business_id, {})[headquarter_id] = headquarter
+               else:
+                    headquarters_by_business.setdefault(business_id, []).append(headquarter)
 
           return headquarters_by_business
 
@@ -49,9 +162,9 @@ class HeadquartersQuerySet(models.QuerySet):
 
 
     def get_headquarters_by_business(self, business_id, dictionary=False):
-            #headquarters = self.filter(business_key_id=business_id) todavia no esta asociada al modelo de headquarters en managers
-            Headquarters = apps.get_model("locations","Headquarters")
-            headquarters = Headquarters.objects.filter(business_key_id=business_id)
+            #the headquarters under the node of the business, the path of a business is built from its id alone
+            Business = apps.get_model("locations","Business")
+            headquarters = self.under(Business(pk=business_id))
             if dictionary:
                   return {hq.pk : hq for hq in headquarters}
             return headquarters
@@ -59,8 +172,7 @@ class HeadquartersQuerySet(models.QuerySet):
 
 
     def headquarter_user_has_permission(self, request, pk) -> dict:
-        Headquarters = apps.get_model('locations','Headquarters')
-        headquarter = Headquarters.objects.filter(pk=pk).first()
+        headquarter = self.filter(pk=pk).first()
         user = request.user
 
         if not headquarter:
@@ -73,13 +185,7 @@ class HeadquartersQuerySet(models.QuerySet):
         if user.is_superuser:
              return {"hq":headquarter, "exists":True}
         
-        business = headquarter.get_business()
-        permission_required = f"{method_to_action[request.method]}_{Headquarters._meta.model_name}"
-        Permission = apps.get_model('auth', 'Permission')
-        permission = Permission.objects.filter(codename=permission_required).first()
-        if not permission:
-             return {"hq":None, "exists":True}
-        user_has_perm = UserQuerySet().businesses_where_user_has_userpermission(user=user,business=business,perm=permission)
+        user_has_perm = self.visible_to(user, method_to_action[request.method]).filter(pk=pk).exists()
 
         if not user_has_perm:
              return {"hq":None, "exists":True}
@@ -91,17 +197,66 @@ class HeadquartersQuerySet(models.QuerySet):
 
 
 class InternalLocationQuerySet(models.QuerySet):
+     search_fields = ('name', 'room_number')
+
+     def visible_to(self, user, action='view'):
+          return visible_to_user(self, user, action)
+
+     def under(self, location):
+          return under_location(self, location)
+
+     def search(self, text):
+          return search_fields(self, text, self.search_fields)
+
+     def with_headquarter_name(self):
+          """values() rows of the internal locations annotated with the name of their headquarters, for the list serializers"""
+          return self.values('id', 'name', 'floor', 'room_number', 'headquarters_key_id', headquarter_name=F('headquarters_key__name'))
      
-     def get_user_internal_locations(self, request):
-          #return the hq in form { business_id: { headquarter.id : headquarter query}}
-          elements_dict = HeadquartersQuerySet().get_user_headquarters(request=request, dictionary=True)
-
-          for business_id in elements_dict.keys():
-               hqs_ids = elements_dict[business_id]
-               for hq_id in hqs_ids.keys():
-                         headquarter = hqs_ids[hq_id]
-                         internal_locations = self.get_internal_locations_by_headquarter(headquarter=headquarter)
-                         hqs_ids[hq_id] = internal_locations
+     def get_user_internal_locations(self, request, rows=False, paginator=None):
+          #return the internal locations in form { business_id: { headquarter.id : [internal locations]}}
+          #headquarters without internal locations are kept with an empty list, with rows=True the
+          #internal locations are with_headquarter_name() like dicts instead of instances
+          #
+          #with a KeysetPagination the rows are ordered by (headquarters id, internal location id) and only
+          #the requested page is read, a headquarters without internal locations takes one row of the page
+          #
+          #everything is read with one query from the headquarters side, LEFT JOIN internal locations,
+          #ordered so the rows of a headquarters are contiguous and can be grouped in a single pass
+          Headquarters = apps.get_model("locations","Headquarters")
+          headquarters = visible_to_user(
+               Headquarters.objects.all(), request.user, method_to_action[request.method], permission_model=self.model
+          )
+
+          headquarter_fields = [field.attname for field in Headquarters._meta.concrete_fields if field.attname in ('id', 'name', 'business_key_id')]
+          location_fields = [field.attname for field in self.model._meta.concrete_fields]
+          #the key of the join is annotated so the keyset filter reuses the join of the values instead of adding another one
+          joined_rows = headquarters.annotate(internal_location_id=F('internallocation__id')).order_by(
+               'business_key_id', 'pk', 'internal_location_id'
+          ).values_list(
+               *headquarter_fields, *(f'internallocation__{field}' for field in location_fields)
+          )
+
+          elements_dict = {}
+          headquarter = group = None
+          split = len(headquarter_fields)
+          if paginator is not None:
+               paginator.ordering = ('id', 'internal_location_id')
+               paginator.key = lambda row: [row[0], row[split]]
+               joined_rows = paginator.paginate_queryset(joined_rows, request)
+          for row in joined_rows:
+               if headquarter is None or headquarter.pk != row[0]:
+                    headquarter = Headquarters.from_db(self.db, headquarter_fields, row[:split])
+                    group = elements_dict.setdefault(headquarter.business_key_id, {}).setdefault(headquarter.pk, [])
+               if row[split] is None:
+                    continue
+               if rows:
+                    location = dict(zip(location_fields, row[split:]))
+                    location['headquarter_name'] = headquarter.name
+                    group.append(location)
+                    continue
+               internal_location = self.model.from_db(self.db, location_fields, row[split:])
+               internal_location.headquarters_key = headquarter
+               group.append(internal_location)
           
           return elements_dict
           
@@ -111,9 +266,8 @@ class InternalLocationQuerySet(models.QuerySet):
                      
                  
      def get_internal_locations_by_headquarter(self, headquarter, dictionary=False):
-          #internal_location = self.filter(business_key_id=business_id) todavia no esta asociada al modelo de internal_location
-          InternalLocation = apps.get_model("locations","InternalLocation")
-          internal_locations = InternalLocation.objects.filter(headquarters_key=headquarter.id)
+          #the internal locations under the node of the headquarter, one query over the path index
+          internal_locations = self.under(headquarter)
           if dictionary:
                 return {int_loc.pk: int_loc for int_loc in internal_locations}
           return internal_locations
@@ -122,9 +276,7 @@ class InternalLocationQuerySet(models.QuerySet):
 
 
      def internal_location_if_user_has_perm(self, request, pk):
-               #internal_location = self.get(pk=pk) todavia no esta asociada al modelo
-               InternalLocation = apps.get_model("locations","InternalLocation")
-               internal_location = InternalLocation.objects.filter(pk=pk).first()
+               internal_location = self.filter(pk=pk).first()
                user = request.user
 
                if not internal_location:
@@ -137,11 +289,7 @@ class InternalLocationQuerySet(models.QuerySet):
                if user.is_superuser:
                     return {"hq":internal_location, "exists":True}
                
-               business = internal_location.get_business()
-               permission_required = f"{method_to_action[request.method]}_{InternalLocation._meta.model_name}"
-               Permission = apps.get_model('auth', 'Permission')
-               permission = Permission.objects.get(codename=permission_required)
-               user_has_perm = UserQuerySet().businesses_where_user_has_userpermission(user=user,business=business,perm=permission)
+               user_has_perm = self.visible_to(user, method_to_action[request.method]).filter(pk=pk).exists()
 
                if not user_has_perm:
                     return {"hq":None, "exists":True}
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class PermissionsConfig(AppConfig):
@@ -6,4 +7,7 @@ class PermissionsConfig(AppConfig):
     name = 'permissions'
 
     def ready(self):
-        import permissions.domain.signals
\ No newline at end of file
+        import permissions.domain.signals
+        import permissions.checks
+        from permissions.domain.permission_catalog import clear_permission_catalog
+        post_migrate.connect(clear_permission_catalog, dispatch_uid='clear_permission_catalog')
\ No newline at end of file
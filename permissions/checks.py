@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+#backends whose entries live in the memory of one process
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+@register(Tags.caches)
+def shared_cache_check(app_configs, **kwargs):
+    """
+    The permission, user status and statistics caches are invalidated by
+    writing keys in the default cache. A process-local backend only sees the
+    writes of its own process, so every other worker would keep serving
+    revoked permissions until PERMISSION_CACHE_TIMEOUT. Outside DEBUG the
+    default cache has to be shared by all the workers.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if settings.DEBUG or backend not in PROCESS_LOCAL_CACHE_BACKENDS:
+        return []
+    return [
+        Error(
+            f'The default cache ({backend}) is local to each process, permission invalidations would not reach the other workers.',
+            hint='Set CACHE_BACKEND/CACHE_LOCATION to a backend every worker shares, e.g. '
+                 'django.core.cache.backends.db.DatabaseCache with a table made by createcachetable, or Redis/Memcached.',
+            id='permissions.E001',
+        )
+    ]
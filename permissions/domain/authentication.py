@@ -1,9 +1,24 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
-from django.http.request import HttpHeaders
-from django.middleware.csrf import CsrfViewMiddleware
-from typing import Optional
-import json
+from django.conf import settings
+from django.db import router
+from django.middleware.csrf import REASON_BAD_ORIGIN, CsrfViewMiddleware, RejectRequest
+from django.middleware.csrf import logger as csrf_logger
+from typing import NamedTuple, Optional
+from permissions.domain.user_status_cache import get_user_status
+from permissions.domain.token_cache import validated_tokens
+
+
+#private methods of CsrfViewMiddleware run by CSRFValidator, users/tests/test_csrf_flow.py fails if a Django upgrade drops them
+CSRF_MIDDLEWARE_CHECKS = ('_origin_verified', '_check_referer', '_check_token')
+
+
+class CSRFRejection(NamedTuple):
+    """Why a request failed the CSRF check: code is 'bad_origin', 'bad_referer' or 'bad_token'"""
+    code: str
+    reason: str
 
 
 class CSRFValidator:
@@ -13,42 +28,55 @@ class CSRFValidator:
 
     Because the global CsrfViewMiddleware only enforces on /admin/ paths
     (see appcore/middleware.py), this validator is the sole CSRF enforcer for
-    API views. CsrfViewMiddleware.process_view returns a 403 response (built
-    by CSRF_FAILURE_VIEW) when the token is missing/invalid; anything other
-    than None here means the request was rejected.
+    API views. The checks of CsrfViewMiddleware.process_view (origin, referer
+    on HTTPS, unmasked token against the cookie secret) are run directly, so a
+    rejected request only produces a CSRFRejection instead of rendering the
+    CSRF_FAILURE_VIEW response. The rejection is still logged to
+    django.security.csrf the way CsrfViewMiddleware._reject does.
     """
 
     def __init__(self):
         self.middleware = CsrfViewMiddleware(lambda request: None)
 
-    def validate(self, request):
-        #print("CSRF header:", request.META.get("HTTP_X_CSRFTOKEN"))
-        #print("CSRF cookie:", request.COOKIES.get("csrftoken"))
-        #print("All headers:", dict(request.headers))
-        #print("All cookies:", request.COOKIES)
-        response = self.middleware.process_view(
-            request,
-            lambda request: None,
-            (),
-            {},
-        )
-        if response is not None:
-            # process_view rejected the request (CSRF failure view response).
-            reason = self._extract_reason(response)
-            raise PermissionDenied(reason or "CSRF verification failed.")
+    def check(self, request) -> Optional[CSRFRejection]:
+        """Returns None when the request passes the CSRF check, the rejection otherwise"""
+        rejection = self._rejection(request)
+        if rejection is not None:
+            csrf_logger.warning(
+                "Forbidden (%s): %s", rejection.reason, request.path,
+                extra={"status_code": 403, "request": request},
+            )
+        return rejection
+
+    def _rejection(self, request) -> Optional[CSRFRejection]:
+        if getattr(request, "csrf_processing_done", False):
+            return None
+        if request.method in ("GET", "HEAD", "OPTIONS", "TRACE") or getattr(request, "_dont_enforce_csrf_checks", False):
+            request.csrf_processing_done = True
+            return None
+
+        if "HTTP_ORIGIN" in request.META:
+            if not self.middleware._origin_verified(request):
+                return CSRFRejection("bad_origin", REASON_BAD_ORIGIN % request.META["HTTP_ORIGIN"])
+        elif request.is_secure():
+            try:
+                self.middleware._check_referer(request)
+            except RejectRequest as exc:
+                return CSRFRejection("bad_referer", exc.reason)
 
-    @staticmethod
-    def _extract_reason(response):
-        """
-        Extract the rejection reason embedded in the CSRF failure view
-        response. The custom JSON failure view (appcore.errors.csrf_failure_json)
-        includes it under "details"; fall back gracefully for other views.
-        """
         try:
-            payload = json.loads(response.content)
-            return payload.get("details")
-        except (ValueError, AttributeError):
-            return getattr(response, "reason_phrase", "CSRF verification failed.")
+            # compares the unmasked header (or form) token with the cookie secret in constant time
+            self.middleware._check_token(request)
+        except RejectRequest as exc:
+            return CSRFRejection("bad_token", exc.reason)
+
+        request.csrf_processing_done = True
+        return None
+
+    def validate(self, request):
+        rejection = self.check(request)
+        if rejection is not None:
+            raise PermissionDenied(rejection.reason or "CSRF verification failed.", code=rejection.code)
 
 
 class CookieJWTAuthentication(JWTAuthentication):
@@ -61,13 +89,43 @@ class CookieJWTAuthentication(JWTAuthentication):
         self.csrf_validator = CSRFValidator()
 
     def get_user(self, validated_token):
-        user = super().get_user(validated_token)
+        if getattr(settings, 'JWT_CLAIMS_USER', False) and not api_settings.CHECK_REVOKE_TOKEN:
+            user = self.get_claims_user(validated_token)
+        else:
+            user = super().get_user(validated_token)
         if not user.email_verified:
             raise AuthenticationFailed(
                 "User pending for confirmation."
             )
         return user
 
+    def get_claims_user(self, validated_token):
+        """
+        Builds the user from the token and the cached status flags without
+        reading users_user. The other fields are deferred, the first one read
+        loads the whole row (see User.refresh_from_db).
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+        status = get_user_status(user_id)
+        if status is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not status["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        #from_db expects the values in the order of the model concrete fields
+        field_names = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in status]
+        user = self.user_model.from_db(
+            router.db_for_read(self.user_model),
+            field_names,
+            [status[field_name] for field_name in field_names],
+        )
+        user._load_row_on_access = True
+        return user
+
     def authenticate(self, request):
         # CSRF is only meaningful for requests carrying an authenticated
         # session cookie. Anonymous requests (no access_token cookie) skip
@@ -78,26 +136,23 @@ class CookieJWTAuthentication(JWTAuthentication):
         authentication = super().authenticate(request)
         return authentication
 
-    def cookies_to_dict(self, cookies: str) -> dict:
-        if not cookies:
-            return {}
-
-        fields = cookies.split(";")
-        return {field.split("=")[0].strip(): field.split("=")[1] for field in fields}
+    def get_validated_token(self, raw_token):
+        # Tokens already validated are served from the in-process LRU until
+        # they expire (see permissions/domain/token_cache.py).
+        validated_token = validated_tokens.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            validated_tokens.set(raw_token, validated_token)
+        return validated_token
 
     def get_header(self, request):
-        return request.headers
+        # Django already parsed the Cookie header into request.COOKIES
+        return request.COOKIES
 
-    def get_raw_token(self, header: HttpHeaders) -> Optional[bytes]:
+    def get_raw_token(self, cookies: dict) -> Optional[bytes]:
         # Read the access token from the "access_token" cookie
-
-        cookies = header.get("Cookie")
-        if not cookies:
-            return None
-
-        cookies = self.cookies_to_dict(cookies=cookies)
-        if "access_token" not in cookies:
+        access_token = cookies.get("access_token")
+        if not access_token:
             return None
 
-        access_token = cookies["access_token"]
-        return access_token.encode("utf-8")
\ No newline at end of file
+        return access_token.encode("utf-8")
@@ -1,10 +1,10 @@
 from django.contrib.auth.backends import BaseBackend, ModelBackend
-from django.contrib.auth.models import Permission
 from locations.domain.models import Business
-from django.db.models import ForeignKey, OneToOneField
-from django.core.exceptions import ObjectDoesNotExist
-from permissions.domain.models import UserBusinessPermission, BusinessMembership
+from appcore.business_paths import resolve_business_id, resolve_business_ids, get_business_lookup
+from django.db.models import QuerySet
+from permissions.domain.models import UserBusinessPermission
 from django.contrib.auth.models import Group
+from users.domain.models import User
 
 
 
@@ -26,71 +26,10 @@ class BusinessPermissionBackend(ModelBackend):
             return []
 
 
-    def _get_business_from_obj(self, obj, visited=None):
+    def _get_business_id_from_obj(self, obj):
+        # la ruta de llaves foráneas hasta Business se precalcula al iniciar (appcore/business_paths.py)
+        return resolve_business_id(obj)
 
-        if visited is None:
-            visited = set()
-        if obj is None or obj in visited:
-            return None
-        visited.add(obj)
-        if isinstance(obj, Business):
-            return obj
-        
-        fields = obj._meta.get_fields()
-        business = None
-
-        for field in fields:
-            if isinstance(field, (ForeignKey, OneToOneField)):
-                try:
-                    related_obj = getattr(obj, field.name)
-                except ObjectDoesNotExist:
-                    continue
-
-                if related_obj is None:
-                    continue
-
-                business = self._get_business_from_obj(related_obj)
-                if business:
-                    return business
-        return None
-
-
-
-    def _get_group_business_permission(self, user, business, codename):
-        try:
-            user_g_b_perms = BusinessMembership.objects.filter(
-                business_key=business,
-                user_key=user)
-            
-            if not user_g_b_perms:
-                return None
-            
-            for user_g_b_perm in user_g_b_perms:
-                permission = Permission.objects.get(codename=codename)
-                if permission.codename == codename:
-                    return user_g_b_perm
-            
-            return None
-
-        except:
-            return None
-
-    def _get_user_business_permission(self, user, business, codename):
-        try:
-            user_b_perms = UserBusinessPermission.objects.filter(
-                business_key=business,
-                user_key=user)
-            
-            if not user_b_perms:
-                return None
-            
-            for user_b_perm in user_b_perms:
-                permission = Permission.objects.get(codename=codename)
-                if permission.codename == codename:
-                    return user_b_perm
-            
-        except:
-            return None
 
 
     #verifica si el usuario tiene permiso de empresa sobr el objeto
@@ -105,26 +44,44 @@ class BusinessPermissionBackend(ModelBackend):
         if not getattr(user_obj, "is_active", False):
             return False
 
-        business = self._get_business_from_obj(obj)
-        # opcional: permitir permisos globales si company es None y existe CompanyPermission con company=None
-        # extra: soportar perm como 'app_label.codename' o 'codename'
+        business_id = self._get_business_id_from_obj(obj)
+        if not business_id:
+            return False
+
+        # soporta perm como 'app_label.codename' o 'codename'
         codename = perm.split(".")[-1]
 
-        print("Checking permission:", codename, "for user:", user_obj.username, "on business:", obj)
-        
-        # 3) permisos directos de usuario para esa empresa
-        if business:
-            # 4) permisos por grupo: obtener grupos del usuario
-            group_b_perm = self._get_group_business_permission(user=user_obj, business=business, codename=codename)
-            # 5) permisos directos de usuario para esa empresa
-            user_b_perm = self._get_user_business_permission(user=user_obj, business=business, codename=codename)
+        # los permisos de rol y de usuario ya estan compilados en el bitset de la membresia
+        permissions = User.objects.get_effective_permissions(user_obj, business_id)
+        return codename in permissions
+
 
 
-            if group_b_perm:
-                return True
-            if user_b_perm:
-                return True
+    #filtra en lote los objetos sobre los que el usuario tiene el permiso de empresa
+    def filter_permitted(self, user_obj, perm, objs):
+        """
+        Retorna el subconjunto de objs sobre el que user_obj tiene perm
+        - objs puede ser un QuerySet: retorna el QuerySet filtrado por los negocios permitidos (una sola consulta al evaluarlo)
+        - o una lista de objetos: retorna la lista filtrada, resolviendo los negocios con una consulta por modelo como máximo
+        """
+        is_queryset = isinstance(objs, QuerySet)
 
-        
+        if user_obj is None or not getattr(user_obj, "is_active", False):
+            return objs.none() if is_queryset else []
 
-        return False
\ No newline at end of file
+        if getattr(user_obj, "is_superuser", False):
+            return objs if is_queryset else list(objs)
+
+        codename = perm.split(".")[-1]
+        business_ids = User.objects.get_permitted_business_ids(user_obj.id, codename)
+
+        if is_queryset:
+            lookup = get_business_lookup(objs.model)
+            if lookup is None or not business_ids:
+                return objs.none()
+            return objs.filter(**{f"{lookup}__in": business_ids})
+
+        objs = list(objs)
+        if not business_ids:
+            return []
+        return [obj for obj, business_id in zip(objs, resolve_business_ids(objs)) if business_id in business_ids]
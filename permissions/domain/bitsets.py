@@ -0,0 +1,36 @@
+"""
+Permission bitsets.
+
+auth_permission is small and almost static, so a set of permissions is kept as
+an integer where bit N is on when the Permission with id N is held. Roles store
+the bitset of their permissions and memberships the effective one (role plus
+UserBusinessPermission overrides), both as hexadecimal text, see
+BusinessRole.permission_bits and BusinessMembership.effective_permission_bits.
+"""
+
+from permissions.domain.permission_catalog import get_permission_catalog
+
+
+def bits_from_ids(permission_ids) -> int:
+    bits = 0
+    for permission_id in permission_ids:
+        bits |= 1 << permission_id
+    return bits
+
+
+def encode_bits(bits: int) -> str:
+    return format(bits, 'x')
+
+
+def decode_bits(value: str) -> int:
+    return int(value, 16) if value else 0
+
+
+class PermissionBitset(int):
+    """Integer bitset answering `codename in bitset` (or a permission id) with a single bit test"""
+
+    def __contains__(self, permission) -> bool:
+        permission_id = permission if isinstance(permission, int) else get_permission_catalog().id_for(permission)
+        if permission_id is None:
+            return False
+        return bool(self >> permission_id & 1)
@@ -4,6 +4,7 @@ from django.core.validators import MaxValueValidator, MinValueValidator
 from appcore.models import BaseModel
 from locations.domain.models import Business
 from django.contrib.auth.models import Permission
+from permissions.domain.bitsets import bits_from_ids, encode_bits, decode_bits
   
   
 
@@ -23,12 +24,20 @@ class BusinessRole(models.Model):
     permissions = models.ManyToManyField(Permission)
     is_system = models.BooleanField(default=False) #pinpoint critical roles (system_role)
     level = models.IntegerField(default=1,validators=[MaxValueValidator(100), MinValueValidator(1)])
+    #hexadecimal bitset of the permission ids, recompiled when the permissions change (see permissions/domain/bitsets.py)
+    permission_bits = models.TextField(default='0', editable=False)
     
     class Meta:
       constraints = [
         models.UniqueConstraint(fields=['name','business'],name='unique_role_name'),
         models.UniqueConstraint(fields=['business', 'level'],name='unique_business_level')
       ]
+      
+    def compile_permission_bits(self):
+      """Recompiles the role bitset and the effective bitset of every membership holding the role"""
+      self.permission_bits = encode_bits(bits_from_ids(self.permissions.values_list('id', flat=True)))
+      BusinessRole.objects.filter(pk=self.pk).update(permission_bits=self.permission_bits)
+      BusinessMembership.compile_permission_bits_for(BusinessMembership.objects.filter(role=self))
 
 
 
@@ -42,6 +51,8 @@ class BusinessMembership(models.Model):
 
     is_active = models.BooleanField(default=True)
     joined_at = models.DateTimeField(auto_now_add=True)
+    #hexadecimal bitset of the role permissions with the UserBusinessPermission overrides applied
+    effective_permission_bits = models.TextField(default='0', editable=False)
 
     class Meta:
         unique_together = ("user", "business")
@@ -66,6 +77,28 @@ class BusinessMembership(models.Model):
     def activate(self, *args, **kwargs):
       self.is_active = True
       self.save(update_fields=['is_active'])
+      
+    @staticmethod
+    def compile_permission_bits_for(memberships):
+      """Recompiles the effective bitset of the memberships: role bits plus allowed overrides minus denied ones"""
+      memberships = list(memberships.select_related('role').only('id', 'role', 'role__permission_bits'))
+      if not memberships:
+        return
+      
+      overrides = UserBusinessPermission.objects.filter(
+        membership__in=[membership.id for membership in memberships]
+      ).values_list('membership_id', 'permission_id', 'allowed')
+      
+      allowed, denied = {}, {}
+      for membership_id, permission_id, is_allowed in overrides:
+        target = allowed if is_allowed else denied
+        target[membership_id] = target.get(membership_id, 0) | (1 << permission_id)
+      
+      for membership in memberships:
+        bits = decode_bits(membership.role.permission_bits) | allowed.get(membership.id, 0)
+        membership.effective_permission_bits = encode_bits(bits & ~denied.get(membership.id, 0))
+      
+      BusinessMembership.objects.bulk_update(memberships, ['effective_permission_bits'], batch_size=500)
         
 
 #Clas to manage the bussinesses the user can access
@@ -0,0 +1,99 @@
+"""
+Cross-request cache of the effective permissions of each BusinessMembership.
+
+Every membership, identified by its (user, business) pair, owns a version key.
+The resolved permissions are stored under a key that embeds that version, so
+invalidating a membership only means writing a new version: the previous entry
+is never read again and expires on its own (PERMISSION_CACHE_TIMEOUT).
+
+Versions are nanosecond timestamps instead of counters, so a version key that
+is evicted and created again never collides with an entry written before the
+eviction.
+
+Every user also owns a permission version, bumped together with the versions
+of its memberships. It is embedded in the access token next to the permission
+claims (see permissions/domain/permission_claims.py) so a token issued before a
+change is detected with a single cache read.
+
+The receivers in permissions/domain/signals.py bump the versions whenever role
+permissions, overrides, memberships or roles change.
+"""
+
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+PERMISSION_CACHE_TIMEOUT = getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 60 * 60)
+
+
+def _version_key(user_id, business_id) -> str:
+    return f"permissions:membership:{user_id}:{business_id}:version"
+
+
+def _permissions_key(user_id, business_id, version) -> str:
+    return f"permissions:membership:{user_id}:{business_id}:v{version}"
+
+
+def _user_version_key(user_id) -> str:
+    return f"permissions:user:{user_id}:version"
+
+
+def _get_or_create_version(key) -> int | None:
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_membership_version(user_id, business_id) -> int | None:
+    """Returns the current version of the membership, creating one if there is none, None when the cache keeps none"""
+    return _get_or_create_version(_version_key(user_id, business_id))
+
+
+def get_user_permission_version(user_id) -> int | None:
+    """Returns the current permission version of the user, creating one if there is none, None when the cache keeps none"""
+    return _get_or_create_version(_user_version_key(user_id))
+
+
+def get_cached_membership_permissions(user_id, business_id, resolver):
+    """
+    Returns the cached permissions of the membership, calling resolver() and
+    storing its result when the current version has no entry yet.
+    Without a version nothing is cached, an entry could not be invalidated.
+    """
+    version = get_membership_version(user_id, business_id)
+    if version is None:
+        return resolver()
+    key = _permissions_key(user_id, business_id, version)
+
+    permissions = cache.get(key)
+    if permissions is None:
+        permissions = resolver()
+        cache.set(key, permissions, timeout=PERMISSION_CACHE_TIMEOUT)
+    return permissions
+
+
+def invalidate_memberships(pairs) -> None:
+    """
+    Bumps the version of every (user_id, business_id) pair and the permission
+    version of their users.
+
+    The bump runs right away and again after the surrounding transaction
+    commits: a request that read the database before the commit could have
+    cached the old permissions under the version written by the first bump.
+    """
+    pairs = {(str(user_id), str(business_id)) for user_id, business_id in pairs}
+    if not pairs:
+        return
+
+    def bump():
+        version = time.time_ns()
+        versions = {_version_key(user_id, business_id): version for user_id, business_id in pairs}
+        versions.update({_user_version_key(user_id): version for user_id, _ in pairs})
+        cache.set_many(versions, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
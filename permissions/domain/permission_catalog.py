@@ -0,0 +1,72 @@
+"""
+In-process catalog of the auth Permission rows.
+
+auth_permission only changes when migrations run, so the rows are loaded once
+per process into read-only mappings indexed by id, codename and
+(app_label, codename). The entries are CatalogPermission tuples read with
+values_list, not Permission instances: they cannot be mutated by a caller and
+hold only the columns the lookups need. PermissionsConfig.ready() connects
+clear_permission_catalog to post_migrate, the next lookup loads the catalog
+again with the permissions the migration created.
+
+Codenames are unique in practice ('view_headquarters', 'add_user'...), when two
+content types share one the lowest id wins the plain codename lookup and the
+(app_label, codename) lookup disambiguates.
+"""
+
+from types import MappingProxyType
+from typing import NamedTuple
+from django.apps import apps
+
+
+class CatalogPermission(NamedTuple):
+    id: int
+    codename: str
+    app_label: str
+    content_type_id: int
+
+
+class PermissionCatalog:
+    __slots__ = ('by_id', 'by_codename', 'by_natural_key')
+
+    def __init__(self, permissions):
+        by_id, by_codename, by_natural_key = {}, {}, {}
+        for permission in permissions:
+            by_id[permission.id] = permission
+            by_codename.setdefault(permission.codename, permission)
+            by_natural_key[(permission.app_label, permission.codename)] = permission
+
+        self.by_id = MappingProxyType(by_id)
+        self.by_codename = MappingProxyType(by_codename)
+        self.by_natural_key = MappingProxyType(by_natural_key)
+
+    def get(self, codename, app_label=None):
+        """Returns the CatalogPermission with the codename (scoped to app_label when given) or None"""
+        if app_label is not None:
+            return self.by_natural_key.get((app_label, codename))
+        return self.by_codename.get(codename)
+
+    def get_by_id(self, permission_id):
+        return self.by_id.get(permission_id)
+
+    def id_for(self, codename, app_label=None) -> int | None:
+        permission = self.get(codename, app_label=app_label)
+        return permission.id if permission else None
+
+
+_catalog: PermissionCatalog | None = None
+
+
+def get_permission_catalog() -> PermissionCatalog:
+    global _catalog
+    if _catalog is None:
+        Permission = apps.get_model('auth', 'Permission')
+        rows = Permission.objects.order_by('id').values_list('id', 'codename', 'content_type__app_label', 'content_type_id')
+        _catalog = PermissionCatalog(CatalogPermission._make(row) for row in rows)
+    return _catalog
+
+
+def clear_permission_catalog(**kwargs) -> None:
+    """Drops the loaded catalog, used as post_migrate receiver"""
+    global _catalog
+    _catalog = None
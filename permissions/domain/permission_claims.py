@@ -0,0 +1,58 @@
+"""
+Permission claims embedded in the JWT.
+
+At login the token receives
+
+    bperms: {business_id: hexadecimal effective bitset of the active membership}
+    pv:     permission version of the user (see permission_cache.py)
+
+and the refreshed access tokens inherit them. While the version in the token is
+still the current one, the permissions of the request are read from the token
+instead of the cache or the database. Any change of memberships, roles or
+overrides bumps the version, so older tokens fall back to the regular
+resolution; access tokens live ACCESS_TOKEN_LIFETIME, which bounds how long a
+token keeps its claims.
+
+A version is only a proof while the cache keeps it. When there is none (a
+DummyCache, an evicted key) the token gets no claims, and a token whose
+version or the current one is missing is never trusted.
+"""
+
+from django.apps import apps
+from rest_framework_simplejwt.settings import api_settings
+from permissions.domain.bitsets import PermissionBitset, decode_bits
+from permissions.domain.permission_cache import get_user_permission_version
+
+
+PERMISSIONS_CLAIM = 'bperms'
+PERMISSION_VERSION_CLAIM = 'pv'
+
+
+def add_permission_claims(token, user):
+    """Adds the permission digest and version of the user to the token"""
+    #the version is read before the memberships, a change committed in between
+    #bumps it again and the token is discarded on its first use
+    version = get_user_permission_version(user.pk)
+    if version is None:
+        return token
+    BusinessMembership = apps.get_model('permissions', 'BusinessMembership')
+    memberships = BusinessMembership.objects.filter(
+        user_id=user.pk, is_active=True
+    ).values_list('business_id', 'effective_permission_bits')
+
+    token[PERMISSIONS_CLAIM] = {str(business_id): bits for business_id, bits in memberships}
+    token[PERMISSION_VERSION_CLAIM] = version
+    return token
+
+
+def get_claimed_permissions(token, user_id, business_id) -> PermissionBitset | None:
+    """Returns the permissions the token grants in the business, None when the token cannot be trusted for it"""
+    if token is None or PERMISSION_VERSION_CLAIM not in token or PERMISSIONS_CLAIM not in token:
+        return None
+    if str(token.get(api_settings.USER_ID_CLAIM)) != str(user_id):
+        return None
+    version = token[PERMISSION_VERSION_CLAIM]
+    if version is None or version != get_user_permission_version(user_id):
+        return None
+
+    return PermissionBitset(decode_bits(token[PERMISSIONS_CLAIM].get(str(business_id))))
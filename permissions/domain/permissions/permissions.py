@@ -21,17 +21,19 @@ method_to_action = {
 }
 
 
-def user_has_level_over_user(valutated_user: User, consulted_user: User) -> bool:
-    try:
-      v_user_mship = BusinessMembership.objects.get(id=valutated_user.id)
-      c_user_mrship = BusinessMembership.objects.get(id=consulted_user.id)
-    except User.DoesNotExist: 
-      return False
+def user_has_level_over_user(valutated_user: User, consulted_user: User, business_id) -> bool:
+    """Returns if the valutated user role in the business is over the consulted user role, both levels are read in one query"""
+    levels = dict(
+      BusinessMembership.objects.filter(
+        business_id=business_id,
+        user_id__in=[valutated_user.id, consulted_user.id],
+      ).values_list('user_id', 'role__level')
+    )
     
-    if v_user_mship.role.level > c_user_mrship.role.level:
-      return True
+    if valutated_user.id not in levels or consulted_user.id not in levels:
+      return False
     
-    return False
+    return levels[valutated_user.id] > levels[consulted_user.id]
     
     
 def user_is_anonymous_or_empty(user):
@@ -60,7 +62,7 @@ class permissionToInviteUsers(DjangoModelPermissions):
         
         permission_codename = 'add_user'
         
-        user_has_perm = User.objects.user_has_clearance(user.id,business_id,permission_codename)
+        user_has_perm = User.objects.user_has_clearance(user.id,business_id,permission_codename,request=request)
         try:
           user_membership = BusinessMembership.objects.get(user=user.id)
         except BusinessMembership.DoesNotExist:
@@ -112,11 +114,11 @@ class permissionsToCheckUser(DjangoModelPermissions):
         if not permission_codename:
           return False
         
-        user_has_perm = User.objects.user_has_clearance(user.id,business_id,permission_codename)
+        user_has_perm = User.objects.user_has_clearance(user.id,business_id,permission_codename,request=request)
         if not user_has_perm:
           return False
         
-        user_has_level = user_has_level_over_user(user, consulted_user)
+        user_has_level = user_has_level_over_user(user, consulted_user, business_id)
         if not user_has_level and request.method != 'GET':
           return False
         
@@ -151,7 +153,7 @@ class permissionsToCheckUsers(DjangoModelPermissions):
         if not permission_codename:
           return False
         
-        user_has_perm = User.objects.user_has_clearance(user.id,business_id,permission_codename)
+        user_has_perm = User.objects.user_has_clearance(user.id,business_id,permission_codename,request=request)
         if not user_has_perm:
           return False
         
@@ -185,7 +187,7 @@ class permissionToCheckModel(DjangoModelPermissions):
           return False
         
         permission_codename = get_permission_codename(view,request)
-        user_clearance = User.objects.user_has_clearance(user.id,business_id,permission_codename)
+        user_clearance = User.objects.user_has_clearance(user.id,business_id,permission_codename,request=request)
         
         if not user_clearance:
           return False
@@ -1,8 +1,11 @@
-from django.db.models.signals import m2m_changed, post_save
+from django.db.models.signals import m2m_changed, post_init, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import Group
 from django.core.exceptions import ValidationError
 from users.domain.models import User
+from permissions.domain.models import BusinessRole, BusinessMembership, UserBusinessPermission
+from permissions.domain.permission_cache import invalidate_memberships
+from permissions.domain.user_status_cache import invalidate_user_status
 
 
 @receiver(m2m_changed, sender=Group.permissions.through)
@@ -13,4 +16,81 @@ def block_forbidden_permissions(sender, instance, action, pk_set, **kwargs):
 
 @receiver(post_save, sender=User)
 def user_default_profile(sender, instance, created, **kwargs):
-    pass
\ No newline at end of file
+    pass
+
+
+
+def invalidate_role_memberships(role_ids):
+    """Invalidates the cached permissions of every membership holding one of the roles"""
+    memberships = BusinessMembership.objects.filter(role_id__in=role_ids).values_list('user_id', 'business_id')
+    invalidate_memberships(memberships)
+
+
+def compile_roles(role_ids):
+    """Recompiles the permission bitsets of the roles and their memberships, then invalidates the cache"""
+    for role in BusinessRole.objects.filter(pk__in=role_ids):
+        role.compile_permission_bits()
+    invalidate_role_memberships(role_ids)
+
+
+@receiver(m2m_changed, sender=BusinessRole.permissions.through)
+def role_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            compile_roles([instance.pk])
+        return
+
+    #reverse side: the instance is a Permission and pk_set holds role ids,
+    #on clear pk_set is empty so the roles are read before they are removed
+    if action == 'pre_clear':
+        instance._cleared_role_ids = list(instance.businessrole_set.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        compile_roles(getattr(instance, '_cleared_role_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        compile_roles(pk_set)
+
+
+@receiver(post_save, sender=BusinessRole)
+@receiver(post_delete, sender=BusinessRole)
+def business_role_changed(sender, instance, **kwargs):
+    invalidate_role_memberships([instance.pk])
+
+
+def _membership_pair(instance):
+    #read from __dict__, a deferred field must not trigger a query while the instance is built
+    return instance.__dict__.get('user_id'), instance.__dict__.get('business_id')
+
+
+@receiver(post_init, sender=BusinessMembership)
+def remember_membership_pair(sender, instance, **kwargs):
+    """Keeps the (user, business) pair the membership was loaded with, the cached grants live under it"""
+    instance._loaded_membership_pair = _membership_pair(instance)
+
+
+@receiver(post_save, sender=BusinessMembership)
+def business_membership_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'role' in update_fields:
+        BusinessMembership.compile_permission_bits_for(BusinessMembership.objects.filter(pk=instance.pk))
+    #a membership moved to another user or business also drops the grants of its previous pair
+    pairs = {(instance.user_id, instance.business_id), getattr(instance, '_loaded_membership_pair', (None, None))}
+    invalidate_memberships([pair for pair in pairs if None not in pair])
+    instance._loaded_membership_pair = _membership_pair(instance)
+
+
+@receiver(post_delete, sender=BusinessMembership)
+def business_membership_deleted(sender, instance, **kwargs):
+    invalidate_memberships([(instance.user_id, instance.business_id)])
+
+
+@receiver(post_save, sender=UserBusinessPermission)
+@receiver(post_delete, sender=UserBusinessPermission)
+def user_business_permission_changed(sender, instance, **kwargs):
+    memberships = BusinessMembership.objects.filter(pk=instance.membership_id)
+    BusinessMembership.compile_permission_bits_for(memberships)
+    invalidate_memberships(memberships.values_list('user_id', 'business_id'))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_status_changed(sender, instance, **kwargs):
+    invalidate_user_status(instance.pk)
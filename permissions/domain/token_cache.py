@@ -0,0 +1,74 @@
+"""
+In-process LRU of the access tokens already validated by CookieJWTAuthentication.
+
+Verifying a token means checking the HS256 signature and every claim, the
+result only depends on the raw token and the clock, so a validated token is
+kept until its `exp` and the next requests carrying the same cookie reuse it.
+Entries are keyed by the sha256 of the raw token (the token itself is never
+kept as key), the cache holds at most VALIDATED_TOKEN_CACHE_SIZE tokens and
+evicts the least recently used one. Access tokens are not blacklisted by
+rest_framework_simplejwt, so a cached token is valid for as long as the
+token itself.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from django.conf import settings
+
+
+class ValidatedTokenCache:
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(raw_token) -> str:
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode('utf-8')
+        return hashlib.sha256(raw_token).hexdigest()
+
+    def get(self, raw_token):
+        """Returns the validated token or None when it is not cached or already expired"""
+        key = self._key(raw_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, raw_token, validated_token) -> None:
+        expires_at = validated_token.get('exp')
+        if self.maxsize <= 0 or expires_at is None:
+            return
+        key = self._key(raw_token)
+        with self._lock:
+            self._entries[key] = (expires_at, validated_token)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+validated_tokens = ValidatedTokenCache(maxsize=getattr(settings, 'VALIDATED_TOKEN_CACHE_SIZE', 1024))
@@ -0,0 +1,44 @@
+"""
+Short lived cache of the user status flags read by CookieJWTAuthentication.
+
+With JWT_CLAIMS_USER enabled the authenticated user is built from the token
+and these flags instead of the users_user row (see
+CookieJWTAuthentication.get_user). The entries live USER_STATUS_CACHE_TIMEOUT
+seconds and the User receivers in permissions/domain/signals.py drop them on
+every save, which covers deactivate()/activate() and the email verification.
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+USER_STATUS_CACHE_TIMEOUT = getattr(settings, 'USER_STATUS_CACHE_TIMEOUT', 60)
+
+USER_STATUS_FIELDS = ('id', 'email_verified', 'is_active', 'is_superuser', 'is_staff')
+
+#cached for users that do not exist, so unknown ids do not query on every request
+_MISSING = 'missing'
+
+
+def _status_key(user_id) -> str:
+    return f"users:status:{user_id}"
+
+
+def get_user_status(user_id) -> dict | None:
+    """Returns the status flags of the user keyed by field name, None when the user does not exist"""
+    key = _status_key(user_id)
+    status = cache.get(key)
+    if status is None:
+        User = apps.get_model('users', 'User')
+        status = User.objects.filter(pk=user_id).values(*USER_STATUS_FIELDS).first() or _MISSING
+        cache.set(key, status, timeout=USER_STATUS_CACHE_TIMEOUT)
+    return None if status == _MISSING else status
+
+
+def invalidate_user_status(user_id) -> None:
+    """Drops the cached flags, again after commit so a concurrent read cannot keep the old row"""
+    key = _status_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:13
+
+from django.db import migrations, models
+
+
+def compile_permission_bits(apps, schema_editor):
+    BusinessRole = apps.get_model('permissions', 'BusinessRole')
+    BusinessMembership = apps.get_model('permissions', 'BusinessMembership')
+    UserBusinessPermission = apps.get_model('permissions', 'UserBusinessPermission')
+
+    role_bits = {}
+    for role in BusinessRole.objects.prefetch_related('permissions'):
+        bits = 0
+        for permission in role.permissions.all():
+            bits |= 1 << permission.id
+        role_bits[role.id] = bits
+        role.permission_bits = format(bits, 'x')
+        role.save(update_fields=['permission_bits'])
+
+    allowed, denied = {}, {}
+    for membership_id, permission_id, is_allowed in UserBusinessPermission.objects.values_list('membership_id', 'permission_id', 'allowed'):
+        target = allowed if is_allowed else denied
+        target[membership_id] = target.get(membership_id, 0) | (1 << permission_id)
+
+    memberships = list(BusinessMembership.objects.only('id', 'role_id'))
+    for membership in memberships:
+        bits = role_bits.get(membership.role_id, 0) | allowed.get(membership.id, 0)
+        membership.effective_permission_bits = format(bits & ~denied.get(membership.id, 0), 'x')
+    BusinessMembership.objects.bulk_update(memberships, ['effective_permission_bits'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('permissions', '0017_alter_userbusinesspermission_membership'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='businessmembership',
+            name='effective_permission_bits',
+            field=models.TextField(default='0', editable=False),
+        ),
+        migrations.AddField(
+            model_name='businessrole',
+            name='permission_bits',
+            field=models.TextField(default='0', editable=False),
+        ),
+        migrations.RunPython(compile_permission_bits, migrations.RunPython.noop),
+    ]
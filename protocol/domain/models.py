@@ -1,10 +1,12 @@
 from django.db import models
-from appcore.models import BaseModel
+from appcore.models import BusinessOwnedModel
 from assets.domain.models import *
 # Create your models here.
 
 
-class maintenanceRoutine(BaseModel):
+class maintenanceRoutine(BusinessOwnedModel):
+    business_parent = 'asset_key'
+
     asset_key = models.ForeignKey(Asset, on_delete=models.CASCADE)
     description = models.CharField(max_length=255)
 
@@ -16,7 +18,9 @@ class maintenanceRoutine(BaseModel):
 
 
 
-class routineStep(BaseModel):
+class routineStep(BusinessOwnedModel):
+    business_parent = 'routine_key'
+
     routine_key = models.ForeignKey(maintenanceRoutine, on_delete=models.CASCADE)
     description = models.CharField(max_length=255)
 
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.10 on 2026-10-18 11:45
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+from django.db.models import Max, OuterRef, Subquery
+
+
+#frozen copy of the backfill, later changes of the app code must not change this migration
+BATCH_SIZE = 5000
+
+
+def backfill_business_column(model, parent_model, parent_field, parent_business_field):
+    """Fills model.business from its parent in pk ranges of BATCH_SIZE, one UPDATE and one transaction per range"""
+    business = Subquery(parent_model.objects.filter(pk=OuterRef(parent_field)).values(parent_business_field)[:1])
+    last_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    for start in range(0, last_pk, BATCH_SIZE):
+        with transaction.atomic():
+            model.objects.filter(pk__gt=start, pk__lte=start + BATCH_SIZE).update(business_id=business)
+
+
+def fill_protocol_business(apps, schema_editor):
+    backfill_business_column(
+        apps.get_model('protocol', 'maintenanceRoutine'), apps.get_model('assets', 'Asset'), 'asset_key', 'business',
+    )
+    backfill_business_column(
+        apps.get_model('protocol', 'routineStep'), apps.get_model('protocol', 'maintenanceRoutine'), 'routine_key', 'business',
+    )
+
+
+class Migration(migrations.Migration):
+    #the backfill commits every batch on its own
+    atomic = False
+
+    dependencies = [
+        ('locations', '0008_internallocation_business'),
+        ('assets', '0005_asset_business'),
+        ('protocol', '0002_alter_maintenanceroutine_asset_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenanceroutine',
+            name='business',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.business'),
+        ),
+        migrations.AddField(
+            model_name='routinestep',
+            name='business',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='locations.business'),
+        ),
+        migrations.RunPython(fill_protocol_business, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,12 @@
 
+from __future__ import annotations
 from django.contrib.auth.models import AbstractUser, BaseUserManager, Permission
 from users.querysets import UserQuerySet
 from simple_history.models import HistoricalRecords
 from users.querysets import UserQuerySet
+from permissions.domain.permission_cache import get_cached_membership_permissions
+from permissions.domain.bitsets import PermissionBitset
+from permissions.domain.permission_claims import get_claimed_permissions
 from django.db import models, transaction
 from django.apps import apps
 from django.utils import timezone
@@ -19,28 +23,43 @@ def get_business_membership_model():
 class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
 
     #only high level logic, direct queries to database should use the UserQuerySet in get_queryset()    
-    def user_has_clearance(self, user: User,business_id: str,permission_codename: str) -> bool:
-      """this function returns if the user has a permission in a business"""
+    def user_has_clearance(self, user: User | int, business_id: str, permission_codename: str, request=None) -> bool:
+      """this function returns if the user has a permission in a business
       
-      #first we look for user membership
-      user_membership = User.objects.get_user_membership(user, business_id)
-      permission = Permission.objects.filter(codename=permission_codename).first()
-      
-      if not user_membership or not permission:
-        return False
-      
-      #then with the user membership we can check the grouppermission and if neccesary personal permissions
-      user_group_permission:bool = User.objects.has_grouppermission(user,permission.id)
-      
-      if user_group_permission:
-        return True
+      when the request is given the effective permissions are resolved once and reused by
+      every later check made while serving that request"""
+      return permission_codename in self.get_effective_permissions(user, business_id, request=request)
+
+    def get_effective_permissions(self, user: User | int, business_id: str, request=None) -> PermissionBitset:
+      """Returns the permissions the user holds in the business, `codename in permissions` is a bit test
       
-      user_business_permission = User.objects.has_userbusinesspermission(user_membership, permission_codename)
+      the set is read from the shared membership cache (see permissions/domain/permission_cache.py)
+      and memoized on the request when given, requests authenticated with a token holding
+      current permission claims are served from the token (see permissions/domain/permission_claims.py)"""
+      user_id = getattr(user, 'id', user)
+      if request is None:
+        return self._get_cached_permissions(user_id, business_id)
       
-      if user_business_permission:
-        return user_business_permission.allowed
+      #DRF requests wrap the django HttpRequest, the memo lives in the inner one so both share it
+      http_request = getattr(request, '_request', request)
+      resolved = getattr(http_request, '_effective_permissions', None)
+      if resolved is None:
+        resolved = http_request._effective_permissions = {}
       
-      return False
+      key = (str(user_id), str(business_id))
+      if key not in resolved:
+        permissions = get_claimed_permissions(getattr(request, 'auth', None), user_id, business_id)
+        if permissions is None:
+          permissions = self._get_cached_permissions(user_id, business_id)
+        resolved[key] = permissions
+      return resolved[key]
+
+    def _get_cached_permissions(self, user_id, business_id) -> PermissionBitset:
+      return get_cached_membership_permissions(
+        user_id,
+        business_id,
+        resolver=lambda: self.get_queryset().resolve_effective_permissions(user_id, business_id),
+      )
 
     #api
     def get_business_users(self, business_id: str) -> models.QuerySet[User]:
@@ -117,6 +136,13 @@ class User(AbstractUser):
     
     def get_plural(self):
         return 'users'
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+      #users built from the token claims (see CookieJWTAuthentication.get_user) only hold the
+      #status flags, the first deferred field read loads the rest of the row in the same query
+      if fields is not None and self.__dict__.pop('_load_row_on_access', False):
+        fields = set(fields) | self.get_deferred_fields()
+      return super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
       
     def deactivate(self):
       self.deleted_at = timezone.now()
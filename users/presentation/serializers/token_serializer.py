@@ -1,6 +1,7 @@
 from rest_framework_simplejwt.serializers import TokenBlacklistSerializer as BaseTokenBlacklistSerializer, TokenObtainPairSerializer
 from rest_framework import serializers
 from rest_framework_simplejwt.tokens import RefreshToken
+from permissions.domain.permission_claims import add_permission_claims
 
 
 class TokenBlacklistSerializer(BaseTokenBlacklistSerializer):
@@ -42,7 +43,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """Overrides TokenObtainPairSerializer to include extra verification for user when login"""
     @classmethod
     def get_token(cls, user):
-        return super().get_token(user)
+        token = super().get_token(user)
+        return add_permission_claims(token, user)
 
     def validate(self, attrs):
         data = super().validate(attrs)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from users.domain.models import User
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from permissions.domain.permission_claims import add_permission_claims
 from permissions.domain.service.business_membership_service import *
 from permissions.domain.service.user_bpermission_service import *
 from users.presentation.serializers.validators.validators import *
@@ -142,7 +143,7 @@ class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
 
         # Add custom claims
         token['id'] = user.id
-        # ...
+        add_permission_claims(token, user)
 
         return token
 
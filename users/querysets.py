@@ -1,5 +1,8 @@
+from __future__ import annotations
 from django.db import models
 from django.apps import apps
+from permissions.domain.bitsets import PermissionBitset, decode_bits
+from permissions.domain.permission_catalog import get_permission_catalog
 
 
 method_to_action = {
@@ -88,6 +91,33 @@ class UserQuerySet(models.QuerySet):
        return user_permission
      
      
+    def resolve_effective_permissions(self, user_id, business_id) -> PermissionBitset:
+      """Returns the effective permissions the user holds in a business as a bitset, in a single query.
+      
+      The bitset is precompiled on the membership (role permissions plus the allowed
+      UserBusinessPermission overrides, minus the denied ones) so the query reads one row
+      without joins. Inactive memberships resolve to an empty bitset."""
+      BusinessMembership = get_businessmembership()
+      bits = BusinessMembership.objects.filter(
+        user_id=user_id, business_id=business_id, is_active=True
+      ).values_list('effective_permission_bits', flat=True).first()
+      
+      return PermissionBitset(decode_bits(bits))
+    
+    
+    def get_permitted_business_ids(self, user_id, permission_codename) -> set:
+      """Returns the ids of the businesses where the user holds the permission, in one query over the membership bitsets"""
+      BusinessMembership = get_businessmembership()
+      memberships = BusinessMembership.objects.filter(
+        user_id=user_id, is_active=True
+      ).values_list('business_id', 'effective_permission_bits')
+      
+      return {
+        business_id for business_id, bits in memberships
+        if permission_codename in PermissionBitset(decode_bits(bits))
+      }
+     
+     
      
        
        
@@ -102,8 +132,7 @@ class UserQuerySet(models.QuerySet):
     #new 
     def get_permission(self, permission_name="", method="", accessed_model=""):
       required_permission = permission_name if permission_name else f'{method_to_action[method]}_{accessed_model}'
-      Permission = apps.get_model('auth', 'Permission')
-      permission = Permission.objects.filter(codename=required_permission).first()
+      permission = get_permission_catalog().get(required_permission)
       return permission
 
 
@@ -13,6 +13,18 @@ from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache, ids are reused between tests."""
+    from django.core.cache import cache
+    from permissions.domain.permission_catalog import clear_permission_catalog
+    cache.clear()
+    clear_permission_catalog()
+    yield
+    cache.clear()
+    clear_permission_catalog()
+
+
 # ------------------------------------------------------------------
 # Model fixtures (database-backed, for integration tests)
 # ------------------------------------------------------------------
@@ -0,0 +1,215 @@
+"""
+Tests for the streaming CSV/JSONL asset import.
+
+Level: INTEGRATION — the rows go through AssetImportService into the
+database, through the import_assets command and through the upload
+endpoint.
+"""
+
+import io
+import json
+import pytest
+from rest_framework.test import APIClient
+
+
+HEADER = "name,manufacturer,family_model,part_number,serial_number,op_capability,height,width,depth,weight,technical_data,additional_info,system_segregation"
+
+
+def _csv_row(name, weight="2.50", segregation="Hidráulico"):
+    return f"{name},ACME,P1,PN-1,SN-{name},100,1,1,1,{weight},data,notes,{segregation}"
+
+
+def _json_row(name, **overrides):
+    row = {
+        "name": name, "manufacturer": "ACME", "family_model": "P1", "part_number": "PN-1", "serial_number": f"SN-{name}",
+        "op_capability": "100", "height": 1, "width": 1, "depth": 1, "weight": "2.50", "technical_data": "data",
+        "additional_info": "notes",
+    }
+    row.update(overrides)
+    return json.dumps(row)
+
+
+@pytest.fixture
+def segregation(db):
+    from assets.domain.models import SystemSegregation
+
+    return SystemSegregation.objects.create(type="Hidráulico", description="Hydraulic systems")
+
+
+class TestAssetImportService:
+    """
+    The service imports the valid rows in chunks and reports the rest line
+    by line.
+    """
+
+    def test_csv_rows_are_imported_and_bad_rows_reported(self, business, segregation):
+        """
+        Business rule: a rejected row does not stop the import, it is written
+        to the errors stream with its line number.
+        """
+        from assets.domain.models import Asset
+        from assets.domain.service.asset_import_service import AssetImportService
+
+        stream = io.StringIO("\n".join([HEADER, _csv_row("Pump 0"), _csv_row("Pump 1", weight="heavy"), _csv_row("Pump 2")]))
+        errors = io.StringIO()
+
+        result = AssetImportService().import_assets(stream, "csv", business, errors, chunk_size=1)
+
+        assert (result.created, result.failed) == (2, 1)
+        imported = Asset.objects.filter(business=business).order_by("name")
+        assert [asset.name for asset in imported] == ["Pump 0", "Pump 2"]
+        assert {asset.system_segregation_id for asset in imported} == {segregation.pk}
+        rejected = [json.loads(line) for line in errors.getvalue().splitlines()]
+        assert rejected[0]["line"] == 3 and "weight" in rejected[0]["errors"]
+
+    def test_jsonl_reports_unknown_segregation_and_invalid_json(self, business, segregation):
+        """
+        Business rule: an unknown system segregation and a line that is not
+        JSON are rejected, the other lines are imported.
+        """
+        from assets.domain.service.asset_import_service import AssetImportService
+
+        stream = io.StringIO("\n".join([_json_row("Pump 0", system_segregation="hidráulico"), _json_row("Pump 1", system_segregation="Solar"), "{not json"]) + "\n")
+        errors = io.StringIO()
+
+        result = AssetImportService().import_assets(stream, "jsonl", business, errors)
+
+        assert (result.created, result.failed) == (1, 2)
+        rejected = [json.loads(line) for line in errors.getvalue().splitlines()]
+        assert [entry["line"] for entry in rejected] == [2, 3]
+        assert "system_segregation" in rejected[0]["errors"] and "row" in rejected[1]["errors"]
+
+    def test_lines_that_are_not_utf8_are_reported_and_skipped(self, business, segregation):
+        """
+        Business rule: a Latin-1 line of a binary stream is written to the
+        errors stream and the lines after it are still imported.
+        """
+        from assets.domain.models import Asset
+        from assets.domain.service.asset_import_service import AssetImportService
+
+        content = "\n".join([HEADER, _csv_row("Pump 0")]).encode("utf-8") + b"\n"
+        content += _csv_row("Pump 1").encode("latin-1") + b"\n" + _csv_row("Pump 2").encode("utf-8")
+        errors = io.StringIO()
+
+        result = AssetImportService().import_assets(io.BytesIO(content), "csv", business, errors)
+
+        assert (result.created, result.failed) == (2, 1)
+        assert [asset.name for asset in Asset.objects.filter(business=business).order_by("name")] == ["Pump 0", "Pump 2"]
+        rejected = json.loads(errors.getvalue())
+        assert rejected["line"] == 3 and "UTF-8" in rejected["errors"]["row"][0]
+
+    def test_invalid_csv_line_is_reported(self, business, segregation):
+        """
+        Business rule: a line the CSV reader cannot parse is rejected on its
+        own.
+        """
+        import csv
+        from assets.domain.service.asset_import_service import AssetImportService
+
+        oversized = _csv_row("Pump 1").replace(",data,", f",{'x' * (csv.field_size_limit() + 1)},")
+        stream = io.StringIO("\n".join([HEADER, _csv_row("Pump 0"), oversized, _csv_row("Pump 2")]))
+        errors = io.StringIO()
+
+        result = AssetImportService().import_assets(stream, "csv", business, errors)
+
+        assert (result.created, result.failed) == (2, 1)
+        assert "Invalid CSV" in json.loads(errors.getvalue())["errors"]["row"][0]
+
+    def test_import_invalidates_the_business_stats(self, business, segregation):
+        """
+        Business rule: the cached asset counter of the business is dropped
+        after an import.
+        """
+        from assets.domain.service.asset_import_service import AssetImportService
+        from locations.domain.business_stats import get_business_stats
+
+        assert get_business_stats([business.pk])[business.pk]["assets"] == 0
+        AssetImportService().import_assets(io.StringIO(_json_row("Pump 0")), "jsonl", business, io.StringIO())
+
+        assert get_business_stats([business.pk])[business.pk]["assets"] == 1
+
+
+class TestAssetImportEntryPoints:
+    """
+    The management command and the upload endpoint run the same import.
+    """
+
+    def test_command_imports_the_file_and_writes_the_errors_file(self, business, segregation, tmp_path):
+        """
+        Business rule: the format comes from the extension and the rejected
+        rows go to <path>.errors.jsonl.
+        """
+        from django.core.management import call_command
+        from assets.domain.models import Asset
+
+        source = tmp_path / "assets.csv"
+        source.write_text("\n".join([HEADER, _csv_row("Pump 0"), _csv_row("Pump 1", weight="heavy")]), encoding="utf-8")
+        output = io.StringIO()
+
+        call_command("import_assets", str(source), business=business.pk, stdout=output)
+
+        assert Asset.objects.filter(business=business).count() == 1
+        assert "1 assets imported" in output.getvalue()
+        assert len((tmp_path / "assets.csv.errors.jsonl").read_text(encoding="utf-8").splitlines()) == 1
+
+    def test_endpoint_imports_the_upload(self, superuser, business, segregation, settings, tmp_path):
+        """
+        Business rule: the upload is imported into the business and the
+        errors file is kept in the default storage.
+        """
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        content = "\n".join([_json_row("Pump 0"), _json_row("Pump 1", height="tall")]).encode("utf-8")
+        client = APIClient()
+        client.force_authenticate(user=superuser)
+
+        response = client.post(
+            "/assets/assets/import/",
+            {"file": SimpleUploadedFile("assets.jsonl", content), "business": business.pk},
+            format="multipart",
+        )
+
+        assert response.status_code == 201
+        data = response.json()["data"]
+        assert (data["created"], data["failed"]) == (1, 1)
+        assert (tmp_path / data["errors_file"]).exists()
+
+    def test_endpoint_reports_a_latin1_upload_line_by_line(self, superuser, business, segregation, settings, tmp_path):
+        """
+        Business rule: an upload that is not UTF-8 is not a server error, its
+        lines are rejected into the errors file.
+        """
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        settings.MEDIA_ROOT = str(tmp_path)
+        content = "\n".join([HEADER, _csv_row("Pump 0", segregation="Hidráulico")]).encode("latin-1")
+        client = APIClient()
+        client.force_authenticate(user=superuser)
+
+        response = client.post(
+            "/assets/assets/import/", {"file": SimpleUploadedFile("assets.csv", content), "business": business.pk}, format="multipart",
+        )
+
+        assert response.status_code == 201
+        data = response.json()["data"]
+        assert (data["created"], data["failed"]) == (0, 1)
+        assert "UTF-8" in (tmp_path / data["errors_file"]).read_text(encoding="utf-8")
+
+    def test_endpoint_requires_add_asset_in_the_business(self, business_membership, segregation):
+        """
+        Business rule: a member without add_asset cannot import into the
+        business.
+        """
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        client = APIClient()
+        client.force_authenticate(user=business_membership.user)
+
+        response = client.post(
+            "/assets/assets/import/",
+            {"file": SimpleUploadedFile("assets.jsonl", _json_row("Pump 0").encode("utf-8")), "business": business_membership.business_id},
+            format="multipart",
+        )
+
+        assert response.status_code == 404
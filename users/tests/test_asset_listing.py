@@ -0,0 +1,233 @@
+"""
+Tests for the business-scoped asset list with sparse fieldsets.
+
+Level: INTEGRATION — the request goes through the API view with a forced
+user and the selected columns are checked on the executed SQL.
+"""
+
+import pytest
+from rest_framework.test import APIClient
+
+
+def _asset(business, name):
+    from assets.domain.models import Asset
+
+    return Asset.objects.create(
+        name=name, manufacturer="ACME", family_model="P1", part_number="PN-1", serial_number=f"SN-{name}",
+        op_capability="100", height=1, width=1, depth=1, weight="2.50", technical_data="x" * 1000,
+        additional_info="notes", business=business,
+    )
+
+
+@pytest.fixture
+def assets(business):
+    from locations.domain.models import Business
+
+    other = Business.objects.create(name="Other Business", tin="0987654321", utr="OTHER-UTR-01")
+    return [_asset(business, f"Pump {i}") for i in range(3)], _asset(other, "Foreign pump")
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+class TestAssetList:
+    """
+    The asset list is scoped, paginated by key and selects only the
+    requested columns.
+    """
+
+    def test_sparse_fieldset_limits_the_select(self, superuser, assets):
+        """
+        Business rule: ?fields= returns the requested fields plus id and
+        the text columns are not read.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = _client(superuser).get("/assets/assets/", {"fields": "name,weight"})
+
+        assert response.status_code == 200
+        assert response.json()["data"][0] == {"id": assets[0][0].pk, "name": "Pump 0", "weight": "2.50"}
+        assert not any("technical_data" in query["sql"] for query in queries.captured_queries)
+
+    def test_default_fields_leave_out_the_text_columns(self, superuser, assets):
+        """
+        Business rule: without ?fields= every field but technical_data and
+        additional_info is returned.
+        """
+        row = _client(superuser).get("/assets/assets/").json()["data"][0]
+
+        assert "serial_number" in row and row["business"] == assets[0][0].business_id
+        assert "technical_data" not in row and "additional_info" not in row
+
+    def test_unknown_field_is_rejected(self, superuser, assets):
+        """
+        Business rule: a field outside the asset model is a validation
+        error.
+        """
+        response = _client(superuser).get("/assets/assets/", {"fields": "name,password"})
+
+        assert response.status_code == 400
+
+    def test_pages_follow_the_cursor(self, superuser, assets):
+        """
+        Business rule: the cursor continues after the last id of the page.
+        """
+        client = _client(superuser)
+        first = client.get("/assets/assets/", {"page_size": 3, "fields": "name"}).json()
+        second = client.get("/assets/assets/", {"page_size": 3, "fields": "name", "cursor": first["next"]}).json()
+
+        assert [row["name"] for row in second["data"]] == ["Foreign pump"]
+        assert second["next"] is None
+
+    def test_member_only_sees_assets_of_permitted_businesses(self, business_membership, assets, global_worker_role):
+        """
+        Business rule: a member with view_asset in one business gets the
+        assets of that business only.
+        """
+        from django.contrib.auth.models import Permission
+
+        global_worker_role.permissions.add(Permission.objects.get(codename="view_asset"))
+
+        response = _client(business_membership.user).get("/assets/assets/", {"fields": "name"})
+
+        assert response.status_code == 200
+        assert [row["name"] for row in response.json()["data"]] == ["Pump 0", "Pump 1", "Pump 2"]
+
+
+def _content(response):
+    return b"".join(response.streaming_content).decode("utf-8")
+
+
+class TestAssetExport:
+    """
+    The export streams the scoped assets chunk by chunk with the optional
+    segregation and component tree.
+    """
+
+    def test_csv_export_streams_the_selected_columns(self, superuser, assets):
+        """
+        Business rule: the CSV holds a header and one line per asset, in id
+        order.
+        """
+        response = _client(superuser).get("/assets/assets/export/", {"fields": "name,weight", "business": assets[0][0].business_id})
+
+        assert response.status_code == 200 and response.streaming
+        assert response["Content-Type"] == "text/csv"
+        assert _content(response).splitlines() == [
+            "id,name,weight", *(f"{asset.pk},{asset.name},2.50" for asset in assets[0])
+        ]
+
+    def test_ndjson_export_includes_segregation_and_components(self, superuser, assets):
+        """
+        Business rule: include=system_segregation,components adds the
+        segregation type and the nested systems of every asset.
+        """
+        import json
+        from assets.domain.models import SystemSegregation
+        from components.domain.models import AssetSystem, MinimumComponent, SubsystemComponent
+
+        pump = assets[0][0]
+        pump.system_segregation = SystemSegregation.objects.create(type="Hidráulico", description="Hydraulic")
+        pump.save()
+        system = AssetSystem.objects.create(name="Motor", part_number="M-1", asset_key=pump)
+        subsystem = SubsystemComponent.objects.create(name="Rotor", part_number="R-1", asset_system_key=system)
+        MinimumComponent.objects.create(name="Bearing", part_number="B-1", subsystem_component_key=subsystem)
+
+        response = _client(superuser).get(
+            "/assets/assets/export/", {"output": "ndjson", "fields": "name", "include": "system_segregation,components"}
+        )
+        rows = [json.loads(line) for line in _content(response).splitlines()]
+
+        assert rows[0]["system_segregation_type"] == "Hidráulico"
+        assert rows[0]["systems"][0]["name"] == "Motor"
+        assert rows[0]["systems"][0]["subsystems"][0]["components"][0]["name"] == "Bearing"
+        assert rows[1]["systems"] == [] and len(rows) == 4
+
+    def test_component_tree_costs_one_query_per_level_and_chunk(self, superuser, assets):
+        """
+        Business rule: the assets are read once through an iterator and each
+        chunk reads its component tree with at most three queries.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from assets.domain.models import Asset
+        from assets.domain.service.asset_export_service import AssetExportService
+        from assets.serializers.general_serializers import AssetListSerializer
+
+        columns = AssetListSerializer.select_columns("name")
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(AssetExportService().export_rows(Asset.objects.all(), columns, ["components"], chunk_size=2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2]
+        #no systems, only the first level is read per chunk
+        assert len(queries) == 1 + 2
+
+    def test_unknown_output_is_rejected(self, superuser, assets):
+        """
+        Business rule: only csv and ndjson are produced.
+        """
+        response = _client(superuser).get("/assets/assets/export/", {"output": "xlsx"})
+
+        assert response.status_code == 400
+
+
+class TestAssetTree:
+    """
+    The tree endpoint nests the component levels of one asset with one
+    query per level.
+    """
+
+    @pytest.fixture
+    def tree(self, assets):
+        from components.domain.models import AssetSystem, MinimumComponent, SubsystemComponent
+
+        pump = assets[0][0]
+        for system_index in range(2):
+            system = AssetSystem.objects.create(name=f"System {system_index}", part_number="S-1", asset_key=pump)
+            for subsystem_index in range(2):
+                subsystem = SubsystemComponent.objects.create(
+                    name=f"Subsystem {system_index}.{subsystem_index}", part_number="R-1", asset_system_key=system
+                )
+                for component_index in range(3):
+                    MinimumComponent.objects.create(
+                        name=f"Component {component_index}", part_number="B-1", subsystem_component_key=subsystem
+                    )
+        return pump
+
+    def test_tree_is_built_with_four_queries(self, superuser, tree):
+        """
+        Business rule: asset, systems, subsystems and minimum components are
+        read with exactly one query each, whatever the size of the tree.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        client = _client(superuser)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f"/assets/assets/{tree.pk}/tree", {"fields": "name"})
+
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["name"] == "Pump 0"
+        assert [system["name"] for system in data["systems"]] == ["System 0", "System 1"]
+        assert [subsystem["name"] for subsystem in data["systems"][1]["subsystems"]] == ["Subsystem 1.0", "Subsystem 1.1"]
+        assert len(data["systems"][0]["subsystems"][0]["components"]) == 3
+        assert len(queries) == 4
+
+    def test_asset_of_another_business_is_not_found(self, business_membership, assets, global_worker_role):
+        """
+        Business rule: the tree of an asset outside the businesses of the
+        user is a 404.
+        """
+        from django.contrib.auth.models import Permission
+
+        global_worker_role.permissions.add(Permission.objects.get(codename="view_asset"))
+        client = _client(business_membership.user)
+
+        assert client.get(f"/assets/assets/{assets[0][0].pk}/tree").status_code == 200
+        assert client.get(f"/assets/assets/{assets[1].pk}/tree").status_code == 404
@@ -0,0 +1,201 @@
+"""
+Tests for CookieJWTAuthentication building request.user from the token
+claims (JWT_CLAIMS_USER).
+
+Level: INTEGRATION — the status flags are cached and invalidated through
+the User signals, so they are verified against the database and the cache.
+"""
+
+import pytest
+from rest_framework.exceptions import AuthenticationFailed
+
+
+@pytest.fixture
+def claims_user_enabled(settings):
+    settings.JWT_CLAIMS_USER = True
+
+
+@pytest.fixture
+def access_token(verified_user):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    return AccessToken.for_user(verified_user)
+
+
+class TestClaimsUser:
+    """
+    With JWT_CLAIMS_USER the authenticated user is built from the token
+    and the cached status flags.
+    """
+
+    def test_cached_status_needs_no_query(
+        self, claims_user_enabled, verified_user, access_token, django_assert_num_queries
+    ):
+        """
+        Business rule: once the status flags are cached, authenticating
+        a request does not read users_user.
+        """
+        from permissions.domain.authentication import CookieJWTAuthentication
+
+        authentication = CookieJWTAuthentication()
+        authentication.get_user(access_token)
+
+        with django_assert_num_queries(0):
+            user = authentication.get_user(access_token)
+            assert user.pk == verified_user.pk
+            assert user.is_active and user.email_verified and not user.is_superuser
+
+    def test_other_fields_load_the_row_once(
+        self, claims_user_enabled, verified_user, access_token, django_assert_num_queries
+    ):
+        """
+        Business rule: reading a field outside the status flags loads
+        the whole row in a single query.
+        """
+        from permissions.domain.authentication import CookieJWTAuthentication
+
+        user = CookieJWTAuthentication().get_user(access_token)
+
+        with django_assert_num_queries(1):
+            assert user.email == verified_user.email
+            assert user.name == verified_user.name
+
+    def test_deactivation_is_seen_immediately(self, claims_user_enabled, verified_user, access_token):
+        """
+        Business rule: deactivating a user rejects its tokens on the next
+        request even though the status flags were cached.
+        """
+        from permissions.domain.authentication import CookieJWTAuthentication
+
+        authentication = CookieJWTAuthentication()
+        authentication.get_user(access_token)
+
+        verified_user.deactivate()
+
+        with pytest.raises(AuthenticationFailed):
+            authentication.get_user(access_token)
+
+    def test_unverified_user_is_rejected(self, claims_user_enabled, user):
+        """
+        Business rule: users pending email confirmation cannot
+        authenticate.
+        """
+        from rest_framework_simplejwt.tokens import AccessToken
+        from permissions.domain.authentication import CookieJWTAuthentication
+
+        with pytest.raises(AuthenticationFailed):
+            CookieJWTAuthentication().get_user(AccessToken.for_user(user))
+
+
+class TestValidatedTokenCache:
+    """
+    Validated access tokens are reused until they expire and the cache
+    stays bounded.
+    """
+
+    def test_repeated_token_skips_validation(self, access_token):
+        """
+        Business rule: the same raw token is validated once, later
+        requests are served from the cache.
+        """
+        from permissions.domain.authentication import CookieJWTAuthentication
+        from permissions.domain.token_cache import validated_tokens
+
+        validated_tokens.clear()
+        authentication = CookieJWTAuthentication()
+        raw_token = str(access_token).encode("utf-8")
+
+        first = authentication.get_validated_token(raw_token)
+        second = authentication.get_validated_token(raw_token)
+
+        assert second is first
+        assert validated_tokens.stats()["hits"] == 1
+        assert validated_tokens.stats()["misses"] == 1
+
+    def test_expired_entry_is_not_served(self, access_token):
+        """
+        Business rule: a cached token is never returned after its exp.
+        """
+        from permissions.domain.token_cache import ValidatedTokenCache
+
+        cache = ValidatedTokenCache(maxsize=2)
+        access_token["exp"] = 0
+        cache.set("raw", access_token)
+
+        assert cache.get("raw") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_entry_is_evicted(self, access_token):
+        """
+        Business rule: the cache never holds more than maxsize tokens.
+        """
+        from permissions.domain.token_cache import ValidatedTokenCache
+
+        cache = ValidatedTokenCache(maxsize=2)
+        cache.set("first", access_token)
+        cache.set("second", access_token)
+        cache.get("first")
+        cache.set("third", access_token)
+
+        assert cache.get("second") is None
+        assert cache.get("first") is access_token
+        assert len(cache) == 2
+
+
+class TestCSRFValidator:
+    """
+    CSRFValidator checks origin and token directly and returns a
+    structured rejection.
+    """
+
+    @pytest.fixture
+    def csrf_secret(self):
+        from django.middleware.csrf import _get_new_csrf_string
+
+        return _get_new_csrf_string()
+
+    def _post(self, csrf_secret, token=None, **extra):
+        from django.test import RequestFactory
+
+        headers = {"HTTP_X_CSRFTOKEN": token} if token else {}
+        request = RequestFactory().post("/", **headers, **extra)
+        request.COOKIES["csrftoken"] = csrf_secret
+        return request
+
+    def test_masked_token_matching_cookie_passes(self, csrf_secret):
+        """
+        Business rule: a masked header token for the cookie secret is
+        accepted.
+        """
+        from django.middleware.csrf import _mask_cipher_secret
+        from permissions.domain.authentication import CSRFValidator
+
+        request = self._post(csrf_secret, token=_mask_cipher_secret(csrf_secret))
+
+        assert CSRFValidator().check(request) is None
+
+    def test_missing_token_is_rejected(self, csrf_secret):
+        """
+        Business rule: unsafe requests without a token are rejected with
+        the token reason.
+        """
+        from permissions.domain.authentication import CSRFValidator
+
+        rejection = CSRFValidator().check(self._post(csrf_secret))
+
+        assert rejection.code == "bad_token"
+        assert rejection.reason == "CSRF token missing."
+
+    def test_untrusted_origin_is_rejected(self, csrf_secret):
+        """
+        Business rule: an Origin outside the trusted origins is rejected
+        before the token is checked.
+        """
+        from django.middleware.csrf import _mask_cipher_secret
+        from permissions.domain.authentication import CSRFValidator
+
+        request = self._post(
+            csrf_secret, token=_mask_cipher_secret(csrf_secret), HTTP_ORIGIN="https://evil.example.com"
+        )
+
+        assert CSRFValidator().check(request).code == "bad_origin"
@@ -99,4 +99,32 @@ def test_missing_csrf_token_rejected(db, csrf_flow_user):
     )
     assert resp.status_code == 403, (
         f"Missing CSRF token must be rejected; got {resp.status_code}: {resp.content}"
-    )
\ No newline at end of file
+    )
+
+def test_rejection_is_logged_to_the_security_logger(db, csrf_flow_user, caplog):
+    """A rejected request is logged to django.security.csrf like CsrfViewMiddleware does."""
+    client = Client(enforce_csrf_checks=True)
+
+    _get_csrf_token(client)
+    login = _login(client, csrf_flow_user.email, "securepassword123", "z" * 64)
+    assert login.status_code == 200, login.content
+
+    with caplog.at_level("WARNING", logger="django.security.csrf"):
+        resp = client.post("/users/logout/", data={}, content_type="application/json")
+
+    assert resp.status_code == 403
+    records = [record for record in caplog.records if record.name == "django.security.csrf"]
+    assert len(records) == 1
+    assert records[0].getMessage().startswith("Forbidden (") and records[0].status_code == 403
+
+
+def test_private_csrf_middleware_checks_still_exist():
+    """CSRFValidator runs private CsrfViewMiddleware methods, a Django upgrade must keep them."""
+    import inspect
+    from django.middleware.csrf import CsrfViewMiddleware
+    from permissions.domain.authentication import CSRF_MIDDLEWARE_CHECKS
+
+    for name in CSRF_MIDDLEWARE_CHECKS:
+        method = getattr(CsrfViewMiddleware, name, None)
+        assert callable(method), f"CsrfViewMiddleware.{name} is gone"
+        assert list(inspect.signature(method).parameters) == ["self", "request"], name
@@ -0,0 +1,130 @@
+"""
+Tests for the bulk create/update endpoints of headquarters and internal
+locations.
+
+Level: INTEGRATION — the batch is validated and written against the
+database, the request goes through the API view with a forced user.
+"""
+
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def client(superuser):
+    client = APIClient()
+    client.force_authenticate(user=superuser)
+    return client
+
+
+@pytest.fixture
+def headquarters(business):
+    from locations.domain.models import Headquarters
+
+    return Headquarters.objects.create(name="Main", address="Street 1", phone="3000000000", business_key=business)
+
+
+class TestInternalLocationBulk:
+    """
+    Internal locations are created and updated in batches with a fixed
+    number of queries.
+    """
+
+    def test_create_batch_with_constant_queries(self, client, headquarters, django_assert_max_num_queries):
+        """
+        Business rule: a batch is validated with one parent query and
+        written with bulk_create, its location tree nodes included,
+        whatever its size.
+        """
+        from locations.domain.models import InternalLocation
+
+        items = [
+            {"name": f"Room {i}", "floor": "1", "room_number": str(i), "headquarters_key": headquarters.pk}
+            for i in range(200)
+        ]
+
+        with django_assert_max_num_queries(8):
+            response = client.post("/locations/internallocations/bulk/", items, format="json")
+
+        assert response.status_code == 201, response.content
+        assert len(response.json()["data"]) == 200
+        assert InternalLocation.objects.filter(headquarters_key=headquarters).count() == 200
+        assert InternalLocation.objects.under(headquarters).count() == 200
+        assert not InternalLocation.objects.exclude(business_id=headquarters.business_key_id).exists()
+
+    def test_invalid_items_reject_the_whole_batch(self, client, headquarters):
+        """
+        Business rule: errors are reported per item index and nothing is
+        written when any item is invalid.
+        """
+        from locations.domain.models import InternalLocation
+
+        items = [
+            {"name": "Room 1", "floor": "1", "room_number": "1", "headquarters_key": headquarters.pk},
+            {"name": "Room 2", "floor": "1", "room_number": "2", "headquarters_key": 999999},
+        ]
+
+        response = client.post("/locations/internallocations/bulk/", items, format="json")
+
+        assert response.status_code == 400
+        assert [error["index"] for error in response.json()["errors"]] == [1]
+        assert not InternalLocation.objects.exists()
+
+    def test_update_batch(self, client, headquarters):
+        """
+        Business rule: PATCH updates every listed row in one bulk_update.
+        """
+        from locations.domain.models import InternalLocation
+
+        rooms = InternalLocation.objects.bulk_create(
+            InternalLocation(name=f"Room {i}", floor="1", room_number=str(i), headquarters_key=headquarters)
+            for i in range(3)
+        )
+
+        response = client.patch(
+            "/locations/internallocations/bulk/",
+            [{"id": room.pk, "floor": "2"} for room in rooms],
+            format="json",
+        )
+
+        assert response.status_code == 200, response.content
+        assert set(InternalLocation.objects.values_list("floor", flat=True)) == {"2"}
+
+
+class TestHeadquartersBulk:
+    """
+    Headquarters batches keep the (business, name) uniqueness per item.
+    """
+
+    def test_duplicate_names_are_reported_per_item(self, client, business, headquarters):
+        """
+        Business rule: names taken in the business or repeated in the
+        batch are rejected with the index of the item.
+        """
+        items = [
+            {"name": "Main", "address": "Street 2", "phone": "3000000001", "business_key": business.pk},
+            {"name": "North", "address": "Street 3", "phone": "3000000002", "business_key": business.pk},
+            {"name": "North", "address": "Street 4", "phone": "3000000003", "business_key": business.pk},
+        ]
+
+        response = client.post("/locations/headquarters/bulk/", items, format="json")
+
+        assert response.status_code == 400
+        assert [error["index"] for error in response.json()["errors"]] == [0, 2]
+
+    def test_user_without_permission_cannot_create(self, business_membership, business):
+        """
+        Business rule: every item is authorized against the business it
+        belongs to.
+        """
+        client = APIClient()
+        client.force_authenticate(user=business_membership.user)
+
+        response = client.post(
+            "/locations/headquarters/bulk/",
+            [{"name": "North", "address": "Street 3", "phone": "3000000002", "business_key": business.pk}],
+            format="json",
+        )
+
+        assert response.status_code == 400
+        assert response.json()["errors"][0]["errors"]["business_key"]
@@ -0,0 +1,434 @@
+"""
+Tests for the location list responses built from annotated values() rows.
+
+Level: INTEGRATION — the row serializers depend on the annotations of the
+location querysets, so both are exercised against the database.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def headquarters_rows(business):
+    """Three headquarters with two internal locations each."""
+    from locations.domain.models import Headquarters, InternalLocation
+
+    headquarters = [
+        Headquarters.objects.create(name=f"HQ {i}", address="Street", phone="3000000000", business_key=business)
+        for i in range(3)
+    ]
+    for headquarter in headquarters:
+        for room in ("101", "102"):
+            InternalLocation.objects.create(name=f"Room {room}", floor="1", room_number=room, headquarters_key=headquarter)
+    return headquarters
+
+
+class TestRowSerializers:
+    """
+    The list serializers render annotated rows with the same shape as
+    instances and a query count independent of the row count.
+    """
+
+    def test_headquarters_rows_match_instance_representation(self, headquarters_rows, django_assert_num_queries):
+        """
+        Business rule: the row path returns the same payload as the
+        model serializer, in one query for any number of rows.
+        """
+        from locations.domain.models import Headquarters
+        from locations.presentation.serializers.headquarter_serializer import HeadquartersListSerializer
+
+        with django_assert_num_queries(1):
+            data = HeadquartersListSerializer.represent_rows(Headquarters.objects.order_by("pk").with_business_name())
+
+        assert data == HeadquartersListSerializer(Headquarters.objects.order_by("pk"), many=True).data
+
+    def test_internal_location_rows_match_instance_representation(self, headquarters_rows, django_assert_num_queries):
+        """
+        Business rule: internal location rows carry the headquarters
+        name without one query per row.
+        """
+        from locations.domain.models import InternalLocation
+        from locations.presentation.serializers.internal_location_serializer import InternalLocationListSerializer
+
+        with django_assert_num_queries(1):
+            data = InternalLocationListSerializer.represent_rows(
+                InternalLocation.objects.order_by("pk").with_headquarter_name()
+            )
+
+        assert len(data) == 6
+        assert data == InternalLocationListSerializer(InternalLocation.objects.order_by("pk"), many=True).data
+
+
+class TestKeysetPagination:
+    """
+    The location lists are paginated by key with an opaque cursor.
+    """
+
+    def _request(self, user, **params):
+        from django.test import RequestFactory
+
+        request = RequestFactory().get("/", params)
+        request.user = user
+        return request
+
+    def _walk(self, list_page, user, **params):
+        """Collects every page following the cursors."""
+        pages, cursor = [], None
+        while True:
+            extra = {"cursor": cursor} if cursor else {}
+            page, cursor = list_page(self._request(user, **params, **extra))
+            pages.append(page)
+            if cursor is None:
+                return pages
+
+    def test_headquarters_pages_cover_every_row_once(self, superuser, headquarters_rows):
+        """
+        Business rule: following the cursors returns every headquarters
+        exactly once, page_size rows at a time.
+        """
+        from appcore.pagination import KeysetPagination
+        from locations.domain.models import Headquarters
+
+        def list_page(request):
+            paginator = KeysetPagination()
+            grouped = Headquarters.objects.get_user_headquarters(request=request, rows=True, paginator=paginator)
+            return [row["id"] for rows in grouped.values() for row in rows], paginator.next_cursor
+
+        pages = self._walk(list_page, superuser, page_size=2)
+
+        assert [len(page) for page in pages] == [2, 1]
+        assert sum(pages, []) == [headquarters.pk for headquarters in headquarters_rows]
+
+    def test_internal_location_pages_keep_empty_headquarters(self, superuser, headquarters_rows, business):
+        """
+        Business rule: the hierarchy is paginated by (headquarters, id)
+        and headquarters without internal locations are still listed.
+        """
+        from appcore.pagination import KeysetPagination
+        from locations.domain.models import Headquarters, InternalLocation
+
+        empty = Headquarters.objects.create(name="Empty", address="Street", phone="3000000000", business_key=business)
+
+        def list_page(request):
+            paginator = KeysetPagination()
+            grouped = InternalLocation.objects.get_user_internal_locations(request=request, rows=True, paginator=paginator)
+            locations = [
+                (headquarter_id, location["id"] if location else None)
+                for headquarters in grouped.values()
+                for headquarter_id, rows in headquarters.items()
+                for location in (rows or [None])
+            ]
+            return locations, paginator.next_cursor
+
+        locations = sum(self._walk(list_page, superuser, page_size=4), [])
+
+        assert len(locations) == 7
+        assert locations[-1] == (empty.pk, None)
+        assert len(set(locations)) == 7
+
+    def test_page_size_is_capped_and_cursor_validated(self, superuser):
+        """
+        Business rule: page_size never exceeds max_page_size and a
+        tampered cursor is a validation error.
+        """
+        from rest_framework.exceptions import ValidationError
+        from appcore.pagination import KeysetPagination
+        from locations.domain.models import Headquarters
+
+        paginator = KeysetPagination(ordering=("id",))
+
+        assert paginator.get_page_size(self._request(superuser, page_size=10_000)) == paginator.max_page_size
+        with pytest.raises(ValidationError):
+            paginator.paginate_queryset(Headquarters.objects.all(), self._request(superuser, cursor="not-a-cursor"))
+
+    @pytest.mark.parametrize("key", [["abc"], [{"a": 1}], [[1]]])
+    def test_cursor_with_wrong_types_is_a_validation_error(self, superuser, key):
+        """
+        Business rule: a cursor that decodes but does not fit the types of
+        the ordering is rejected with a 400, not a server error.
+        """
+        from rest_framework.test import APIClient
+        from appcore.pagination import KeysetPagination
+
+        client = APIClient()
+        client.force_authenticate(user=superuser)
+        cursor = KeysetPagination(ordering=("id",)).encode_cursor(key)
+
+        for url in ("/locations/businesses/", "/assets/assets/"):
+            response = client.get(url, {"cursor": cursor})
+            assert response.status_code == 400, url
+            assert response.json()["cursor"] == "Invalid cursor."
+
+
+class TestLocationTree:
+    """
+    The materialized path of the locations follows saves, moves and
+    deletes and answers subtree questions in one query.
+    """
+
+    def _paths(self):
+        from locations.domain.models import LocationNode
+
+        return set(LocationNode.objects.values_list("path", flat=True))
+
+    def test_nodes_follow_create_move_and_delete(self, business, headquarters_rows):
+        """
+        Business rule: moving a headquarters to another business moves
+        its internal locations too, deleting it removes its subtree.
+        """
+        from locations.domain.models import Business, LocationNode
+
+        other = Business.objects.create(name="Other", tin="tin-other", utr="utr-other")
+        moved = headquarters_rows[0]
+        rooms = list(moved.internallocation_set.values_list("pk", flat=True))
+
+        moved.business_key = other
+        moved.save()
+
+        assert {
+            f"business:{other.pk}/headquarters:{moved.pk}/internallocation:{room}/" for room in rooms
+        } <= self._paths()
+        assert LocationNode.objects.get(kind="internallocation", object_id=rooms[0]).depth == 2
+
+        moved.delete()
+
+        assert not any(f"headquarters:{moved.pk}/" in path for path in self._paths())
+        assert LocationNode.objects.filter(kind="internallocation").count() == 4
+
+    def test_subtree_queries(self, business, headquarters_rows, django_assert_num_queries):
+        """
+        Business rule: the internal locations under a business and the
+        counts per headquarters are one query each.
+        """
+        from locations.domain.models import InternalLocation, LocationNode
+
+        with django_assert_num_queries(1):
+            locations = list(InternalLocation.objects.under(business))
+        with django_assert_num_queries(1):
+            counts = LocationNode.objects.child_counts(business, InternalLocation)
+
+        assert len(locations) == 6
+        assert counts == {headquarters.pk: 2 for headquarters in headquarters_rows}
+        assert list(InternalLocation.objects.under(headquarters_rows[1]).order_by("pk")) == list(
+            headquarters_rows[1].internallocation_set.order_by("pk")
+        )
+
+    def test_lookups_by_parent_read_the_tree(self, business, headquarters_rows, django_assert_num_queries):
+        """
+        Business rule: the headquarters of a business and the internal
+        locations of a headquarters are read from the tree, the node of
+        the parent is read only when its path cannot be built from ids.
+        """
+        from locations.domain.models import Headquarters, InternalLocation
+
+        with django_assert_num_queries(1):
+            headquarters = list(Headquarters.objects.get_headquarters_by_business(business.pk))
+        with django_assert_num_queries(1):
+            rooms = InternalLocation.objects.all().get_internal_locations_by_headquarter(headquarters_rows[0], dictionary=True)
+        with django_assert_num_queries(2):
+            by_id = list(InternalLocation.objects.get_internal_locations_by_headquarter(headquarters_rows[0].pk))
+
+        assert {hq.pk for hq in headquarters} == {hq.pk for hq in headquarters_rows}
+        assert set(rooms) == {room.pk for room in by_id} == set(
+            headquarters_rows[0].internallocation_set.values_list("pk", flat=True)
+        )
+
+
+class TestConditionalGet:
+    """
+    The location lists answer If-None-Match with a 304 while nothing the
+    user can see has changed.
+    """
+
+    @pytest.fixture
+    def client(self, superuser):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=superuser)
+        return client
+
+    def test_matching_etag_returns_not_modified(self, client, headquarters_rows):
+        """
+        Business rule: a request with the current ETag gets an empty 304,
+        an update of a row produces a new ETag.
+        """
+        first = client.get("/locations/headquarters/")
+        assert first.status_code == 200
+        assert first["Last-Modified"]
+
+        cached = client.get("/locations/headquarters/", HTTP_IF_NONE_MATCH=first["ETag"])
+        assert cached.status_code == 304
+        assert not cached.content
+
+        headquarters = headquarters_rows[0]
+        headquarters.phone = "3111111111"
+        headquarters.save()
+
+        changed = client.get("/locations/headquarters/", HTTP_IF_NONE_MATCH=first["ETag"])
+        assert changed.status_code == 200
+        assert changed["ETag"] != first["ETag"]
+
+    def test_deleted_row_changes_the_etag(self, client, headquarters_rows):
+        """
+        Business rule: deleting an internal location changes the ETag of
+        the list although no update_date moved.
+        """
+        first = client.get("/locations/internallocations/")
+        headquarters_rows[0].internallocation_set.first().delete()
+
+        response = client.get("/locations/internallocations/", HTTP_IF_NONE_MATCH=first["ETag"])
+
+        assert response.status_code == 200
+        assert response["ETag"] != first["ETag"]
+
+    def test_fingerprint_is_one_query(self, rf, superuser, headquarters_rows, django_assert_num_queries):
+        """
+        Business rule: the fingerprint is a single aggregate query.
+        """
+        from django.db.models import Max
+        from appcore.conditional import queryset_fingerprint
+        from locations.domain.models import Headquarters
+
+        request = rf.get("/locations/headquarters/")
+        request.user = superuser
+
+        with django_assert_num_queries(1):
+            fingerprint = queryset_fingerprint(request, Headquarters.objects.all(), Max("update_date"))
+
+        assert fingerprint.last_modified == Headquarters.objects.latest("update_date").update_date
+
+
+class TestLocationSearch:
+    """
+    The search endpoint ranks and paginates the locations the user can
+    view.
+    """
+
+    @pytest.fixture
+    def rooms(self, headquarters_rows):
+        from locations.domain.models import InternalLocation
+
+        headquarters = headquarters_rows[0]
+        return [
+            InternalLocation.objects.create(name=name, floor="2", room_number="201", headquarters_key=headquarters)
+            for name in ("Storage annex", "Storage", "Main storage")
+        ]
+
+    def _client(self, user):
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def test_results_are_ranked_exact_prefix_contains(self, superuser, rooms):
+        """
+        Business rule: an exact match comes before a prefix match, which
+        comes before a match inside the text.
+        """
+        response = self._client(superuser).get("/locations/search/", {"q": "storage", "kind": "internallocation"})
+
+        assert response.status_code == 200
+        assert [row["name"] for row in response.json()["data"]["internallocation"]] == [
+            "Storage", "Storage annex", "Main storage",
+        ]
+
+    def test_pages_follow_the_cursor_of_a_kind(self, superuser, rooms):
+        """
+        Business rule: the cursor of a kind returns the following rows of
+        the same ranking.
+        """
+        client = self._client(superuser)
+        params = {"q": "storage", "kind": "internallocation", "page_size": 2}
+
+        first = client.get("/locations/search/", params).json()
+        second = client.get("/locations/search/", {**params, "cursor": first["next"]["internallocation"]}).json()
+
+        assert [row["name"] for row in second["data"]["internallocation"]] == ["Main storage"]
+        assert second["next"]["internallocation"] is None
+
+    def test_results_are_scoped_to_the_user(self, verified_user, rooms):
+        """
+        Business rule: a user without memberships finds nothing.
+        """
+        response = self._client(verified_user).get("/locations/search/", {"q": "storage"})
+
+        assert response.status_code == 200
+        assert response.json()["data"] == {"business": [], "headquarters": [], "internallocation": []}
+
+    def test_short_query_is_rejected(self, superuser):
+        """
+        Business rule: queries shorter than three characters cannot use
+        the trigram indexes and are rejected.
+        """
+        response = self._client(superuser).get("/locations/search/", {"q": "ab"})
+
+        assert response.status_code == 400
+        assert "q" in response.json()["errors"]
+
+
+class TestBusinessStats:
+    """
+    The per-business counters come from one query and stay cached until
+    a counted row changes.
+    """
+
+    def test_counters_are_one_query_then_cached(
+        self, business, headquarters_rows, business_membership, invitation, django_assert_num_queries
+    ):
+        """
+        Business rule: every counter of the business is computed in one
+        query and the next read is served by the cache.
+        """
+        from locations.domain.business_stats import get_business_stats
+
+        with django_assert_num_queries(1):
+            stats = get_business_stats([business.pk])
+        with django_assert_num_queries(0):
+            assert get_business_stats([business.pk]) == stats
+
+        assert stats[business.pk] == {
+            "headquarters": 3,
+            "internal_locations": 6,
+            "assets": 0,
+            "active_memberships": 1,
+            "pending_invitations": 1,
+        }
+
+    def test_writes_invalidate_the_counters(self, business, headquarters_rows):
+        """
+        Business rule: creating a row or moving a headquarters to another
+        business refreshes the counters of every business involved.
+        """
+        from locations.domain.business_stats import get_business_stats
+        from locations.domain.models import Business, Headquarters, InternalLocation
+
+        other = Business.objects.create(name="Other", tin="tin-other", utr="utr-other")
+        get_business_stats([business.pk, other.pk])
+
+        InternalLocation.objects.create(name="Room 103", floor="1", room_number="103", headquarters_key=headquarters_rows[0])
+        assert get_business_stats([business.pk])[business.pk]["internal_locations"] == 7
+
+        moved = Headquarters.objects.get(pk=headquarters_rows[1].pk)
+        moved.business_key = other
+        moved.save()
+
+        stats = get_business_stats([business.pk, other.pk])
+        assert (stats[business.pk]["headquarters"], stats[other.pk]["headquarters"]) == (2, 1)
+        assert (stats[business.pk]["internal_locations"], stats[other.pk]["internal_locations"]) == (5, 2)
+
+    def test_endpoint_lists_visible_businesses(self, superuser, business, headquarters_rows):
+        """
+        Business rule: the endpoint returns the counters keyed by business
+        id.
+        """
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=superuser)
+
+        response = client.get("/locations/businesses/stats/")
+
+        assert response.status_code == 200
+        assert response.json()["data"][str(business.pk)]["headquarters"] == 3
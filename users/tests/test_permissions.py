@@ -0,0 +1,709 @@
+"""
+Tests for the effective permission resolution used by the permission classes
+and BusinessPermissionBackend.
+
+Level: INTEGRATION — the resolver is a single ORM statement, so it is
+verified against the database instead of being mocked.
+"""
+
+import pytest
+from django.test import RequestFactory
+
+
+@pytest.fixture
+def worker_membership(business_membership, global_worker_role, permission_model):
+    """Membership whose role grants permission_model."""
+    global_worker_role.permissions.add(permission_model)
+    return business_membership
+
+
+class TestResolveEffectivePermissions:
+    """
+    UserQuerySet.resolve_effective_permissions returns the precompiled
+    bitset of the role permissions plus the allow/deny overrides.
+    """
+
+    def test_role_permissions_are_granted(self, worker_membership, permission_model, django_assert_num_queries):
+        """
+        Business rule: a member holds every permission of its role,
+        resolved in a single query.
+        """
+        from users.domain.models import User
+
+        with django_assert_num_queries(1):
+            permissions = User.objects.resolve_effective_permissions(
+                worker_membership.user_id, worker_membership.business_id
+            )
+
+        assert permission_model.id in permissions
+        assert permission_model.codename in permissions
+
+    def test_denied_override_removes_role_permission(self, worker_membership, permission_model):
+        """
+        Business rule: a UserBusinessPermission with allowed=False
+        revokes a permission granted by the role.
+        """
+        from users.domain.models import User
+        from permissions.domain.models import UserBusinessPermission
+
+        UserBusinessPermission.objects.create(
+            membership=worker_membership, permission=permission_model, allowed=False
+        )
+
+        codenames = User.objects.resolve_effective_permissions(
+            worker_membership.user_id, worker_membership.business_id
+        )
+        assert permission_model.codename not in codenames
+
+    def test_allowed_override_adds_permission_outside_role(self, business_membership, permission_model):
+        """
+        Business rule: a UserBusinessPermission with allowed=True
+        grants a permission the role does not have.
+        """
+        from users.domain.models import User
+        from permissions.domain.models import UserBusinessPermission
+
+        UserBusinessPermission.objects.create(
+            membership=business_membership, permission=permission_model, allowed=True
+        )
+
+        codenames = User.objects.resolve_effective_permissions(
+            business_membership.user_id, business_membership.business_id
+        )
+        assert permission_model.codename in codenames
+
+    def test_inactive_membership_has_no_permissions(self, worker_membership):
+        """
+        Business rule: a deactivated member holds no permission in the business.
+        """
+        from users.domain.models import User
+
+        worker_membership.deactivate()
+
+        codenames = User.objects.resolve_effective_permissions(
+            worker_membership.user_id, worker_membership.business_id
+        )
+        assert not codenames
+
+
+class TestUserHasClearance:
+    """
+    UserManager.user_has_clearance memoizes the effective permissions
+    on the request so repeated checks share one query.
+    """
+
+    def test_repeated_checks_on_same_request_query_once(
+        self, worker_membership, permission_model, django_assert_num_queries
+    ):
+        """
+        Business rule: a view checking permissions several times hits
+        the database once per (user, business).
+        """
+        from users.domain.models import User
+
+        from permissions.domain.permission_catalog import get_permission_catalog
+
+        request = RequestFactory().get("/")
+        user_id, business_id = worker_membership.user_id, worker_membership.business_id
+        get_permission_catalog()  # the catalog is loaded once per process
+
+        with django_assert_num_queries(1):
+            assert User.objects.user_has_clearance(user_id, business_id, permission_model.codename, request=request)
+            assert User.objects.user_has_clearance(user_id, business_id, permission_model.codename, request=request)
+            assert not User.objects.user_has_clearance(user_id, business_id, "missing_codename", request=request)
+
+    def test_user_without_membership_has_no_clearance(self, verified_user, business, permission_model):
+        """
+        Business rule: users outside the business are never cleared.
+        """
+        from users.domain.models import User
+
+        assert not User.objects.user_has_clearance(verified_user.id, business.id, permission_model.codename)
+
+
+class TestPermissionCache:
+    """
+    The effective permissions of a membership are shared between
+    requests and invalidated by the permission signals.
+    """
+
+    def test_warm_cache_costs_no_queries(self, worker_membership, permission_model, django_assert_num_queries):
+        """
+        Business rule: once resolved, a membership check does not
+        touch the database until its permissions change.
+        """
+        from users.domain.models import User
+
+        user_id, business_id = worker_membership.user_id, worker_membership.business_id
+        assert User.objects.user_has_clearance(user_id, business_id, permission_model.codename)
+
+        with django_assert_num_queries(0):
+            assert User.objects.user_has_clearance(user_id, business_id, permission_model.codename)
+
+    def test_role_permission_change_invalidates_cache(self, business_membership, global_worker_role, permission_model):
+        """
+        Business rule: adding a permission to a role is visible on the
+        next check of every membership holding that role.
+        """
+        from users.domain.models import User
+
+        user_id, business_id = business_membership.user_id, business_membership.business_id
+        assert not User.objects.user_has_clearance(user_id, business_id, permission_model.codename)
+
+        global_worker_role.permissions.add(permission_model)
+
+        assert User.objects.user_has_clearance(user_id, business_id, permission_model.codename)
+
+    def test_override_change_invalidates_cache(self, worker_membership, permission_model):
+        """
+        Business rule: denying a permission through an override is
+        visible on the next check.
+        """
+        from users.domain.models import User
+        from permissions.domain.models import UserBusinessPermission
+
+        user_id, business_id = worker_membership.user_id, worker_membership.business_id
+        assert User.objects.user_has_clearance(user_id, business_id, permission_model.codename)
+
+        UserBusinessPermission.objects.create(
+            membership=worker_membership, permission=permission_model, allowed=False
+        )
+
+        assert not User.objects.user_has_clearance(user_id, business_id, permission_model.codename)
+
+    def test_membership_deactivation_invalidates_cache(self, worker_membership, permission_model):
+        """
+        Business rule: a deactivated member loses its permissions
+        immediately.
+        """
+        from users.domain.models import User
+
+        user_id, business_id = worker_membership.user_id, worker_membership.business_id
+        assert User.objects.user_has_clearance(user_id, business_id, permission_model.codename)
+
+        worker_membership.deactivate()
+
+        assert not User.objects.user_has_clearance(user_id, business_id, permission_model.codename)
+
+    def test_membership_moved_to_another_business_drops_the_old_grants(self, worker_membership, permission_model):
+        """
+        Business rule: when a membership is reassigned to another business
+        the cached permissions of the previous business are dropped.
+        """
+        from locations.domain.models import Business
+        from users.domain.models import User
+
+        user_id, business_id = worker_membership.user_id, worker_membership.business_id
+        assert User.objects.user_has_clearance(user_id, business_id, permission_model.codename)
+
+        worker_membership.business = Business.objects.create(name="Other Business", tin="0987654321", utr="OTHER-UTR-01")
+        worker_membership.save()
+
+        assert not User.objects.user_has_clearance(user_id, business_id, permission_model.codename)
+
+    def test_nothing_is_cached_without_a_version(self, monkeypatch):
+        """
+        Business rule: when the cache keeps no version for a membership
+        its permissions are resolved on every call, never shared under a
+        key that no signal can invalidate.
+        """
+        from permissions.domain import permission_cache
+
+        monkeypatch.setattr(permission_cache, "_get_or_create_version", lambda key: None)
+
+        assert permission_cache.get_cached_membership_permissions(1, 1, lambda: {"view_asset"}) == {"view_asset"}
+        assert permission_cache.get_cached_membership_permissions(1, 1, lambda: set()) == set()
+
+    def test_process_local_cache_is_refused_outside_debug(self, settings):
+        """
+        Business rule: without DEBUG the default cache must be shared by the
+        workers, LocMemCache fails the system checks.
+        """
+        from permissions.checks import shared_cache_check
+
+        settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        settings.DEBUG = False
+        assert [error.id for error in shared_cache_check(None)] == ["permissions.E001"]
+
+        settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "appcore_cache"}}
+        assert shared_cache_check(None) == []
+
+
+class TestPermissionBitsets:
+    """
+    Roles and memberships keep compiled permission bitsets that are
+    recompiled when role permissions or overrides change.
+    """
+
+    def test_role_bits_follow_role_permissions(self, global_worker_role, permission_model):
+        """
+        Business rule: the role bitset holds exactly the ids of its permissions.
+        """
+        from permissions.domain.bitsets import decode_bits
+
+        global_worker_role.permissions.add(permission_model)
+        global_worker_role.refresh_from_db()
+        assert decode_bits(global_worker_role.permission_bits) >> permission_model.id & 1
+
+        global_worker_role.permissions.remove(permission_model)
+        global_worker_role.refresh_from_db()
+        assert not decode_bits(global_worker_role.permission_bits) >> permission_model.id & 1
+
+    def test_membership_bits_apply_overrides(self, worker_membership, permission_model):
+        """
+        Business rule: a denied override clears the role bit on the
+        membership and deleting the override restores it.
+        """
+        from permissions.domain.bitsets import decode_bits
+        from permissions.domain.models import UserBusinessPermission
+
+        override = UserBusinessPermission.objects.create(
+            membership=worker_membership, permission=permission_model, allowed=False
+        )
+        worker_membership.refresh_from_db()
+        assert not decode_bits(worker_membership.effective_permission_bits) >> permission_model.id & 1
+
+        override.delete()
+        worker_membership.refresh_from_db()
+        assert decode_bits(worker_membership.effective_permission_bits) >> permission_model.id & 1
+
+    def test_backend_has_perm_uses_membership_bits(self, worker_membership, permission_model, business):
+        """
+        Business rule: BusinessPermissionBackend grants a permission held
+        in the business that owns the object.
+        """
+        from permissions.domain.backends import BusinessPermissionBackend
+
+        backend = BusinessPermissionBackend()
+        user = worker_membership.user
+
+        assert backend.has_perm(user, f"users.{permission_model.codename}", business)
+        assert not backend.has_perm(user, "users.missing_codename", business)
+
+
+class TestBusinessPaths:
+    """
+    The startup registry resolves the business owning an object through
+    its precomputed ForeignKey path.
+    """
+
+    @pytest.fixture
+    def internal_location(self, business):
+        from locations.domain.models import Headquarters, InternalLocation
+
+        headquarters = Headquarters.objects.create(
+            name="Main", address="Street 1", phone="3000000000", business_key=business
+        )
+        return InternalLocation.objects.create(
+            name="Room", floor="1", room_number="101", headquarters_key=headquarters
+        )
+
+    def test_registry_holds_path_to_business(self):
+        """
+        Business rule: every location model maps to the FK path that
+        reaches its Business.
+        """
+        from appcore.business_paths import get_business_path
+        from locations.domain.models import Business, Headquarters, InternalLocation
+
+        assert get_business_path(Business) == ()
+        assert get_business_path(Headquarters) == ("business_key",)
+        assert get_business_path(InternalLocation) == ("business",)
+
+    def test_direct_fk_resolves_without_queries(self, internal_location, business, django_assert_num_queries):
+        """
+        Business rule: a loaded FK id to Business needs no query.
+        """
+        from locations.domain.models import Headquarters
+
+        headquarters = Headquarters.objects.get(pk=internal_location.headquarters_key_id)
+
+        with django_assert_num_queries(0):
+            assert headquarters.get_business_id() == business.id
+
+    def test_denormalized_column_resolves_without_queries(self, internal_location, business, django_assert_num_queries):
+        """
+        Business rule: the business column copied from the headquarters
+        replaces the path through it.
+        """
+        from locations.domain.models import InternalLocation
+
+        internal_location = InternalLocation.objects.get(pk=internal_location.pk)
+
+        with django_assert_num_queries(0):
+            assert internal_location.get_business_id() == business.id
+
+
+class TestBusinessColumn:
+    """
+    The business-owned models keep a denormalized business column that
+    follows their parents.
+    """
+
+    @pytest.fixture
+    def other_business(self, db):
+        from locations.domain.models import Business
+
+        return Business.objects.create(name="Other Business", tin="0987654321", utr="OTHER-UTR-01")
+
+    @pytest.fixture
+    def asset_tree(self, business):
+        """An asset with one system, subsystem, minimum component, routine and step."""
+        from assets.domain.models import Asset
+        from components.domain.models import AssetSystem, MinimumComponent, SubsystemComponent
+        from protocol.domain.models import maintenanceRoutine, routineStep
+
+        asset = Asset.objects.create(
+            name="Pump", manufacturer="ACME", family_model="P1", part_number="PN-1", serial_number="SN-1",
+            op_capability="100", height=1, width=1, depth=1, weight=1, technical_data="", additional_info="",
+            business=business,
+        )
+        system = AssetSystem.objects.create(name="Hydraulic", part_number="PN-2", asset_key=asset)
+        subsystem = SubsystemComponent.objects.create(name="Valve", part_number="PN-3", asset_system_key=system)
+        component = MinimumComponent.objects.create(name="Seal", part_number="PN-4", subsystem_component_key=subsystem)
+        routine = maintenanceRoutine.objects.create(asset_key=asset, description="Monthly")
+        step = routineStep.objects.create(routine_key=routine, description="Check")
+        return asset, [system, subsystem, component, routine, step]
+
+    def test_internal_location_follows_its_headquarters(self, business, other_business):
+        """
+        Business rule: an internal location copies the business of its
+        headquarters and moves with it.
+        """
+        from locations.domain.models import Headquarters, InternalLocation
+
+        headquarters = Headquarters.objects.create(name="Main", address="Street 1", phone="3000000000", business_key=business)
+        room = InternalLocation.objects.create(name="Room", floor="1", room_number="101", headquarters_key=headquarters)
+        assert room.business_id == business.pk
+
+        headquarters = Headquarters.objects.get(pk=headquarters.pk)
+        headquarters.business_key = other_business
+        headquarters.save()
+
+        assert InternalLocation.objects.get(pk=room.pk).business_id == other_business.pk
+
+    def test_asset_business_reaches_every_level(self, asset_tree, business, other_business, django_assert_max_num_queries):
+        """
+        Business rule: changing the business of an asset rewrites the
+        column of every component and routine below it, one UPDATE per
+        model.
+        """
+        from assets.domain.models import Asset
+
+        asset, descendants = asset_tree
+        assert {row.business_id for row in descendants} == {business.pk}
+
+        asset = Asset.objects.get(pk=asset.pk)
+        asset.business = other_business
+        with django_assert_max_num_queries(8):
+            asset.save()
+
+        for row in descendants:
+            assert type(row).objects.get(pk=row.pk).business_id == other_business.pk
+
+    def test_unchanged_business_does_not_propagate(self, asset_tree, django_assert_num_queries):
+        """
+        Business rule: saving a loaded row without moving it runs no
+        extra UPDATE on its children.
+        """
+        from assets.domain.models import Asset
+
+        asset = Asset.objects.get(pk=asset_tree[0].pk)
+        asset.name = "Main pump"
+
+        #the UPDATE of the asset and the upsert of its where-used entry
+        with django_assert_num_queries(2):
+            asset.save()
+
+
+class TestFilterPermitted:
+    """
+    BusinessPermissionBackend.filter_permitted authorizes a batch of
+    objects without one permission check per object.
+    """
+
+    @pytest.fixture
+    def headquarters_pair(self, business):
+        """One headquarters in the member business and one in another business."""
+        from locations.domain.models import Business, Headquarters
+
+        other_business = Business.objects.create(name="Other Business", tin="0987654321", utr="OTHER-UTR-01")
+        own = Headquarters.objects.create(name="Own", address="Street 1", phone="3000000000", business_key=business)
+        foreign = Headquarters.objects.create(
+            name="Foreign", address="Street 2", phone="3000000001", business_key=other_business
+        )
+        return own, foreign
+
+    def test_queryset_is_scoped_to_permitted_businesses(
+        self, worker_membership, permission_model, headquarters_pair, django_assert_num_queries
+    ):
+        """
+        Business rule: only objects owned by businesses where the user
+        holds the permission are returned, with one query for the
+        memberships and one for the objects.
+        """
+        from permissions.domain.backends import BusinessPermissionBackend
+        from locations.domain.models import Headquarters
+
+        own, foreign = headquarters_pair
+        backend = BusinessPermissionBackend()
+
+        with django_assert_num_queries(3):  # permission catalog, memberships, objects
+            permitted = list(backend.filter_permitted(worker_membership.user, permission_model.codename, Headquarters.objects.all()))
+
+        assert permitted == [own]
+
+    def test_list_of_objects_is_filtered(self, worker_membership, permission_model, headquarters_pair):
+        """
+        Business rule: lists of instances are filtered the same way.
+        """
+        from permissions.domain.backends import BusinessPermissionBackend
+
+        own, foreign = headquarters_pair
+        backend = BusinessPermissionBackend()
+
+        assert backend.filter_permitted(worker_membership.user, permission_model.codename, [foreign, own]) == [own]
+
+    def test_missing_permission_returns_nothing(self, worker_membership, headquarters_pair):
+        """
+        Business rule: without the permission no object is returned.
+        """
+        from permissions.domain.backends import BusinessPermissionBackend
+
+        backend = BusinessPermissionBackend()
+
+        assert backend.filter_permitted(worker_membership.user, "missing_codename", list(headquarters_pair)) == []
+
+
+class TestPermissionCatalog:
+    """
+    The permission catalog answers codename, natural key and id
+    lookups from memory once loaded.
+    """
+
+    def test_lookups_hit_the_database_once(self, permission_model, django_assert_num_queries):
+        """
+        Business rule: the catalog is loaded once and every later
+        lookup is served from memory.
+        """
+        from permissions.domain.permission_catalog import get_permission_catalog
+
+        with django_assert_num_queries(1):
+            catalog = get_permission_catalog()
+            assert catalog.get(permission_model.codename).id == permission_model.id
+            assert catalog.get(permission_model.codename, app_label="users").id == permission_model.id
+            assert catalog.get_by_id(permission_model.id).codename == permission_model.codename
+            assert catalog.id_for("missing_codename") is None
+
+    def test_catalog_is_read_only(self, permission_model):
+        """
+        Business rule: the shared catalog cannot be mutated by callers.
+        """
+        from permissions.domain.permission_catalog import get_permission_catalog
+
+        catalog = get_permission_catalog()
+        with pytest.raises(TypeError):
+            catalog.by_codename["other"] = permission_model
+        with pytest.raises(AttributeError):
+            catalog.get(permission_model.codename).codename = "other"
+
+
+class TestVisibleTo:
+    """
+    The location querysets scope rows to the businesses where the user
+    holds the permission inside a single SQL statement.
+    """
+
+    @pytest.fixture
+    def view_headquarters(self, global_worker_role):
+        from django.contrib.auth.models import Permission
+
+        permission = Permission.objects.get(codename="view_headquarters")
+        global_worker_role.permissions.add(permission)
+        return permission
+
+    @pytest.fixture
+    def locations(self, business):
+        """Two headquarters with an internal location each, one in another business."""
+        from locations.domain.models import Business, Headquarters, InternalLocation
+
+        other_business = Business.objects.create(name="Other Business", tin="0987654321", utr="OTHER-UTR-01")
+        own = Headquarters.objects.create(name="Own", address="Street 1", phone="3000000000", business_key=business)
+        foreign = Headquarters.objects.create(
+            name="Foreign", address="Street 2", phone="3000000001", business_key=other_business
+        )
+        for headquarters in (own, foreign):
+            InternalLocation.objects.create(name="Room", floor="1", room_number="101", headquarters_key=headquarters)
+        return own, foreign
+
+    def test_headquarters_scoped_in_one_query(
+        self, business_membership, view_headquarters, locations, django_assert_num_queries
+    ):
+        """
+        Business rule: only headquarters of businesses granting the
+        permission are returned, with a single statement.
+        """
+        from locations.domain.models import Headquarters
+        from permissions.domain.permission_catalog import get_permission_catalog
+
+        own, foreign = locations
+        get_permission_catalog()
+
+        with django_assert_num_queries(1):
+            visible = list(Headquarters.objects.visible_to(business_membership.user, "view"))
+
+        assert visible == [own]
+
+    def test_denied_override_hides_rows(self, business_membership, view_headquarters, locations):
+        """
+        Business rule: a denied override removes the role permission.
+        """
+        from locations.domain.models import Headquarters
+        from permissions.domain.models import UserBusinessPermission
+
+        UserBusinessPermission.objects.create(
+            membership=business_membership, permission=view_headquarters, allowed=False
+        )
+
+        assert not Headquarters.objects.visible_to(business_membership.user, "view").exists()
+
+    def test_allowed_override_shows_rows(self, business_membership, locations):
+        """
+        Business rule: an allowed override grants a permission the role
+        does not have.
+        """
+        from django.contrib.auth.models import Permission
+        from locations.domain.models import Business
+        from permissions.domain.models import UserBusinessPermission
+
+        UserBusinessPermission.objects.create(
+            membership=business_membership, permission=Permission.objects.get(codename="view_business"), allowed=True
+        )
+
+        assert list(Business.objects.visible_to(business_membership.user, "view")) == [business_membership.business]
+
+    def test_user_internal_locations_keep_nested_shape(
+        self, business_membership, global_worker_role, locations, django_assert_num_queries
+    ):
+        """
+        Business rule: internal locations are grouped by business and
+        headquarters, and serialized, with a single query.
+        """
+        from django.contrib.auth.models import Permission
+        from locations.domain.models import InternalLocation
+        from locations.presentation.serializers.internal_location_serializer import InternalLocationListSerializer
+        from permissions.domain.permission_catalog import get_permission_catalog
+
+        own, foreign = locations
+        empty = own.business_key.headquarters_set.create(name="Empty", address="Street 3", phone="3000000002")
+        global_worker_role.permissions.add(Permission.objects.get(codename="view_internallocation"))
+        request = RequestFactory().get("/")
+        request.user = business_membership.user
+        get_permission_catalog()
+
+        with django_assert_num_queries(1):
+            grouped = InternalLocation.objects.get_user_internal_locations(request=request)
+            data = InternalLocationListSerializer(grouped[own.business_key_id][own.pk], many=True).data
+
+        assert list(grouped) == [own.business_key_id]
+        assert list(grouped[own.business_key_id]) == [own.pk, empty.pk]
+        assert grouped[own.business_key_id][empty.pk] == []
+        assert list(data[0].values())[0]["headquarter_name"] == own.name
+
+
+class TestPermissionClaims:
+    """
+    Tokens issued at login carry the membership bitsets and the user
+    permission version, and authorize while the version is current.
+    """
+
+    @pytest.fixture
+    def token_request(self, worker_membership):
+        """A request authenticated with a freshly issued access token."""
+        from users.presentation.serializers.token_serializer import CustomTokenObtainPairSerializer
+
+        refresh = CustomTokenObtainPairSerializer.get_token(worker_membership.user)
+        request = RequestFactory().get("/")
+        request.auth = refresh.access_token
+        return request
+
+    def test_token_carries_membership_bits(self, token_request, worker_membership, permission_model):
+        """
+        Business rule: the access token holds the permissions of every
+        active membership of the user.
+        """
+        from permissions.domain.permission_claims import PERMISSIONS_CLAIM
+
+        claims = token_request.auth[PERMISSIONS_CLAIM]
+        assert list(claims) == [str(worker_membership.business_id)]
+
+    def test_current_claims_authorize_without_queries(
+        self, token_request, worker_membership, permission_model, django_assert_num_queries
+    ):
+        """
+        Business rule: while the permission version is current the
+        permission check is answered from the token.
+        """
+        from users.domain.models import User
+        from permissions.domain.permission_catalog import get_permission_catalog
+
+        get_permission_catalog()
+        user_id, business_id = worker_membership.user_id, worker_membership.business_id
+
+        with django_assert_num_queries(0):
+            assert User.objects.user_has_clearance(user_id, business_id, permission_model.codename, request=token_request)
+
+    def test_permission_change_discards_claims(self, token_request, worker_membership, permission_model):
+        """
+        Business rule: a change of the user's overrides makes the
+        claims stale and the check falls back to the database.
+        """
+        from users.domain.models import User
+        from permissions.domain.models import UserBusinessPermission
+
+        UserBusinessPermission.objects.create(
+            membership=worker_membership, permission=permission_model, allowed=False
+        )
+
+        assert not User.objects.user_has_clearance(
+            worker_membership.user_id, worker_membership.business_id, permission_model.codename, request=token_request
+        )
+
+    def test_deleted_version_discards_claims(self, token_request, worker_membership, permission_model):
+        """
+        Business rule: claims issued under a version the cache no longer
+        holds are not trusted.
+        """
+        from django.core.cache import cache
+        from permissions.domain.permission_cache import _user_version_key
+        from permissions.domain.permission_claims import get_claimed_permissions
+
+        cache.delete(_user_version_key(worker_membership.user_id))
+
+        assert get_claimed_permissions(token_request.auth, worker_membership.user_id, worker_membership.business_id) is None
+
+    def test_cache_without_versions_adds_no_claims(self, worker_membership, permission_model, settings):
+        """
+        Business rule: when the cache keeps no versions the token gets no
+        claims, and a token with a null version always falls back to the
+        database.
+        """
+        from users.domain.models import User
+        from users.presentation.serializers.token_serializer import CustomTokenObtainPairSerializer
+        from permissions.domain.permission_claims import PERMISSIONS_CLAIM, PERMISSION_VERSION_CLAIM
+
+        settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+        access = CustomTokenObtainPairSerializer.get_token(worker_membership.user).access_token
+        assert PERMISSIONS_CLAIM not in access and PERMISSION_VERSION_CLAIM not in access
+
+        access[PERMISSIONS_CLAIM] = {str(worker_membership.business_id): "ff"}
+        access[PERMISSION_VERSION_CLAIM] = None
+        request = RequestFactory().get("/")
+        request.auth = access
+        worker_membership.is_active = False
+        worker_membership.save()
+
+        assert not User.objects.user_has_clearance(
+            worker_membership.user_id, worker_membership.business_id, permission_model.codename, request=request
+        )
@@ -0,0 +1,220 @@
+"""
+Tests for the where-used index of part and serial numbers.
+
+Level: INTEGRATION — the PartUsage rows are written by the component
+signals and read through the where-used endpoint.
+"""
+
+import io
+import pytest
+from rest_framework.test import APIClient
+
+
+def _asset(business, name, part_number="PN-ASSET"):
+    from assets.domain.models import Asset
+
+    return Asset.objects.create(
+        name=name, manufacturer="ACME", family_model="P1", part_number=part_number, serial_number=f"SN-{name}",
+        op_capability="100", height=1, width=1, depth=1, weight="2.50", technical_data="data",
+        additional_info="notes", business=business,
+    )
+
+
+@pytest.fixture
+def hierarchy(business):
+    from components.domain.models import AssetSystem, MinimumComponent, SubsystemComponent
+
+    pump = _asset(business, "Pump")
+    system = AssetSystem.objects.create(name="Motor", part_number="PN-MOTOR", asset_key=pump)
+    subsystem = SubsystemComponent.objects.create(name="Rotor", part_number="PN-ROTOR", asset_system_key=system)
+    bearing = MinimumComponent.objects.create(
+        name="Bearing", part_number="PN-6204", serial_number="SN-B1", subsystem_component_key=subsystem
+    )
+    return pump, system, subsystem, bearing
+
+
+def _usage(kind, object_id):
+    from components.domain.models import PartUsage
+
+    return PartUsage.objects.get(kind=kind, object_id=object_id)
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+class TestWhereUsedIndex:
+    """
+    The index follows saves, moves and deletes of the assets and
+    components.
+    """
+
+    def test_component_entry_points_to_its_asset_system_and_business(self, hierarchy):
+        """
+        Business rule: a minimum component is indexed with the asset and
+        system above it and their business.
+        """
+        pump, system, _, bearing = hierarchy
+
+        usage = _usage("minimumcomponent", bearing.pk)
+
+        assert (usage.part_number, usage.serial_number) == ("PN-6204", "SN-B1")
+        assert (usage.asset_id, usage.asset_system_id, usage.business_id) == (pump.pk, system.pk, pump.business_id)
+
+    def test_moving_a_system_moves_the_entries_below_it(self, business, hierarchy):
+        """
+        Business rule: when a system changes asset, its subsystems and
+        components are listed under the new asset.
+        """
+        from locations.domain.models import Business
+
+        other = Business.objects.create(name="Other Business", tin="0987654321", utr="OTHER-UTR-01")
+        _, system, subsystem, bearing = hierarchy
+        compressor = _asset(other, "Compressor")
+
+        system.asset_key = compressor
+        system.save()
+
+        for kind, object_id in (("assetsystem", system.pk), ("subsystemcomponent", subsystem.pk), ("minimumcomponent", bearing.pk)):
+            usage = _usage(kind, object_id)
+            assert (usage.asset_id, usage.business_id) == (compressor.pk, other.pk)
+
+    def test_moving_a_subsystem_moves_its_components(self, business, hierarchy):
+        """
+        Business rule: the components of a subsystem follow it to another
+        system.
+        """
+        from components.domain.models import AssetSystem
+
+        pump, _, subsystem, bearing = hierarchy
+        spare = AssetSystem.objects.create(name="Spare motor", part_number="PN-MOTOR", asset_key=pump)
+
+        subsystem.asset_system_key = spare
+        subsystem.save()
+
+        assert _usage("minimumcomponent", bearing.pk).asset_system_id == spare.pk
+
+    def test_moving_an_asset_to_another_business_moves_its_entries(self, hierarchy):
+        """
+        Business rule: the business of the entries follows the asset.
+        """
+        from components.domain.models import PartUsage
+        from locations.domain.models import Business
+
+        other = Business.objects.create(name="Other Business", tin="0987654321", utr="OTHER-UTR-01")
+        pump = hierarchy[0]
+
+        pump.business = other
+        pump.save()
+
+        assert set(PartUsage.objects.filter(asset=pump).values_list("business_id", flat=True)) == {other.pk}
+
+    def test_deleting_a_component_removes_its_entry(self, hierarchy):
+        """
+        Business rule: deleted rows leave the index, the rows cascading
+        from an asset included.
+        """
+        from components.domain.models import PartUsage
+
+        pump, _, _, bearing = hierarchy
+        bearing.delete()
+        assert not PartUsage.objects.filter(kind="minimumcomponent", object_id=bearing.pk).exists()
+
+        pump.delete()
+        assert not PartUsage.objects.exists()
+
+    def test_imported_assets_are_indexed(self, business):
+        """
+        Business rule: the bulk import writes the entries of its assets.
+        """
+        import json
+        from components.domain.models import PartUsage
+        from assets.domain.service.asset_import_service import AssetImportService
+
+        row = {
+            "name": "Pump", "manufacturer": "ACME", "family_model": "P1", "part_number": "PN-IMPORTED", "serial_number": "SN-1",
+            "op_capability": "100", "height": 1, "width": 1, "depth": 1, "weight": "2.50", "technical_data": "data",
+            "additional_info": "notes",
+        }
+        AssetImportService().import_assets(io.StringIO(json.dumps(row)), "jsonl", business, io.StringIO())
+
+        assert PartUsage.objects.filter(part_number="PN-IMPORTED", kind="asset", business=business).count() == 1
+
+    def test_backfill_rebuilds_the_index(self, hierarchy, monkeypatch):
+        """
+        Business rule: the migration backfill indexes every existing row.
+        """
+        from importlib import import_module
+        from django.apps import apps
+        from components.domain.models import PartUsage
+
+        migration = import_module("components.migrations.0004_part_usage")
+        monkeypatch.setattr(migration, "BATCH_SIZE", 1)
+        PartUsage.objects.all().delete()
+        migration.fill_part_usage(apps, None)
+
+        assert sorted(PartUsage.objects.values_list("kind", flat=True)) == [
+            "asset", "assetsystem", "minimumcomponent", "subsystemcomponent",
+        ]
+
+
+class TestWhereUsedEndpoint:
+    """
+    The endpoint answers a part or serial number with one query.
+    """
+
+    def test_part_number_lookup_is_one_query(self, superuser, hierarchy):
+        """
+        Business rule: the lookup returns the asset and system of every
+        match in a single query.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        pump, system, _, bearing = hierarchy
+        client = _client(superuser)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/assets/where-used/", {"part_number": "PN-6204"})
+
+        assert response.status_code == 200
+        assert response.json()["data"] == [{
+            "kind": "minimumcomponent", "id": bearing.pk, "part_number": "PN-6204", "serial_number": "SN-B1",
+            "asset": {"id": pump.pk, "name": "Pump"}, "asset_system": {"id": system.pk, "name": "Motor"},
+            "business": pump.business_id,
+        }]
+        assert len(queries) == 1
+
+    def test_serial_number_lookup(self, superuser, hierarchy):
+        """
+        Business rule: a serial number is looked up the same way.
+        """
+        data = _client(superuser).get("/assets/where-used/", {"serial_number": "SN-Pump"}).json()["data"]
+
+        assert [(usage["kind"], usage["asset_system"]) for usage in data] == [("asset", None)]
+
+    def test_member_only_sees_parts_of_permitted_businesses(self, business_membership, hierarchy, global_worker_role):
+        """
+        Business rule: matches in businesses without view_asset are left
+        out.
+        """
+        from django.contrib.auth.models import Permission
+        from locations.domain.models import Business
+
+        other = Business.objects.create(name="Other Business", tin="0987654321", utr="OTHER-UTR-01")
+        _asset(other, "Foreign pump")
+        global_worker_role.permissions.add(Permission.objects.get(codename="view_asset"))
+
+        data = _client(business_membership.user).get("/assets/where-used/", {"part_number": "PN-ASSET"}).json()["data"]
+
+        assert [usage["asset"]["name"] for usage in data] == ["Pump"]
+
+    def test_exactly_one_number_is_required(self, superuser):
+        """
+        Business rule: the lookup needs one of part_number or serial_number.
+        """
+        client = _client(superuser)
+
+        assert client.get("/assets/where-used/").status_code == 400
+        assert client.get("/assets/where-used/", {"part_number": "A", "serial_number": "B"}).status_code == 400